@@ -9,7 +9,14 @@ CREATE TABLE DimWaktu (
     bulan INT NOT NULL,
     tahun INT NOT NULL,
     nama_bulan VARCHAR(20) NOT NULL,
-    UNIQUE KEY (tanggal)
+    hari_dalam_tahun SMALLINT,  -- 1-366
+    minggu_iso TINYINT,         -- minggu ISO 8601, 1-53
+    dekad TINYINT,              -- dasarian dalam tahun, 1-36 (hari 1-10, 11-20, 21-akhir tiap bulan)
+    musim TINYINT,              -- 0 kemarau, 1 peralihan ke hujan, 2 hujan, 3 peralihan ke kemarau
+    urutan_bulan INT,           -- tahun * 12 + bulan - 1, berurutan lintas tahun
+    diperbarui_pada TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    UNIQUE KEY (tanggal),
+    KEY (diperbarui_pada)
 );
 
 -- Tabel Dimensi Lokasi
@@ -23,7 +30,9 @@ CREATE TABLE DimLokasi (
     lintang BIGINT,
     bujur BIGINT,
     elevasi DECIMAL(10, 2),
-    UNIQUE KEY (nama_lokasi, jenis_lokasi)
+    diperbarui_pada TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    UNIQUE KEY (nama_lokasi, jenis_lokasi),
+    KEY (diperbarui_pada)
 );
 
 -- Tabel Fakta Curah Hujan
@@ -41,10 +50,27 @@ CREATE TABLE FactDataIklim (
     arah_angin_max VARCHAR(10),          -- DDD_X (bisa angka atau huruf)
     kecepatan_angin_rata DECIMAL(10, 2), -- FF_AVG
     arah_angin_terbanyak VARCHAR(10),    -- DDD_CAR
+    -- Waktu INSERT/UPDATE terakhir, bagian dari versi data yang dibaca dashboard
+    diperbarui_pada TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    KEY (diperbarui_pada),
     FOREIGN KEY (waktu_id) REFERENCES DimWaktu(waktu_id),
     FOREIGN KEY (lokasi_id) REFERENCES DimLokasi(lokasi_id)
 );
 
+-- Tabel Kelengkapan Data: jumlah nilai per stasiun, bulan dan variabel (diisi oleh DBInput.py)
+CREATE TABLE KelengkapanData (
+    lokasi_id INT NOT NULL,
+    tahun INT NOT NULL,
+    bulan INT NOT NULL,
+    variabel VARCHAR(30) NOT NULL,
+    jumlah_terukur INT NOT NULL DEFAULT 0,  -- nilai terukur
+    jumlah_8888 INT NOT NULL DEFAULT 0,     -- 8888: data tidak terukur
+    jumlah_9999 INT NOT NULL DEFAULT 0,     -- 9999: tidak ada data
+    jumlah_kosong INT NOT NULL DEFAULT 0,   -- '-' atau kosong
+    PRIMARY KEY (lokasi_id, tahun, bulan, variabel),
+    FOREIGN KEY (lokasi_id) REFERENCES DimLokasi(lokasi_id)
+);
+
 -- Insert data lokasi
 INSERT INTO DimLokasi (nama_lokasi, jenis_lokasi) VALUES
 ('Bogor', 'Kabupaten'),
@@ -4,6 +4,7 @@ import mysql.connector
 from datetime import datetime
 import os
 import logging
+from collections import Counter
 from dotenv import load_dotenv
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -50,6 +51,153 @@ def convert_wind_direction(val):
         return None
     return str(val).strip()
 
+def status_data(val):
+    # Kolom penghitung di KelengkapanData untuk nilai yang sudah dikonversi
+    if val is None:
+        return 'jumlah_kosong'
+    try:
+        kode = float(val)
+    except ValueError:
+        return 'jumlah_terukur'  # arah angin berupa huruf
+    if kode == 8888:
+        return 'jumlah_8888'
+    if kode == 9999:
+        return 'jumlah_9999'
+    return 'jumlah_terukur'
+
+# Kolom FactDataIklim yang dihitung di KelengkapanData
+variabel_kelengkapan = ['curah_hujan', 'suhu_min', 'suhu_max', 'suhu_rata', 'kelembaban_rata', 'lama_penyinaran',
+                        'kecepatan_angin_max', 'arah_angin_max', 'kecepatan_angin_rata', 'arah_angin_terbanyak']
+
+def simpan_kelengkapan(lokasi_id, kelengkapan):
+    # Tambahkan jumlah per (tahun, bulan, variabel) ke KelengkapanData
+    baris = {}
+    for (tahun, bulan, variabel, status), jumlah in kelengkapan.items():
+        nilai = baris.setdefault((tahun, bulan, variabel), dict.fromkeys(
+            ['jumlah_terukur', 'jumlah_8888', 'jumlah_9999', 'jumlah_kosong'], 0))
+        nilai[status] += jumlah
+    
+    cursor.executemany("""
+        INSERT INTO KelengkapanData (lokasi_id, tahun, bulan, variabel,
+                                     jumlah_terukur, jumlah_8888, jumlah_9999, jumlah_kosong)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            jumlah_terukur = jumlah_terukur + VALUES(jumlah_terukur),
+            jumlah_8888 = jumlah_8888 + VALUES(jumlah_8888),
+            jumlah_9999 = jumlah_9999 + VALUES(jumlah_9999),
+            jumlah_kosong = jumlah_kosong + VALUES(jumlah_kosong)
+    """, [(lokasi_id, tahun, bulan, variabel, nilai['jumlah_terukur'], nilai['jumlah_8888'],
+          nilai['jumlah_9999'], nilai['jumlah_kosong'])
+         for (tahun, bulan, variabel), nilai in baris.items()])
+
+# ===== KOLOM KALENDER DIMWAKTU =====
+kolom_kalender = {
+    'hari_dalam_tahun': 'SMALLINT',
+    'minggu_iso': 'TINYINT',
+    'dekad': 'TINYINT',
+    'musim': 'TINYINT',
+    'urutan_bulan': 'INT'
+}
+
+# Database lama dibuat sebelum kolom kalender ada
+cursor.execute("""
+    SELECT COLUMN_NAME FROM information_schema.COLUMNS
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'DimWaktu'
+""")
+kolom_ada = {baris[0] for baris in cursor.fetchall()}
+for kolom, tipe in kolom_kalender.items():
+    if kolom not in kolom_ada:
+        cursor.execute(f"ALTER TABLE DimWaktu ADD COLUMN {kolom} {tipe}")
+        logging.info(f"Added column DimWaktu.{kolom}")
+
+# ===== PENANDA PEMBARUAN =====
+# Dashboard membaca MAX(diperbarui_pada) sebagai bagian dari versi data, sehingga UPDATE juga terdeteksi
+for tabel in ['FactDataIklim', 'DimWaktu', 'DimLokasi']:
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = 'diperbarui_pada'
+    """, (tabel,))
+    if not cursor.fetchone()[0]:
+        cursor.execute(f"""
+            ALTER TABLE {tabel}
+            ADD COLUMN diperbarui_pada TIMESTAMP(6) NOT NULL
+                DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+            ADD KEY (diperbarui_pada)
+        """)
+        logging.info(f"Added column {tabel}.diperbarui_pada")
+
+# ===== TABEL KELENGKAPAN DATA =====
+# Database lama dibuat sebelum tabel ini ada
+cursor.execute("""
+    CREATE TABLE IF NOT EXISTS KelengkapanData (
+        lokasi_id INT NOT NULL,
+        tahun INT NOT NULL,
+        bulan INT NOT NULL,
+        variabel VARCHAR(30) NOT NULL,
+        jumlah_terukur INT NOT NULL DEFAULT 0,
+        jumlah_8888 INT NOT NULL DEFAULT 0,
+        jumlah_9999 INT NOT NULL DEFAULT 0,
+        jumlah_kosong INT NOT NULL DEFAULT 0,
+        PRIMARY KEY (lokasi_id, tahun, bulan, variabel),
+        FOREIGN KEY (lokasi_id) REFERENCES DimLokasi(lokasi_id)
+    )
+""")
+
+def hitung_ulang_kelengkapan():
+    # Hitung ulang semua penghitung dari FactDataIklim (sama dengan bagian 9 delete_factdata_queries.sql)
+    nilai = ' '.join(f"WHEN '{variabel}' THEN f.{variabel}" for variabel in variabel_kelengkapan)
+    daftar = ' UNION ALL '.join(f"SELECT '{variabel}' AS variabel" for variabel in variabel_kelengkapan)
+    cursor.execute("DELETE FROM KelengkapanData")
+    cursor.execute(f"""
+        INSERT INTO KelengkapanData (lokasi_id, tahun, bulan, variabel,
+                                     jumlah_terukur, jumlah_8888, jumlah_9999, jumlah_kosong)
+        SELECT
+            lokasi_id, tahun, bulan, variabel,
+            SUM(nilai IS NOT NULL AND nilai + 0 NOT IN (8888, 9999)),
+            SUM(nilai IS NOT NULL AND nilai + 0 = 8888),
+            SUM(nilai IS NOT NULL AND nilai + 0 = 9999),
+            SUM(nilai IS NULL)
+        FROM (
+            SELECT f.lokasi_id, w.tahun, w.bulan, v.variabel, CASE v.variabel {nilai} END AS nilai
+            FROM FactDataIklim f
+            JOIN DimWaktu w ON f.waktu_id = w.waktu_id
+            CROSS JOIN ({daftar}) v
+        ) n
+        GROUP BY lokasi_id, tahun, bulan, variabel
+    """)
+    conn.commit()
+    logging.info(f"Recounted KelengkapanData: {cursor.rowcount} rows")
+
+# Impor hanya menambah penghitung untuk baris barunya, jadi baris FactDataIklim yang masuk
+# sebelum tabel ada belum terhitung dan dashboard akan melaporkan kelengkapan terlalu rendah
+cursor.execute("""
+    SELECT (SELECT COUNT(*) FROM FactDataIklim) * %s,
+           (SELECT COALESCE(SUM(jumlah_terukur + jumlah_8888 + jumlah_9999 + jumlah_kosong), 0)
+            FROM KelengkapanData)
+""", (len(variabel_kelengkapan),))
+jumlah_nilai, jumlah_terhitung = cursor.fetchone()
+if jumlah_nilai != jumlah_terhitung:
+    hitung_ulang_kelengkapan()
+
+def isi_kalender():
+    # Isi kolom kalender untuk semua tanggal baru dalam satu UPDATE
+    cursor.execute("""
+        UPDATE DimWaktu SET
+            hari_dalam_tahun = DAYOFYEAR(tanggal),
+            minggu_iso = WEEK(tanggal, 3),
+            dekad = (bulan - 1) * 3 + LEAST(CEIL(DAY(tanggal) / 10), 3),
+            musim = CASE
+                WHEN bulan IN (6, 7, 8) THEN 0
+                WHEN bulan IN (9, 10, 11) THEN 1
+                WHEN bulan IN (12, 1, 2) THEN 2
+                ELSE 3
+            END,
+            urutan_bulan = tahun * 12 + bulan - 1
+        WHERE urutan_bulan IS NULL
+    """)
+    conn.commit()
+    logging.info(f"Filled calendar columns for {cursor.rowcount} dates in DimWaktu")
+
 # ===== UPD INFO STASIUN =====
 for loc_key, info in stasiun_info.items():
     nama_lokasi, jenis_lokasi = loc_key.split('-')
@@ -106,6 +254,7 @@ for filename in os.listdir(data_folder):
         # ===== PEMROSESAN BARIS DATA =====
         row_count = 0
         total_rows = len(df)
+        kelengkapan = Counter()  # (tahun, bulan, variabel, status) -> jumlah baris tersimpan
         log_interval = max(1, min(50, total_rows // 10))  # Progress logging
         
         logging.info(f"Starting to process {total_rows} rows of data")
@@ -176,10 +325,17 @@ for filename in os.listdir(data_folder):
             except mysql.connector.Error as err:
                 logging.error(f"Error inserting data: {err}")
                 continue
+            
+            for db_col, val in data_values.items():
+                kelengkapan[(tanggal_obj.year, tanggal_obj.month, db_col, status_data(val))] += 1
         
+        # ===== KELENGKAPAN DATA =====
+        simpan_kelengkapan(lokasi_id, kelengkapan)
         conn.commit()
         logging.info(f"Completed processing {filename}. Successfully imported {row_count} rows of data.")
 
+isi_kalender()
+
 cursor.close()
 conn.close()
 logging.info("Data import completed!")
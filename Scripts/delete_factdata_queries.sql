@@ -54,6 +54,49 @@ ORDER BY l.nama_lokasi;
 -- Setelah delete semua data, reset ID counter
 ALTER TABLE FactDataIklim AUTO_INCREMENT = 1;
 
+-- 9. HITUNG ULANG KELENGKAPANDATA
+-- Jumlah data per stasiun, bulan dan variabel (dipakai dashboard) ikut berubah
+-- setelah menghapus data, jadi hitung ulang dari FactDataIklim
+DELETE FROM KelengkapanData;
+INSERT INTO KelengkapanData (lokasi_id, tahun, bulan, variabel, jumlah_terukur, jumlah_8888, jumlah_9999, jumlah_kosong)
+SELECT
+    lokasi_id, tahun, bulan, variabel,
+    SUM(nilai IS NOT NULL AND nilai + 0 NOT IN (8888, 9999)),
+    SUM(nilai IS NOT NULL AND nilai + 0 = 8888),
+    SUM(nilai IS NOT NULL AND nilai + 0 = 9999),
+    SUM(nilai IS NULL)
+FROM (
+    SELECT
+        f.lokasi_id, w.tahun, w.bulan, v.variabel,
+        CASE v.variabel
+            WHEN 'curah_hujan' THEN f.curah_hujan
+            WHEN 'suhu_min' THEN f.suhu_min
+            WHEN 'suhu_max' THEN f.suhu_max
+            WHEN 'suhu_rata' THEN f.suhu_rata
+            WHEN 'kelembaban_rata' THEN f.kelembaban_rata
+            WHEN 'lama_penyinaran' THEN f.lama_penyinaran
+            WHEN 'kecepatan_angin_max' THEN f.kecepatan_angin_max
+            WHEN 'arah_angin_max' THEN f.arah_angin_max
+            WHEN 'kecepatan_angin_rata' THEN f.kecepatan_angin_rata
+            WHEN 'arah_angin_terbanyak' THEN f.arah_angin_terbanyak
+        END AS nilai
+    FROM FactDataIklim f
+    JOIN DimWaktu w ON f.waktu_id = w.waktu_id
+    CROSS JOIN (
+        SELECT 'curah_hujan' AS variabel
+        UNION ALL SELECT 'suhu_min'
+        UNION ALL SELECT 'suhu_max'
+        UNION ALL SELECT 'suhu_rata'
+        UNION ALL SELECT 'kelembaban_rata'
+        UNION ALL SELECT 'lama_penyinaran'
+        UNION ALL SELECT 'kecepatan_angin_max'
+        UNION ALL SELECT 'arah_angin_max'
+        UNION ALL SELECT 'kecepatan_angin_rata'
+        UNION ALL SELECT 'arah_angin_terbanyak'
+    ) v
+) n
+GROUP BY lokasi_id, tahun, bulan, variabel;
+
 -- ===== PERINGATAN PENTING =====
 -- 1. SELALU BACKUP DATABASE SEBELUM DELETE!
 -- 2. Gunakan WHERE clause untuk menghindari delete semua data
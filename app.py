@@ -0,0 +1,10 @@
+import streamlit as st
+
+# Serve both languages from one process so they share the data cache and
+# connection pool: streamlit run app.py
+pages = [
+    st.Page("streamlit_dashboard.py", title="English", icon="🇬🇧", url_path="en", default=True),
+    st.Page("streamlit_dashboard_id.py", title="Bahasa Indonesia", icon="🇮🇩", url_path="id"),
+]
+
+st.navigation(pages).run()
@@ -1,14 +1,14 @@
 import streamlit as st
 import pandas as pd
-from sqlalchemy import create_engine, text
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import numpy as np
 from datetime import datetime, timedelta
-import os
 from dotenv import load_dotenv
 
+from weather import aggregations, charts, climatology, completeness, cube, data, distributions, exports, extremes, gapfill, perf, sketches, spatial, store, wind
+
 # Load environment variables
 load_dotenv()
 
@@ -32,128 +32,57 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-@st.cache_resource
+RAINFALL_CATEGORIES = ('No Data', 'No Rain', 'Light Rain', 'Moderate Rain', 'Heavy Rain', 'Very Heavy Rain')
+
+# Labels for gapfill.FILL_SOURCES, in the same order
+FILL_SOURCE_LABELS = ('Observed', 'Linear', 'Neighbour station', 'Climatology', 'Missing')
+
+MONTH_NAMES = ('January', 'February', 'March', 'April', 'May', 'June', 'July',
+               'August', 'September', 'October', 'November', 'December')
+
+SEASON_NAMES = {
+    'dry': 'Dry Season',
+    'transition_to_rainy': 'Transition to Rainy',
+    'rainy': 'Rainy Season',
+    'transition_to_dry': 'Transition to Dry'
+}
+
+# Labels of the coded cube.AggregateCube pivot dimensions; months are 1-12
+PIVOT_LABELS = {
+    'month': ('',) + MONTH_NAMES,
+    'season': tuple(SEASON_NAMES[season] for season in aggregations.SEASONS),
+    'level': RAINFALL_CATEGORIES
+}
+
 def get_engine():
-    """Create SQLAlchemy engine with connection pooling"""
+    """Shared SQLAlchemy engine, or None after showing the error"""
     try:
-        host = os.getenv('MYSQL_HOST')
-        user = os.getenv('MYSQL_USER')
-        password = os.getenv('MYSQL_PASSWORD')
-        database = os.getenv('MYSQL_DATABASE')
-        port = os.getenv('MYSQL_PORT', '3306')
-        
-        if not all([host, user, password, database]):
-            st.error("❌ Environment variables are incomplete!")
-            st.write(f"Host: {host}, User: {user}, Database: {database}, Port: {port}")
-            return None
-        
-        connection_url = f"mysql+mysqlconnector://{user}:{password}@{host}:{port}/{database}"
-        
-        engine = create_engine(
-            connection_url,
-            pool_recycle=3600,
-            pool_pre_ping=True,
-            pool_size=5,
-            max_overflow=10,
-            connect_args={
-                'connect_timeout': 10,
-                'autocommit': True
-            }
-        )
-        
-        with engine.connect() as conn:
-            result = conn.execute(text("SELECT 1"))
-            result.fetchone()
-        
-        return engine
-        
+        return data.get_engine()
+    except data.SettingsError as e:
+        st.error("❌ Environment variables are incomplete!")
+        st.write(str(e))
     except Exception as e:
         st.error(f"❌ Failed to create database engine: {e}")
-        return None
+    return None
 
 # Data loading functions
-@st.cache_data(ttl=600)
 def load_weather_data():
-    """Load weather data from database using SQLAlchemy"""
-    engine = get_engine()
-    if engine is None:
+    """English view of the process-wide weather data"""
+    if data.needs_database() and get_engine() is None:
         return None
-    
-    query = """
-    SELECT 
-        f.*,
-        w.tanggal,
-        w.bulan,
-        w.tahun,
-        w.nama_bulan,
-        l.nama_lokasi,
-        l.jenis_lokasi,
-        l.nama_stasiun
-    FROM FactDataIklim f
-    JOIN DimWaktu w ON f.waktu_id = w.waktu_id
-    JOIN DimLokasi l ON f.lokasi_id = l.lokasi_id
-    ORDER BY w.tanggal, l.nama_lokasi
-    """
-    
-    try:
-        df = pd.read_sql(query, engine)
-        
-        if df.empty:
-            return None
-            
-        df = clean_weather_data(df)
-        
-        return df
-        
-    except Exception as e:
+    df = data.load_weather_data()
+    if df is None:
         return None
-
-def clean_weather_data(df):
-    """Clean weather data by handling special values"""
-    df['rainfall_clean'] = df['curah_hujan'].apply(lambda x: 
-        None if x in [8888, 9999] or pd.isna(x) else x)
-    
-    df['rainfall_category'] = df['rainfall_clean'].apply(categorize_rainfall)
-    
-    df['location_full'] = df['nama_lokasi'] + ' (' + df['jenis_lokasi'] + ')'
-    
-    df['date'] = pd.to_datetime(df['tanggal'])
-    
-    # Map Indonesian month names to English
-    month_mapping = {
-        'Januari': 'January',
-        'Februari': 'February', 
-        'Maret': 'March',
-        'April': 'April',
-        'Mei': 'May',
-        'Juni': 'June',
-        'Juli': 'July',
-        'Agustus': 'August',
-        'September': 'September',
-        'Oktober': 'October',
-        'November': 'November',
-        'Desember': 'December'
-    }
-    
-    df['month_name'] = df['nama_bulan'].map(month_mapping).fillna(df['nama_bulan'])
-    df['year'] = df['tahun']
-    
-    return df
-
-def categorize_rainfall(value):
-    """Categorize rainfall intensity"""
-    if pd.isna(value) or value is None:
-        return 'No Data'
-    elif value == 0:
-        return 'No Rain'
-    elif value <= 5:
-        return 'Light Rain'
-    elif value <= 20:
-        return 'Moderate Rain'
-    elif value <= 50:
-        return 'Heavy Rain'
-    else:
-        return 'Very Heavy Rain'
+    return data.label_view(
+        df,
+        rename={'tahun': 'year'},
+        labels={
+            'rainfall_category': ('rainfall_level', RAINFALL_CATEGORIES),
+            # bulan is 1-12
+            'month_name': ('bulan', ('',) + MONTH_NAMES),
+            'season': ('musim', PIVOT_LABELS['season'])
+        }
+    )
 
 def get_consistent_colors():
     """Return consistent color mapping for categories and locations"""
@@ -219,8 +148,8 @@ def main():
         selected_location = st.sidebar.selectbox("Select one location:", all_locations)
         selected_locations = [selected_location]
     
-    min_date = df['tanggal'].min()
-    max_date = df['tanggal'].max()
+    min_date = df['date'].min()
+    max_date = df['date'].max()
     date_range = st.sidebar.date_input(
         "Select Time Period:",
         value=(min_date, max_date),
@@ -237,11 +166,24 @@ def main():
             (filtered_df['date'] <= pd.to_datetime(date_range[1]))
         ]
     
+    # Key identifying the current data and filter state for cached aggregations
+    filter_key = (data.get_data_version(df), tuple(selected_locations), tuple(str(d) for d in date_range))
+    
     # Show active filter information
     st.sidebar.markdown("---")
     st.sidebar.markdown("**📊 Active Filters:**")
     st.sidebar.write(f"• Locations: {len(selected_locations)} regions")
     st.sidebar.write(f"• Data: {len(filtered_df):,} days")
+    
+    fetch_stats = df.attrs.get('fetch_stats')
+    if fetch_stats:
+        st.sidebar.caption(f"⏱️ Fetched in {fetch_stats['seconds']:.2f} s, "
+                           f"{fetch_stats['bytes'] / 1e6:.1f} MB ({fetch_stats['backend']})")
+    
+    if perf.monitor.enabled:
+        perf.monitor.gauge('df bytes', perf.frame_memory(df))
+        perf.monitor.gauge('filtered_df bytes', perf.frame_memory(filtered_df))
+        render_perf_panel()
 
     st.sidebar.markdown("---")
     st.sidebar.markdown("**👨‍💻 Created by:**")
@@ -253,31 +195,66 @@ def main():
     st.sidebar.markdown("- Alfi Syahrian")
     st.sidebar.markdown("[📁 GitHub Repository](https://github.com/ElySimp/Curah-Hujan-Datasets)")
     st.sidebar.markdown("---")
-    
 
-    tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs([
-        "📊 Overview", "🌧️ Rainfall Analysis", "🌡️ Temperature", "💨 Wind & Humidity", "📈 Time Series", "📋 Pivot Table"
-    ])
-    
-    with tab1:
-        overview_tab(filtered_df)
-    
-    with tab2:
-        rainfall_tab(filtered_df)
-    
-    with tab3:
-        temperature_tab(filtered_df)
-    
-    with tab4:
-        wind_humidity_tab(filtered_df)
-    
-    with tab5:
-        timeseries_tab(filtered_df)
-    
-    with tab6:
-        pivot_table_tab(filtered_df)
+    lazy_tabs = st.sidebar.toggle(
+        "⚡ Render active tab only",
+        value=True,
+        help="Only the selected section is computed on each rerun"
+    )
+
+    sections = {
+        "📊 Overview": overview_tab,
+        "🌧️ Rainfall Analysis": rainfall_tab,
+        "🌡️ Temperature": temperature_tab,
+        "💨 Wind & Humidity": wind_humidity_tab,
+        "📈 Time Series": timeseries_tab,
+        "🗺️ Map": map_tab,
+        "📋 Pivot Table": pivot_table_tab
+    }
+
+    if lazy_tabs:
+        active_section = st.radio(
+            "Section:",
+            list(sections.keys()),
+            horizontal=True,
+            key="active_section",
+            label_visibility="collapsed"
+        )
+        render_section(sections[active_section], filtered_df, filter_key)
+    else:
+        tabs = st.tabs(list(sections.keys()))
+        for tab, tab_function in zip(tabs, sections.values()):
+            with tab:
+                render_section(tab_function, filtered_df, filter_key)
 
-def overview_tab(df):
+def render_perf_panel():
+    """Sidebar panel with recorded timings, cache hit rates and memory"""
+    with st.sidebar.expander("⏱️ Performance", expanded=False):
+        gauges = dict(perf.monitor.gauges)
+        for name in ('df bytes', 'filtered_df bytes'):
+            if name in gauges:
+                st.write(f"• {name}: {gauges[name] / 1e6:.1f} MB")
+        if data.needs_database() and get_engine() is not None:
+            st.caption(get_engine().pool.status())
+        for name, value in perf.monitor.counter_summary().items():
+            st.write(f"• {name}: {value:,}")
+        
+        st.markdown("**Cache**")
+        st.dataframe(perf.monitor.cache_summary(), hide_index=True, use_container_width=True)
+        
+        st.markdown("**Timings (ms)**")
+        st.dataframe(perf.monitor.timing_summary(), hide_index=True, use_container_width=True)
+        
+        if st.button("Reset measurements"):
+            perf.monitor.reset()
+
+@st.fragment
+def render_section(tab_function, df, filter_key):
+    """Render one dashboard section; widget changes inside it rerun only this section"""
+    with perf.monitor.timed('tab', tab_function.__name__):
+        tab_function(df, filter_key)
+
+def overview_tab(df, filter_key):
     """Data overview tab"""
     st.subheader("📊 Weather Data Overview")
     
@@ -305,22 +282,28 @@ def overview_tab(df):
     
     col1, col2 = st.columns(2)
     
+    # Completeness comes from the per (station, month, variable) counters, not a scan of df
+    data_types = {
+        'curah_hujan': 'Rainfall',
+        'suhu_min': 'Minimum Temperature',
+        'suhu_max': 'Maximum Temperature',
+        'kelembaban_rata': 'Humidity',
+        'kecepatan_angin_rata': 'Wind Speed'
+    }
+    status_labels = {'jumlah_8888': '8888 (not measurable)', 'jumlah_9999': '9999 (no data)', 'jumlah_kosong': 'Empty'}
+    counts = completeness.select(data.load_completeness(), df['location_full'].unique(),
+                                 df['date'].min(), df['date'].max())
+    
     with col1:
-        missing_data = pd.DataFrame({
-            'Data Type': ['Rainfall', 'Minimum Temperature', 'Maximum Temperature', 'Humidity', 'Wind Speed'],
-            'Missing Data (%)': [
-                (df['rainfall_clean'].isna().sum() / len(df)) * 100,
-                (df['suhu_min'].isna().sum() / len(df)) * 100,
-                (df['suhu_max'].isna().sum() / len(df)) * 100,
-                (df['kelembaban_rata'].isna().sum() / len(df)) * 100,
-                (df['kecepatan_angin_rata'].isna().sum() / len(df)) * 100
-            ]
-        })
-        
-        fig_missing = px.bar(missing_data, x='Data Type', y='Missing Data (%)', 
+        status_share = completeness.shares(counts[counts['variabel'].isin(list(data_types))], 'variabel')
+        missing_data = (status_share.reindex(list(data_types))[list(status_labels)]
+                        .rename(index=data_types, columns=status_labels)
+                        .rename_axis('Data Type').reset_index()
+                        .melt(id_vars='Data Type', var_name='Reason', value_name='Missing Data (%)'))
+        
+        fig_missing = px.bar(missing_data, x='Data Type', y='Missing Data (%)', color='Reason',
                            title="Percentage of Missing Data",
-                           color='Missing Data (%)',
-                           color_continuous_scale='Reds')
+                           color_discrete_sequence=px.colors.sequential.Reds[3::2])
         fig_missing.update_layout(height=400)
         st.plotly_chart(fig_missing, use_container_width=True)
     
@@ -330,8 +313,23 @@ def overview_tab(df):
                             title="Data Distribution by Region")
         fig_location.update_layout(height=400)
         st.plotly_chart(fig_location, use_container_width=True)
+    
+    st.subheader("🗓️ Completeness by Region and Month")
+    
+    heatmap_type = st.selectbox("Data type:", list(data_types), format_func=data_types.get)
+    monthly = counts[counts['variabel'] == heatmap_type].assign(
+        period=lambda frame: frame['tahun'].astype(str) + '-' + frame['bulan'].astype(str).str.zfill(2))
+    if not monthly.empty:
+        observed = completeness.shares(monthly, ['location_full', 'period'])['jumlah_terukur'].unstack('period')
+        fig_completeness = px.imshow(observed.sort_index(axis=1),
+                                     title=f"Measured {data_types[heatmap_type]} Values (%)",
+                                     color_continuous_scale='RdYlGn', zmin=0, zmax=100,
+                                     labels={'x': 'Month', 'y': 'Region', 'color': 'Measured (%)'})
+        fig_completeness.update_layout(height=max(300, 40 * len(observed) + 150))
+        st.plotly_chart(fig_completeness, use_container_width=True)
+        st.caption("Counted per whole month, so months cut by the date filter are included in full")
 
-def rainfall_tab(df):
+def rainfall_tab(df, filter_key):
     """Rainfall analysis tab"""
     st.subheader("🌧️ Rainfall Analysis")
     
@@ -357,7 +355,7 @@ def rainfall_tab(df):
         st.plotly_chart(fig_dist, use_container_width=True)
     
     with col2:
-        monthly_rainfall = df.groupby(['month_name', 'location_full'])['rainfall_clean'].mean().reset_index()
+        monthly_rainfall = df.groupby(['month_name', 'location_full'], observed=True)['rainfall_clean'].mean().reset_index()
         
         location_colors = {
             'Bogor (Kabupaten)': '#1f77b4',
@@ -382,6 +380,57 @@ def rainfall_tab(df):
     
     st.dataframe(location_rainfall, use_container_width=True)
     
+    st.subheader("⛈️ Extreme Rainfall Indices")
+    
+    index_labels = {
+        'CDD': 'Consecutive dry days (< 1 mm)',
+        'CWD': 'Consecutive wet days (≥ 1 mm)',
+        'Rx1day': 'Max 1-day rainfall (mm)',
+        'Rx5day': 'Max 5-day rainfall (mm)',
+        'R10mm': 'Days with ≥ 10 mm',
+        'R20mm': 'Days with ≥ 20 mm',
+        'R50mm': 'Days with ≥ 50 mm',
+        'PRCPTOT': 'Total on wet days (mm)'
+    }
+    yearly_indices = cached_extreme_indices(df, filter_key)
+    selected_index = st.selectbox("Index:", list(index_labels), format_func=index_labels.get)
+    
+    fig_index = px.line(yearly_indices, x='year', y=selected_index, color='location_full', markers=True,
+                        title=f"{index_labels[selected_index]} per Year",
+                        labels={'year': 'Year', selected_index: index_labels[selected_index], 'location_full': 'Region'})
+    st.plotly_chart(fig_index, use_container_width=True)
+    st.dataframe(yearly_indices.set_index(['location_full', 'year']).round(1), use_container_width=True)
+    
+    st.subheader("📈 Rainfall Percentiles & Return Levels")
+    
+    month_order = ['January', 'February', 'March', 'April', 'May', 'June',
+                   'July', 'August', 'September', 'October', 'November', 'December']
+    stations, counts = sketches.rainfall.combine(df)
+    wet_percentiles = sketches.quantiles(counts, (0.95, 0.99), minimum=extremes.WET_DAY_MM)
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        percentile = st.radio("Wet-day percentile:", ['P95', 'P99'], horizontal=True)
+        percentile_table = pd.DataFrame(wet_percentiles[:, :, ['P95', 'P99'].index(percentile)],
+                                        index=stations, columns=month_order)
+        fig_percentile = px.imshow(percentile_table,
+                                   title=f"{percentile} of Daily Rainfall on Wet Days (mm)",
+                                   color_continuous_scale="Blues",
+                                   labels={'x': 'Month', 'y': 'Region', 'color': 'Rainfall (mm)'})
+        st.plotly_chart(fig_percentile, use_container_width=True)
+    
+    with col2:
+        level_rows = {station: sketches.return_levels(counts[row].sum(axis=0))
+                      for row, station in enumerate(stations)}
+        if len(stations) > 1:
+            level_rows['All selected regions'] = sketches.return_levels(counts.sum(axis=(0, 1)))
+        return_table = pd.DataFrame(level_rows, index=[f'{period}-year (mm)' for period in sketches.RETURN_PERIODS]).T
+        st.markdown("**Daily rainfall return levels**")
+        st.dataframe(return_table.round(1), use_container_width=True)
+        st.caption(f"From mergeable rainfall sketches (±{sketches.RELATIVE_ACCURACY:.0%}); "
+                   "periods longer than the selected record are left empty")
+    
     if df['location_full'].nunique() > 1:
         st.subheader("🗓️ Monthly Rainfall Pattern by Region")
         
@@ -394,7 +443,8 @@ def rainfall_tab(df):
             values='rainfall_clean', 
             index='location_full', 
             columns='month_name', 
-            aggfunc='mean'
+            aggfunc='mean',
+            observed=True
         )
         
         available_months = [month for month in month_order if month in pivot_rainfall.columns]
@@ -406,7 +456,7 @@ def rainfall_tab(df):
                               labels={'x': 'Month', 'y': 'Region', 'color': 'Rainfall (mm)'})
         st.plotly_chart(fig_heatmap, use_container_width=True)
 
-def temperature_tab(df):
+def temperature_tab(df, filter_key):
     """Temperature analysis tab"""
     st.subheader("🌡️ Temperature Analysis")
     
@@ -445,24 +495,19 @@ def temperature_tab(df):
         st.plotly_chart(fig_temp, use_container_width=True)
     
     with col2:
-        temp_melted = pd.melt(df[['location_full', 'suhu_min', 'suhu_max', 'suhu_rata']], 
-                            id_vars=['location_full'],
-                            var_name='temp_type', value_name='temperature')
-        
-        temp_melted['temp_type'] = temp_melted['temp_type'].map({
-            'suhu_min': 'Minimum',
-            'suhu_max': 'Maximum', 
-            'suhu_rata': 'Average'
-        })
-        
-        fig_violin = px.violin(temp_melted, x='temp_type', y='temperature',
-                             title="Temperature Distribution",
-                             box=True,
-                             labels={'temperature': 'Temperature (°C)', 'temp_type': 'Temperature Type'})
+        temp_types = {'suhu_min': 'Minimum', 'suhu_max': 'Maximum', 'suhu_rata': 'Average'}
+        summaries = cached_column_summaries(df, filter_key, tuple(temp_types))
+        
+        fig_violin = build_violin_figure(summaries, temp_types)
+        fig_violin.update_layout(
+            title="Temperature Distribution",
+            xaxis_title="Temperature Type",
+            yaxis_title="Temperature (°C)"
+        )
         st.plotly_chart(fig_violin, use_container_width=True)
     
     st.subheader("📈 Temperature Trends Throughout the Year")
-    monthly_temp = df.groupby(['month_name', 'location_full']).agg({
+    monthly_temp = df.groupby(['month_name', 'location_full'], observed=True).agg({
         'suhu_min': 'mean',
         'suhu_max': 'mean',
         'suhu_rata': 'mean'
@@ -485,23 +530,33 @@ def temperature_tab(df):
     fig_monthly_temp.update_layout(xaxis_tickangle=-45)
     st.plotly_chart(fig_monthly_temp, use_container_width=True)
 
-def wind_humidity_tab(df):
+def wind_humidity_tab(df, filter_key):
     """Wind and humidity analysis tab"""
     st.subheader("💨 Wind & Humidity Analysis")
     
     col1, col2 = st.columns(2)
     
     with col1:
-        fig_humidity = px.box(df, x='location_full', y='kelembaban_rata',
-                            title="Humidity Levels by Region",
-                            labels={'kelembaban_rata': 'Humidity (%)', 'location_full': 'Region'})
+        humidity_boxes = cached_group_summaries(df, filter_key, 'kelembaban_rata')
+        
+        fig_humidity = build_box_figure(humidity_boxes)
+        fig_humidity.update_layout(
+            title="Humidity Levels by Region",
+            xaxis_title="Region",
+            yaxis_title="Humidity (%)"
+        )
         fig_humidity.update_xaxes(tickangle=45)
         st.plotly_chart(fig_humidity, use_container_width=True)
     
     with col2:
-        fig_wind = px.histogram(df, x='kecepatan_angin_rata', nbins=30,
-                              title="Wind Speed Distribution",
-                              labels={'kecepatan_angin_rata': 'Wind Speed (m/s)', 'count': 'Number of Days'})
+        wind_hist = cached_histogram(df, filter_key, 'kecepatan_angin_rata', 30)
+        
+        fig_wind = build_histogram_figure(wind_hist)
+        fig_wind.update_layout(
+            title="Wind Speed Distribution",
+            xaxis_title="Wind Speed (m/s)",
+            yaxis_title="Number of Days"
+        )
         st.plotly_chart(fig_wind, use_container_width=True)
     
     st.subheader("📊 Inter-Regional Atmospheric Conditions Comparison")
@@ -518,20 +573,142 @@ def wind_humidity_tab(df):
     
     st.dataframe(wind_humidity_stats, use_container_width=True)
     
+    st.subheader("🧭 Wind Rose")
+    
+    rose_kinds = {'Maximum wind (FF_X / DDD_X)': wind.max_wind, 'Prevailing wind (FF_AVG / DDD_CAR)': wind.prevailing_wind}
+    rose_kind = st.radio("Wind data:", list(rose_kinds), horizontal=True)
+    _, rose_counts = rose_kinds[rose_kind].combine(df)
+    rose, calm_percent = wind.rose_table(rose_counts)
+    
+    if rose.empty:
+        st.info("No wind direction data for the selected filters")
+    else:
+        fig_rose = px.bar_polar(rose, r='percent', theta='direction', color='speed',
+                                category_orders={'direction': list(wind.SECTORS), 'speed': list(wind.SPEED_LABELS)},
+                                color_discrete_sequence=px.colors.sequential.Blues[2:],
+                                title=f"Wind Rose: {rose_kind} (calm {calm_percent:.1f}% of days)",
+                                labels={'percent': 'Days (%)', 'direction': 'Direction', 'speed': 'Speed (m/s)'})
+        fig_rose.update_layout(height=500)
+        st.plotly_chart(fig_rose, use_container_width=True)
+    
     if len(df) > 0:
         st.subheader("🌡️ Humidity and Temperature Relationship")
         
         _, location_colors = get_consistent_colors()
         
-        fig_scatter = px.scatter(df, x='suhu_rata', y='kelembaban_rata', 
-                               color='location_full',
-                               title="Relationship between Temperature and Humidity",
-                               labels={'suhu_rata': 'Average Temperature (°C)', 
-                                      'kelembaban_rata': 'Humidity (%)'},
-                               color_discrete_map=location_colors)
+        n_points = int(df[['suhu_rata', 'kelembaban_rata']].notna().all(axis=1).sum())
+        
+        if n_points > charts.SCATTER_POINT_LIMIT:
+            grid = cached_density_grid(df, filter_key, 'suhu_rata', 'kelembaban_rata')
+            
+            fig_scatter = go.Figure(go.Heatmap(
+                x=grid['x'], y=grid['y'], z=np.where(grid['total'] > 0, grid['total'], np.nan),
+                colorscale='Greys', colorbar=dict(title='Days'), name='All regions'
+            ))
+            for i, (location, counts) in enumerate(grid['groups'].items()):
+                color = location_colors.get(location, px.colors.qualitative.Set2[i % len(px.colors.qualitative.Set2)])
+                fig_scatter.add_trace(go.Contour(
+                    x=grid['x'], y=grid['y'], z=counts,
+                    contours_coloring='lines', line=dict(color=color, width=2),
+                    ncontours=5, showscale=False, showlegend=True, name=location
+                ))
+            fig_scatter.update_layout(
+                title=f"Relationship between Temperature and Humidity (density of {n_points:,} days)",
+                xaxis_title='Average Temperature (°C)',
+                yaxis_title='Humidity (%)'
+            )
+        else:
+            fig_scatter = px.scatter(df, x='suhu_rata', y='kelembaban_rata', 
+                                   color='location_full',
+                                   title="Relationship between Temperature and Humidity",
+                                   labels={'suhu_rata': 'Average Temperature (°C)', 
+                                          'kelembaban_rata': 'Humidity (%)'},
+                                   color_discrete_map=location_colors,
+                                   render_mode=charts.render_mode_for(n_points))
         st.plotly_chart(fig_scatter, use_container_width=True)
 
-def timeseries_tab(df):
+@perf.monitor.cached('extreme_indices', st.cache_data(ttl=600, max_entries=32))
+def cached_extreme_indices(_df, filter_key):
+    """ETCCDI rainfall indices per (location, year), cached per filter"""
+    yearly = extremes.indices.compute(_df, 'location_full', 'date', 'rainfall_clean')
+    return yearly.rename_axis(['location_full', 'year']).reset_index()
+
+@perf.monitor.cached('density_grid', st.cache_data(ttl=600, max_entries=32))
+def cached_density_grid(_df, filter_key, x, y):
+    """2D histogram of x against y per location, cached per filter"""
+    return charts.density_grid(_df, x, y, group='location_full')
+
+@perf.monitor.cached('column_summaries', st.cache_data(ttl=600, max_entries=32))
+def cached_column_summaries(_df, filter_key, columns):
+    """Summary statistics and KDE per column, cached per filter"""
+    return distributions.summarize_columns(_df, list(columns))
+
+@perf.monitor.cached('group_summaries', st.cache_data(ttl=600, max_entries=32))
+def cached_group_summaries(_df, filter_key, variable):
+    """Box statistics per location, cached per (variable, filter)"""
+    return distributions.summarize_groups(_df, variable, 'location_full')
+
+@perf.monitor.cached('histogram', st.cache_data(ttl=600, max_entries=32))
+def cached_histogram(_df, filter_key, variable, bins):
+    """Histogram bins of one variable, cached per filter"""
+    return distributions.histogram_summary(_df[variable].to_numpy(), bins)
+
+def build_violin_figure(summaries, labels):
+    """Draw violins from precomputed KDE curves and box statistics"""
+    fig = go.Figure()
+    colors = px.colors.qualitative.Plotly
+    for i, (column, label) in enumerate(labels.items()):
+        summary = summaries[column]
+        if summary['kde'] is None:
+            continue
+        grid, density = summary['kde']
+        half_width = 0.4 * density / density.max()
+        fig.add_trace(go.Scatter(
+            x=np.concatenate([i - half_width, (i + half_width)[::-1]]),
+            y=np.concatenate([grid, grid[::-1]]),
+            fill='toself', mode='lines', line=dict(color=colors[i % len(colors)], width=1),
+            name=label, hoverinfo='name'
+        ))
+        box = summary['box']
+        fig.add_trace(go.Box(
+            x=[i], q1=[box['q1']], median=[box['median']], q3=[box['q3']],
+            lowerfence=[box['lowerfence']], upperfence=[box['upperfence']], mean=[box['mean']],
+            width=0.08, fillcolor='white', line=dict(color='black', width=1),
+            name=label, showlegend=False
+        ))
+    fig.update_xaxes(tickvals=list(range(len(labels))), ticktext=list(labels.values()))
+    return fig
+
+def build_box_figure(boxes):
+    """Draw box plots from precomputed quartiles and fences"""
+    names = [name for name, box in boxes.items() if box is not None]
+    stats = [boxes[name] for name in names]
+    return go.Figure(go.Box(
+        x=names,
+        q1=[box['q1'] for box in stats],
+        median=[box['median'] for box in stats],
+        q3=[box['q3'] for box in stats],
+        lowerfence=[box['lowerfence'] for box in stats],
+        upperfence=[box['upperfence'] for box in stats],
+        mean=[box['mean'] for box in stats],
+        showlegend=False
+    ))
+
+def build_histogram_figure(histogram):
+    """Draw a histogram from precomputed bin counts"""
+    fig = go.Figure()
+    if histogram is not None:
+        edges = histogram['edges']
+        fig.add_trace(go.Bar(
+            x=(edges[:-1] + edges[1:]) / 2,
+            y=histogram['counts'],
+            width=np.diff(edges),
+            marker_line_width=0
+        ))
+    fig.update_layout(bargap=0)
+    return fig
+
+def timeseries_tab(df, filter_key):
     """Time series analysis tab"""
     st.subheader("📈 Time Series Analysis")
     
@@ -546,59 +723,217 @@ def timeseries_tab(df):
     
     _, location_colors = get_consistent_colors()
     
+    col1, col2 = st.columns([3, 1])
+    
+    with col1:
+        min_date = df['date'].min().date()
+        max_date = df['date'].max().date()
+        zoom_window = None
+        if min_date < max_date:
+            zoom_window = st.slider("Zoom window:", min_value=min_date, max_value=max_date,
+                                    value=(min_date, max_date), format="YYYY-MM-DD")
+    
+    with col2:
+        chart_width = st.select_slider("Chart resolution (px):", options=[800, 1200, 1600, 2400],
+                                       value=charts.DEFAULT_VIEWPORT_PX,
+                                       help="Points per line are capped to this width")
+        show_anomaly = st.toggle("Anomalies", help="Difference from each station's daily normal")
+        fill_gaps = st.toggle("Fill gaps", help="Missing days filled by interpolation, neighbour stations or normals")
+    
+    max_points = charts.points_for_viewport(chart_width)
+    
+    variable = value_col = variables[selected_var]
+    value_label = selected_var
+    if fill_gaps:
+        df = df.assign(**gapfill.filler.filled(df, {variable: variable}))
+        value_col = f'{variable}_filled'
+        sources = pd.Series(df[f'{variable}_source']).value_counts(normalize=True)
+        st.caption("Days by source: " + ", ".join(f"{FILL_SOURCE_LABELS[code]} {share:.1%}"
+                                                  for code, share in sources.sort_index().items()))
+    
+    zoomed_df = charts.clip_to_window(df, 'date', zoom_window)
+    # Moving averages use the values themselves; the anomaly column exists only in zoomed_df
+    ma_col = value_col
+    
+    if show_anomaly:
+        # Normals come from the full dataset, not just the filtered rows
+        anomalies = climatology.normals.anomalies(zoomed_df, {value_col: variable})
+        zoomed_df = zoomed_df.assign(**anomalies)
+        value_col, value_label = f'{value_col}_anomaly', f"{selected_var} anomaly"
+        st.caption(f"Anomalies against {climatology.SMOOTHING_DAYS}-day smoothed day-of-year normals for each station")
+    
     if df['location_full'].nunique() > 1:
-        daily_data = df.groupby(['date', 'location_full'])[variables[selected_var]].mean().reset_index()
+        daily_data = zoomed_df.groupby(['date', 'location_full'])[value_col].mean().reset_index()
+        daily_data = charts.downsample_series(daily_data, 'date', value_col,
+                                              max_points, group='location_full')
         
-        fig_ts = px.line(daily_data, x='date', y=variables[selected_var],
+        fig_ts = px.line(daily_data, x='date', y=value_col,
                         color='location_full',
-                        title=f"Daily Chart: {selected_var}",
-                        labels={'date': 'Date', variables[selected_var]: selected_var},
-                        color_discrete_map=location_colors)
+                        title=f"Daily Chart: {value_label}",
+                        labels={'date': 'Date', value_col: value_label},
+                        color_discrete_map=location_colors,
+                        render_mode=charts.render_mode_for(len(daily_data)))
         fig_ts.update_layout(height=500)
+        if show_anomaly:
+            fig_ts.add_hline(y=0, line_dash='dot', line_color='gray')
         st.plotly_chart(fig_ts, use_container_width=True)
     else:
-        daily_data = df.groupby('date')[variables[selected_var]].mean().reset_index()
+        daily_data = zoomed_df.groupby('date')[value_col].mean().reset_index()
+        daily_data = charts.downsample_series(daily_data, 'date', value_col, max_points)
         
-        fig_ts = px.line(daily_data, x='date', y=variables[selected_var],
-                        title=f"Daily Chart: {selected_var}",
-                        labels={'date': 'Date', variables[selected_var]: selected_var})
+        fig_ts = px.line(daily_data, x='date', y=value_col,
+                        title=f"Daily Chart: {value_label}",
+                        labels={'date': 'Date', value_col: value_label},
+                        render_mode=charts.render_mode_for(len(daily_data)))
         fig_ts.update_layout(height=500)
+        if show_anomaly:
+            fig_ts.add_hline(y=0, line_dash='dot', line_color='gray')
         st.plotly_chart(fig_ts, use_container_width=True)
     
     st.subheader("📊 Moving Averages")
     
-    col1, col2 = st.columns([1, 3])
+    col1, col2 = st.columns([3, 1])
     
     with col1:
-        window_size = st.slider("Average period (days):", 
-                               min_value=3, max_value=30, value=7)
+        windows = st.multiselect("Average periods (days):", [3, 7, 14, 30, 90, 365],
+                                 default=[7, 30, 90])
     
-    ma_data = []
-    for location in df['location_full'].unique():
-        location_data = df[df['location_full'] == location].copy()
-        location_data = location_data.sort_values('date')
-        location_data[f'MA_{window_size}'] = location_data[variables[selected_var]].rolling(
-            window=window_size, center=True).mean()
-        ma_data.append(location_data)
+    with col2:
+        ewm_span = 0
+        if st.checkbox("Exponential smoothing"):
+            ewm_span = st.slider("Smoothing span (days):", min_value=3, max_value=90, value=14)
+    
+    if not windows and not ewm_span:
+        st.info("Select at least one average period")
+        return
     
-    ma_df = pd.concat(ma_data)
+    ma_df = cached_moving_averages(df, filter_key, ma_col, tuple(sorted(windows)), ewm_span)
+    ma_df = charts.clip_to_window(ma_df, 'date', zoom_window)
+    ma_df = charts.downsample_series(ma_df, 'date', 'value', max_points,
+                                     group=['location_full', 'average'], method='lttb')
     
-    fig_ma = px.line(ma_df, x='date', y=f'MA_{window_size}',
+    fig_ma = px.line(ma_df, x='date', y='value',
                     color='location_full',
-                    title=f"{selected_var} Trends ({window_size}-Day Average)",
-                    labels={'date': 'Date', f'MA_{window_size}': f'{selected_var} (Average)'},
-                    color_discrete_map=location_colors)
+                    line_dash='average',
+                    title=f"{selected_var} Trends (Moving Averages)",
+                    labels={'date': 'Date', 'value': f'{selected_var} (Average)', 'average': 'Average'},
+                    color_discrete_map=location_colors,
+                    render_mode=charts.render_mode_for(len(ma_df)))
     fig_ma.update_layout(height=500)
     st.plotly_chart(fig_ma, use_container_width=True)
 
-def pivot_table_tab(df):
+@perf.monitor.cached('moving_averages', st.cache_data(ttl=600, max_entries=64))
+def cached_moving_averages(_df, filter_key, variable, windows, ewm_span):
+    """Grouped moving averages in long form, cached per (variable, windows, filter)"""
+    def compute():
+        wide = aggregations.grouped_moving_averages(_df, 'date', 'location_full', variable, windows, ewm_span)
+        labels = {f'MA_{window}': f'{window}-day' for window in windows}
+        if ewm_span:
+            labels[f'EWM_{ewm_span}'] = f'EWM {ewm_span}-day'
+        long_df = wide.melt(id_vars=['location_full', 'date'], value_vars=list(labels),
+                            var_name='average', value_name='value')
+        long_df['average'] = long_df['average'].map(labels)
+        return long_df
+
+    # Also kept on disk so other replicas with the same filters reuse it
+    return store.frames.get_or_create('moving_averages_en', (filter_key, variable, windows, ewm_span), compute)
+
+def map_tab(df, filter_key):
+    """Interpolated map analysis tab"""
+    st.subheader("🗺️ Interpolated Weather Map")
+    
+    stations = data.load_stations()
+    stations = stations[stations['location_full'].isin(df['location_full'].unique())].dropna(subset=['lat', 'lon'])
+    if len(stations) < 2:
+        st.info("The map needs at least two selected stations with coordinates in DimLokasi.")
+        return
+    
+    variables = {
+        'Rainfall (mm)': ('rainfall_clean', 'sum', 'Blues'),
+        'Average Temperature (°C)': ('suhu_rata', 'mean', 'RdYlBu_r'),
+        'Average Humidity (%)': ('kelembaban_rata', 'mean', 'Teal')
+    }
+    periods = {'Daily': 'D', 'Weekly': 'W', 'Monthly': 'M'}
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        selected_var = st.selectbox("Map variable:", list(variables))
+    with col2:
+        years = sorted(df['year'].unique(), reverse=True)
+        selected_year = st.selectbox("Year:", years)
+    with col3:
+        selected_period = st.radio("Frame per:", list(periods), index=1, horizontal=True)
+    
+    value_col, how, color_scale = variables[selected_var]
+    station_key = tuple(zip(stations['lat'], stations['lon'], stations['elevation']))
+    interpolator = spatial.interpolator(station_key)
+    adjust_elevation = False
+    if value_col == 'suhu_rata':
+        adjust_elevation = st.toggle("Elevation adjustment", disabled=not interpolator.can_adjust_elevation,
+                                     help="Lapse-rate correction to the terrain in WEATHER_GRID_ELEVATION")
+    
+    labels, frames = cached_map_frames(df, filter_key, tuple(stations['location_full']), station_key,
+                                       value_col, how, selected_year, periods[selected_period], adjust_elevation)
+    if not len(frames):
+        st.info("No data for the selected year.")
+        return
+    if np.isnan(frames).all():
+        st.info("No station has values for this variable in the selected year.")
+        return
+    
+    animated = len(frames) > 1
+    fig_map = px.imshow(frames if animated else frames[0], animation_frame=0 if animated else None,
+                        x=interpolator.lons, y=interpolator.lats, origin='lower',
+                        zmin=np.nanmin(frames), zmax=np.nanmax(frames), color_continuous_scale=color_scale,
+                        labels={'x': 'Longitude', 'y': 'Latitude', 'color': selected_var, 'animation_frame': 'Period'},
+                        title=f"{selected_var}, {selected_period.lower()} ({selected_year})")
+    if animated:
+        for step, label in zip(fig_map.layout.sliders[0].steps, labels):
+            step.label = label
+    fig_map.add_scatter(x=stations['lon'], y=stations['lat'], mode='markers+text', text=stations['location_full'],
+                        textposition='top center', marker=dict(color='black', size=8), showlegend=False)
+    fig_map.update_layout(height=600)
+    st.plotly_chart(fig_map, use_container_width=True)
+    st.caption(f"Inverse distance weighting (power {spatial.IDW_POWER}) from the nearest {spatial.NEIGHBOURS} "
+               f"stations on a {spatial.GRID_STEP}° grid")
+
+@perf.monitor.cached('map_frames', st.cache_data(ttl=600, max_entries=32))
+def cached_map_frames(_df, filter_key, station_names, station_key, variable, how, year, freq, adjust_elevation):
+    """Interpolated grid per period of one year, cached per (variable, year, period, filter)"""
+    period_starts, values = spatial.station_matrix(_df[_df['year'] == year], station_names, variable,
+                                                   freq=freq, how=how)
+    frames = spatial.interpolator(station_key).frames(values, adjust_elevation).astype('float32')
+    return [start.strftime('%d %b') for start in period_starts], frames
+
+@perf.monitor.cached('pivot_cube', st.cache_data(ttl=600, max_entries=32))
+def cached_pivot_cube(_df, filter_key):
+    """Aggregate cube of the filtered rows, which every pivot table reduces"""
+    return cube.aggregates.select(_df)
+
+def download_buttons(frame, file_stem, index=True):
+    """CSV, gzip CSV and Parquet downloads that are only generated when clicked"""
+    formats = {'csv': "💾 Download CSV", 'csv.gz': "🗜️ CSV (gzip)", 'parquet': "📦 Parquet"}
+    for column, (fmt, label) in zip(st.columns(len(formats)), formats.items()):
+        with column:
+            st.download_button(
+                label=label,
+                data=exports.exporter(frame, fmt, index=index),
+                file_name=f"{file_stem}.{fmt}",
+                mime=exports.MIME_TYPES[fmt],
+                key=f"download_{file_stem}_{fmt}"
+            )
+
+def pivot_table_tab(df, filter_key):
     """Interactive pivot table analysis tab"""
     st.subheader("📋 Pivot Table Analysis")
     
-    month_order = [
-        'January', 'February', 'March', 'April', 'May', 'June',
-        'July', 'August', 'September', 'October', 'November', 'December'
-    ]
+    with st.expander("📦 Export filtered daily data"):
+        st.write(f"{len(df):,} rows for the current location and date filters.")
+        download_buttons(df.drop(columns=['rainfall_level']), "daily_weather_data", index=False)
+    
+    # Pivots are reduced from count, sum, sum of squares, min and max per
+    # (location, year, month, rainfall category) instead of the daily rows
+    pivot_cube = cached_pivot_cube(df, filter_key)
     
     pivot_type = st.selectbox(
         "Select pivot table analysis type:",
@@ -625,27 +960,13 @@ def pivot_table_tab(df):
             "Minimum": "min"
         }
         
-        pivot_rainfall = df.pivot_table(
-            values='rainfall_clean',
-            index='location_full',
-            columns='month_name',
-            aggfunc=agg_func_map[agg_option],
-            fill_value=0
-        ).round(2)
-        
-        available_months = [month for month in month_order if month in pivot_rainfall.columns]
-        pivot_rainfall = pivot_rainfall.reindex(columns=available_months)
+        pivot_rainfall = pivot_cube.pivot('rainfall_clean', 'location', 'month', agg_func_map[agg_option],
+                                          labels=PIVOT_LABELS).round(2)
         
         st.write(f"**{agg_option} Rainfall (mm) by Month and Location:**")
         st.dataframe(pivot_rainfall, use_container_width=True)
         
-        csv = pivot_rainfall.to_csv()
-        st.download_button(
-            label="💾 Download CSV",
-            data=csv,
-            file_name=f"pivot_rainfall_{agg_option.lower()}.csv",
-            mime="text/csv"
-        )
+        download_buttons(pivot_rainfall, f"pivot_rainfall_{agg_option.lower()}")
         
         fig_heatmap = px.imshow(
             pivot_rainfall,
@@ -658,12 +979,7 @@ def pivot_table_tab(df):
     elif pivot_type == "Weather Statistics by Region":
         st.subheader("🌤️ Pivot Table: Comprehensive Weather Statistics")
         
-        weather_stats = df.groupby('location_full').agg({
-            'rainfall_clean': ['count', 'mean', 'max'],
-            'suhu_rata': ['mean', 'min', 'max'],
-            'kelembaban_rata': ['mean', 'min', 'max'],
-            'kecepatan_angin_rata': ['mean', 'max']
-        }).round(2)
+        weather_stats = pivot_cube.table('location', aggregations.REGIONAL_STATISTICS).round(2)
         
         weather_stats.columns = [
             'Days with Data', 'Average Rainfall', 'Max Rainfall',
@@ -675,13 +991,7 @@ def pivot_table_tab(df):
         st.write("**Comprehensive Weather Statistics by Region:**")
         st.dataframe(weather_stats, use_container_width=True)
         
-        csv = weather_stats.to_csv()
-        st.download_button(
-            label="💾 Download CSV",
-            data=csv,
-            file_name="pivot_weather_statistics.csv",
-            mime="text/csv"
-        )
+        download_buttons(weather_stats, "pivot_weather_statistics")
         
         metric_to_plot = st.selectbox(
             "Select metric for visualization:",
@@ -700,19 +1010,6 @@ def pivot_table_tab(df):
     elif pivot_type == "Seasonal Analysis":
         st.subheader("🍂 Pivot Table: Seasonal Analysis")
         
-        def get_season(month):
-            if month in ['December', 'January', 'February']:
-                return 'Rainy Season'
-            elif month in ['March', 'April', 'May']:
-                return 'Transition to Dry'
-            elif month in ['June', 'July', 'August']:
-                return 'Dry Season'
-            else:
-                return 'Transition to Rainy'
-        
-        df_season = df.copy()
-        df_season['musim'] = df_season['month_name'].apply(get_season)
-        
         variable_options = {
             "Rainfall": "rainfall_clean",
             "Average Temperature": "suhu_rata",
@@ -722,28 +1019,13 @@ def pivot_table_tab(df):
         
         selected_var = st.selectbox("Select variable for seasonal analysis:", list(variable_options.keys()))
         
-        seasonal_pivot = df_season.pivot_table(
-            values=variable_options[selected_var],
-            index='location_full',
-            columns='musim',
-            aggfunc='mean',
-            fill_value=0
-        ).round(2)
-        
-        season_order = ['Dry Season', 'Transition to Rainy', 'Rainy Season', 'Transition to Dry']
-        available_seasons = [season for season in season_order if season in seasonal_pivot.columns]
-        seasonal_pivot = seasonal_pivot.reindex(columns=available_seasons)
+        seasonal_pivot = pivot_cube.pivot(variable_options[selected_var], 'location', 'season',
+                                          labels=PIVOT_LABELS).round(2)
         
         st.write(f"**Average {selected_var} per Season:**")
         st.dataframe(seasonal_pivot, use_container_width=True)
         
-        csv = seasonal_pivot.to_csv()
-        st.download_button(
-            label="💾 Download CSV",
-            data=csv,
-            file_name=f"pivot_seasonal_{selected_var.lower().replace(' ', '_')}.csv",
-            mime="text/csv"
-        )
+        download_buttons(seasonal_pivot, f"pivot_seasonal_{selected_var.lower().replace(' ', '_')}")
         
         fig_radar = go.Figure()
         
@@ -773,12 +1055,20 @@ def pivot_table_tab(df):
         
         col1, col2, col3 = st.columns(3)
         
+        pivot_dimensions = {
+            'location_full': 'location',
+            'month_name': 'month',
+            'season': 'season',
+            'year': 'year',
+            'rainfall_category': 'level'
+        }
+        
         with col1:
-            index_options = ['location_full', 'month_name', 'year', 'rainfall_category']
+            index_options = ['location_full', 'month_name', 'season', 'year', 'rainfall_category']
             selected_index = st.selectbox("Select Index (Rows):", index_options)
         
         with col2:
-            column_options = ['month_name', 'year', 'location_full', 'rainfall_category']
+            column_options = ['month_name', 'season', 'year', 'location_full', 'rainfall_category']
             column_options = [col for col in column_options if col != selected_index]
             selected_columns = st.selectbox("Select Columns:", column_options)
         
@@ -806,28 +1096,19 @@ def pivot_table_tab(df):
         )
         
         try:
-            custom_pivot = df.pivot_table(
-                values=value_options[selected_value],
-                index=selected_index,
-                columns=selected_columns,
-                aggfunc=agg_function,
-                fill_value=0
-            ).round(2)
-            
-            if selected_columns == 'month_name':
-                available_months = [month for month in month_order if month in custom_pivot.columns]
-                custom_pivot = custom_pivot.reindex(columns=available_months)
+            # Months, seasons and categories come out of the cube in calendar and code order
+            custom_pivot = pivot_cube.pivot(
+                value_options[selected_value],
+                pivot_dimensions[selected_index],
+                pivot_dimensions[selected_columns],
+                agg_function,
+                labels=PIVOT_LABELS
+            ).round(2).rename_axis(index=selected_index, columns=selected_columns)
             
             st.write(f"**Pivot Table: {selected_value} by {selected_index} and {selected_columns}**")
             st.dataframe(custom_pivot, use_container_width=True)
             
-            csv = custom_pivot.to_csv()
-            st.download_button(
-                label="💾 Download CSV",
-                data=csv,
-                file_name=f"pivot_custom_{selected_value.lower().replace(' ', '_')}.csv",
-                mime="text/csv"
-            )
+            download_buttons(custom_pivot, f"pivot_custom_{selected_value.lower().replace(' ', '_')}")
             
             if custom_pivot.shape[0] <= 10 and custom_pivot.shape[1] <= 12:
                 viz_type = st.radio("Select visualization:", ["Heatmap", "Bar Chart", "Line Chart"], horizontal=True)
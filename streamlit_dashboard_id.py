@@ -1,14 +1,14 @@
 import streamlit as st
 import pandas as pd
-from sqlalchemy import create_engine, text
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import numpy as np
 from datetime import datetime, timedelta
-import os
 from dotenv import load_dotenv
 
+from weather import aggregations, charts, climatology, completeness, cube, data, distributions, exports, extremes, gapfill, perf, sketches, spatial, store, wind
+
 load_dotenv()
 
 # Page configuration
@@ -32,114 +32,60 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Database connection with SQLAlchemy
-@st.cache_resource
+RAINFALL_CATEGORIES = ('Tidak Ada Data', 'Tidak Hujan', 'Hujan Ringan', 'Hujan Sedang', 'Hujan Lebat', 'Hujan Sangat Lebat')
+
+SEASON_NAMES = {
+    'dry': 'Musim Kemarau',
+    'transition_to_rainy': 'Peralihan ke Hujan',
+    'rainy': 'Musim Hujan',
+    'transition_to_dry': 'Peralihan ke Kemarau'
+}
+
+# Label dimensi berkode pivot cube.AggregateCube; label bulan ditambahkan di tab pivot
+PIVOT_LABELS = {
+    'season': tuple(SEASON_NAMES[season] for season in aggregations.SEASONS),
+    'level': RAINFALL_CATEGORIES
+}
+
+# Label untuk gapfill.FILL_SOURCES, dengan urutan yang sama
+FILL_SOURCE_LABELS = ('Observasi', 'Linear', 'Stasiun tetangga', 'Klimatologi', 'Kosong')
+
+# Kolom data bersama -> nama kolom dashboard ini
+COLUMN_NAMES = {
+    'rainfall_clean': 'curah_hujan_clean',
+    'location_full': 'lokasi_lengkap',
+    'date': 'tanggal'
+}
+
+# Engine database dipakai bersama oleh semua dashboard dalam satu proses
 def get_engine():
-    """Membuat engine SQLAlchemy dengan connection pooling"""
+    """Engine SQLAlchemy bersama, atau None setelah menampilkan error"""
     try:
-        host = os.getenv('MYSQL_HOST')
-        user = os.getenv('MYSQL_USER')
-        password = os.getenv('MYSQL_PASSWORD')
-        database = os.getenv('MYSQL_DATABASE')
-        port = os.getenv('MYSQL_PORT', '3306')
-        
-        if not all([host, user, password, database]):
-            st.error("❌ Environment variables tidak lengkap!")
-            st.write(f"Host: {host}, User: {user}, Database: {database}, Port: {port}")
-            return None
-        
-        connection_url = f"mysql+mysqlconnector://{user}:{password}@{host}:{port}/{database}"
-        
-        engine = create_engine(
-            connection_url,
-            pool_recycle=3600,      # Reconnect setiap 1 jam
-            pool_pre_ping=True,     # Test koneksi sebelum digunakan
-            pool_size=5,            # Jumlah koneksi dalam pool
-            max_overflow=10,        # Maksimal koneksi tambahan
-            connect_args={
-                'connect_timeout': 10,
-                'autocommit': True
-            }
-        )
-        
-        # Test koneksi
-        with engine.connect() as conn:
-            result = conn.execute(text("SELECT 1"))
-            # Pastikan query berhasil
-            result.fetchone()
-        
-        return engine
-        
+        return data.get_engine()
+    except data.SettingsError as e:
+        st.error("❌ Environment variables tidak lengkap!")
+        st.write(str(e))
     except Exception as e:
         st.error(f"❌ Gagal membuat engine database: {e}")
-        return None
+    return None
 
 # Data loading functions
-@st.cache_data(ttl=600)
 def load_weather_data():
-    engine = get_engine()
-    if engine is None:
+    """Tampilan berbahasa Indonesia dari data cuaca bersama"""
+    if data.needs_database() and get_engine() is None:
         return None
-    
-    query = """
-    SELECT 
-        f.*,
-        w.tanggal,
-        w.bulan,
-        w.tahun,
-        w.nama_bulan,
-        l.nama_lokasi,
-        l.jenis_lokasi,
-        l.nama_stasiun
-    FROM FactDataIklim f
-    JOIN DimWaktu w ON f.waktu_id = w.waktu_id
-    JOIN DimLokasi l ON f.lokasi_id = l.lokasi_id
-    ORDER BY w.tanggal, l.nama_lokasi
-    """
-    
-    try:
-        df = pd.read_sql(query, engine)
-        
-        if df.empty:
-            return None
-            
-        # Pembersihan data
-        df = clean_weather_data(df)
-        
-        return df
-        
-    except Exception as e:
-        # Return None dengan error info dalam tuple
+    df = data.load_weather_data()
+    if df is None:
         return None
-
-def clean_weather_data(df):
-    df['curah_hujan_clean'] = df['curah_hujan'].apply(lambda x: 
-        None if x in [8888, 9999] or pd.isna(x) else x)
-    
-    df['curah_hujan_kategori'] = df['curah_hujan_clean'].apply(categorize_rainfall)
-    
-    # Membuat nama lokasi lengkap
-    df['lokasi_lengkap'] = df['nama_lokasi'] + ' (' + df['jenis_lokasi'] + ')'
-    
-    # Konversi kolom tanggal
-    df['tanggal'] = pd.to_datetime(df['tanggal'])
-    
-    return df
-
-def categorize_rainfall(value):
-    """Mengkategorikan intensitas curah hujan"""
-    if pd.isna(value) or value is None:
-        return 'Tidak Ada Data'
-    elif value == 0:
-        return 'Tidak Hujan'
-    elif value <= 5:
-        return 'Hujan Ringan'
-    elif value <= 20:
-        return 'Hujan Sedang'
-    elif value <= 50:
-        return 'Hujan Lebat'
-    else:
-        return 'Hujan Sangat Lebat'
+    # Salinan dangkal: kolom dipakai bersama dengan data cache, hanya diberi nama dan label Indonesia
+    return data.label_view(
+        df,
+        rename=COLUMN_NAMES,
+        labels={
+            'curah_hujan_kategori': ('rainfall_level', RAINFALL_CATEGORIES),
+            'nama_musim': ('musim', PIVOT_LABELS['season'])
+        }
+    )
 
 def get_consistent_colors():
     """Mengembalikan mapping warna konsisten untuk kategori dan lokasi"""
@@ -232,12 +178,27 @@ def main():
             (filtered_df['tanggal'] <= pd.to_datetime(date_range[1]))
         ]
     
+    # Kunci data dan filter aktif untuk cache agregasi
+    filter_key = (data.get_data_version(df), tuple(selected_locations), tuple(str(d) for d in date_range))
+    
     # Tampilkan informasi filter yang aktif
     st.sidebar.markdown("---")
     st.sidebar.markdown("**📊 Filter Aktif:**")
     st.sidebar.write(f"• Lokasi: {len(selected_locations)} wilayah")
     st.sidebar.write(f"• Data: {len(filtered_df):,} hari")
     
+    # Informasi waktu dan ukuran pengambilan data
+    fetch_stats = df.attrs.get('fetch_stats')
+    if fetch_stats:
+        st.sidebar.caption(f"⏱️ Diambil dalam {fetch_stats['seconds']:.2f} detik, "
+                           f"{fetch_stats['bytes'] / 1e6:.1f} MB ({fetch_stats['backend']})")
+    
+    # Panel performa (aktif dengan DASHBOARD_PERF=1)
+    if perf.monitor.enabled:
+        perf.monitor.gauge('df bytes', perf.frame_memory(df))
+        perf.monitor.gauge('filtered_df bytes', perf.frame_memory(filtered_df))
+        render_perf_panel()
+    
     # Credit di sidebar
     st.sidebar.markdown("---")
     st.sidebar.markdown("**👨‍💻 Dibuat oleh:**")
@@ -249,31 +210,68 @@ def main():
     st.sidebar.markdown("- Alfi Syahrian")
     st.sidebar.markdown("[📁 GitHub Repository](https://github.com/ElySimp/Curah-Hujan-Datasets)")
     st.sidebar.markdown("---")
-    
+
+    # Mode render: hanya tab aktif yang dihitung
+    lazy_tabs = st.sidebar.toggle(
+        "⚡ Render tab aktif saja",
+        value=True,
+        help="Hanya bagian yang dipilih yang dihitung setiap rerun"
+    )
+
     # Tab utama dengan nama yang lebih sederhana
-    tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs([
-        "📊 Ringkasan", "🌧️ Analisis Hujan", "🌡️ Suhu", "💨 Angin & Kelembaban", "📈 Grafik Waktu", "📋 Pivot Table"
-    ])
-    
-    with tab1:
-        overview_tab(filtered_df)
-    
-    with tab2:
-        rainfall_tab(filtered_df)
-    
-    with tab3:
-        temperature_tab(filtered_df)
-    
-    with tab4:
-        wind_humidity_tab(filtered_df)
-    
-    with tab5:
-        timeseries_tab(filtered_df)
-    
-    with tab6:
-        pivot_table_tab(filtered_df)
+    sections = {
+        "📊 Ringkasan": overview_tab,
+        "🌧️ Analisis Hujan": rainfall_tab,
+        "🌡️ Suhu": temperature_tab,
+        "💨 Angin & Kelembaban": wind_humidity_tab,
+        "📈 Grafik Waktu": timeseries_tab,
+        "🗺️ Peta": map_tab,
+        "📋 Pivot Table": pivot_table_tab
+    }
+
+    if lazy_tabs:
+        active_section = st.radio(
+            "Bagian:",
+            list(sections.keys()),
+            horizontal=True,
+            key="active_section",
+            label_visibility="collapsed"
+        )
+        render_section(sections[active_section], filtered_df, filter_key)
+    else:
+        tabs = st.tabs(list(sections.keys()))
+        for tab, tab_function in zip(tabs, sections.values()):
+            with tab:
+                render_section(tab_function, filtered_df, filter_key)
+
+def render_perf_panel():
+    """Panel sidebar berisi waktu eksekusi, hit rate cache dan memori"""
+    with st.sidebar.expander("⏱️ Performa", expanded=False):
+        gauges = dict(perf.monitor.gauges)
+        for name in ('df bytes', 'filtered_df bytes'):
+            if name in gauges:
+                st.write(f"• {name}: {gauges[name] / 1e6:.1f} MB")
+        if data.needs_database() and get_engine() is not None:
+            st.caption(get_engine().pool.status())
+        for name, value in perf.monitor.counter_summary().items():
+            st.write(f"• {name}: {value:,}")
+        
+        st.markdown("**Cache**")
+        st.dataframe(perf.monitor.cache_summary(), hide_index=True, use_container_width=True)
+        
+        st.markdown("**Waktu (ms)**")
+        st.dataframe(perf.monitor.timing_summary(), hide_index=True, use_container_width=True)
+        
+        if st.button("Reset pengukuran"):
+            perf.monitor.reset()
 
-def overview_tab(df):
+@st.fragment
+def render_section(tab_function, df, filter_key):
+    """Render satu bagian dashboard; perubahan widget di dalamnya hanya me-rerun bagian ini"""
+    with perf.monitor.timed('tab', tab_function.__name__):
+        tab_function(df, filter_key)
+
+def overview_tab(df, filter_key):
     """Tab ringkasan data"""
     st.subheader("📊 Ringkasan Data Cuaca")
     
@@ -301,23 +299,29 @@ def overview_tab(df):
     
     col1, col2 = st.columns(2)
     
+    # Kelengkapan dari penghitung per (stasiun, bulan, variabel), tanpa memindai df
+    data_types = {
+        'curah_hujan': 'Curah Hujan',
+        'suhu_min': 'Suhu Minimum',
+        'suhu_max': 'Suhu Maksimum',
+        'kelembaban_rata': 'Kelembaban',
+        'kecepatan_angin_rata': 'Kecepatan Angin'
+    }
+    status_labels = {'jumlah_8888': '8888 (tidak terukur)', 'jumlah_9999': '9999 (tidak ada data)', 'jumlah_kosong': 'Kosong'}
+    counts = completeness.select(data.load_completeness(), df['lokasi_lengkap'].unique(),
+                                 df['tanggal'].min(), df['tanggal'].max())
+    
     with col1:
-        # Ringkasan data yang hilang
-        missing_data = pd.DataFrame({
-            'Jenis Data': ['Curah Hujan', 'Suhu Minimum', 'Suhu Maksimum', 'Kelembaban', 'Kecepatan Angin'],
-            'Data Hilang (%)': [
-                (df['curah_hujan_clean'].isna().sum() / len(df)) * 100,
-                (df['suhu_min'].isna().sum() / len(df)) * 100,
-                (df['suhu_max'].isna().sum() / len(df)) * 100,
-                (df['kelembaban_rata'].isna().sum() / len(df)) * 100,
-                (df['kecepatan_angin_rata'].isna().sum() / len(df)) * 100
-            ]
-        })
-        
-        fig_missing = px.bar(missing_data, x='Jenis Data', y='Data Hilang (%)', 
+        # Ringkasan data yang hilang per penyebab
+        status_share = completeness.shares(counts[counts['variabel'].isin(list(data_types))], 'variabel')
+        missing_data = (status_share.reindex(list(data_types))[list(status_labels)]
+                        .rename(index=data_types, columns=status_labels)
+                        .rename_axis('Jenis Data').reset_index()
+                        .melt(id_vars='Jenis Data', var_name='Penyebab', value_name='Data Hilang (%)'))
+        
+        fig_missing = px.bar(missing_data, x='Jenis Data', y='Data Hilang (%)', color='Penyebab',
                            title="Persentase Data yang Hilang",
-                           color='Data Hilang (%)',
-                           color_continuous_scale='Reds')
+                           color_discrete_sequence=px.colors.sequential.Reds[3::2])
         fig_missing.update_layout(height=400)
         st.plotly_chart(fig_missing, use_container_width=True)
     
@@ -328,8 +332,24 @@ def overview_tab(df):
                             title="Distribusi Data per Wilayah")
         fig_location.update_layout(height=400)
         st.plotly_chart(fig_location, use_container_width=True)
+    
+    # Heatmap kelengkapan per wilayah dan bulan
+    st.subheader("🗓️ Kelengkapan per Wilayah dan Bulan")
+    
+    heatmap_type = st.selectbox("Jenis data:", list(data_types), format_func=data_types.get)
+    monthly = counts[counts['variabel'] == heatmap_type].assign(
+        periode=lambda frame: frame['tahun'].astype(str) + '-' + frame['bulan'].astype(str).str.zfill(2))
+    if not monthly.empty:
+        observed = completeness.shares(monthly, ['location_full', 'periode'])['jumlah_terukur'].unstack('periode')
+        fig_completeness = px.imshow(observed.sort_index(axis=1),
+                                     title=f"Nilai {data_types[heatmap_type]} Terukur (%)",
+                                     color_continuous_scale='RdYlGn', zmin=0, zmax=100,
+                                     labels={'x': 'Bulan', 'y': 'Wilayah', 'color': 'Terukur (%)'})
+        fig_completeness.update_layout(height=max(300, 40 * len(observed) + 150))
+        st.plotly_chart(fig_completeness, use_container_width=True)
+        st.caption("Dihitung per bulan penuh, sehingga bulan yang terpotong filter tanggal ikut dihitung utuh")
 
-def rainfall_tab(df):
+def rainfall_tab(df, filter_key):
     """Tab analisis curah hujan"""
     st.subheader("🌧️ Analisis Curah Hujan")
     
@@ -410,6 +430,59 @@ def rainfall_tab(df):
     
     st.dataframe(location_rainfall, use_container_width=True)
     
+    # Indeks ekstrem ETCCDI per lokasi dan tahun
+    st.subheader("⛈️ Indeks Hujan Ekstrem")
+    
+    index_labels = {
+        'CDD': 'Hari kering berturut-turut (< 1 mm)',
+        'CWD': 'Hari basah berturut-turut (≥ 1 mm)',
+        'Rx1day': 'Hujan maksimum 1 hari (mm)',
+        'Rx5day': 'Hujan maksimum 5 hari (mm)',
+        'R10mm': 'Hari dengan ≥ 10 mm',
+        'R20mm': 'Hari dengan ≥ 20 mm',
+        'R50mm': 'Hari dengan ≥ 50 mm',
+        'PRCPTOT': 'Total pada hari basah (mm)'
+    }
+    yearly_indices = cached_extreme_indices(df, filter_key)
+    selected_index = st.selectbox("Indeks:", list(index_labels), format_func=index_labels.get)
+    
+    fig_index = px.line(yearly_indices, x='tahun', y=selected_index, color='lokasi_lengkap', markers=True,
+                        title=f"{index_labels[selected_index]} per Tahun",
+                        labels={'tahun': 'Tahun', selected_index: index_labels[selected_index], 'lokasi_lengkap': 'Wilayah'})
+    st.plotly_chart(fig_index, use_container_width=True)
+    st.dataframe(yearly_indices.set_index(['lokasi_lengkap', 'tahun']).round(1), use_container_width=True)
+    
+    # Persentil dan periode ulang dari sketch yang dibangun saat data dimuat
+    st.subheader("📈 Persentil & Periode Ulang Hujan")
+    
+    month_order = ['January', 'February', 'March', 'April', 'May', 'June',
+                   'July', 'August', 'September', 'October', 'November', 'December']
+    stations, counts = sketches.rainfall.combine(df, 'lokasi_lengkap', 'tanggal', 'curah_hujan_clean')
+    wet_percentiles = sketches.quantiles(counts, (0.95, 0.99), minimum=extremes.WET_DAY_MM)
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        percentile = st.radio("Persentil hari hujan:", ['P95', 'P99'], horizontal=True)
+        percentile_table = pd.DataFrame(wet_percentiles[:, :, ['P95', 'P99'].index(percentile)],
+                                        index=stations, columns=month_order)
+        fig_percentile = px.imshow(percentile_table,
+                                   title=f"{percentile} Curah Hujan Harian pada Hari Hujan (mm)",
+                                   color_continuous_scale="Blues",
+                                   labels={'x': 'Bulan', 'y': 'Wilayah', 'color': 'Hujan (mm)'})
+        st.plotly_chart(fig_percentile, use_container_width=True)
+    
+    with col2:
+        level_rows = {station: sketches.return_levels(counts[row].sum(axis=0))
+                      for row, station in enumerate(stations)}
+        if len(stations) > 1:
+            level_rows['Semua wilayah terpilih'] = sketches.return_levels(counts.sum(axis=(0, 1)))
+        return_table = pd.DataFrame(level_rows, index=[f'{period} tahun (mm)' for period in sketches.RETURN_PERIODS]).T
+        st.markdown("**Periode ulang hujan harian**")
+        st.dataframe(return_table.round(1), use_container_width=True)
+        st.caption(f"Dari sketch hujan yang dapat digabung (±{sketches.RELATIVE_ACCURACY:.0%}); "
+                   "periode yang lebih panjang dari data terpilih dikosongkan")
+    
     # Heatmap jika ada multiple lokasi
     if df['lokasi_lengkap'].nunique() > 1:
         st.subheader("🗓️ Pola Hujan Bulanan per Wilayah")
@@ -437,7 +510,7 @@ def rainfall_tab(df):
                               labels={'x': 'Bulan', 'y': 'Wilayah', 'color': 'Hujan (mm)'})
         st.plotly_chart(fig_heatmap, use_container_width=True)
 
-def temperature_tab(df):
+def temperature_tab(df, filter_key):
     """Tab analisis suhu"""
     st.subheader("🌡️ Analisis Suhu")
     
@@ -478,22 +551,16 @@ def temperature_tab(df):
         st.plotly_chart(fig_temp, use_container_width=True)
     
     with col2:
-        # Distribusi suhu
-        temp_melted = pd.melt(df[['lokasi_lengkap', 'suhu_min', 'suhu_max', 'suhu_rata']], 
-                            id_vars=['lokasi_lengkap'],
-                            var_name='jenis_suhu', value_name='suhu')
-        
-        # Ganti nama kolom untuk lebih mudah dipahami
-        temp_melted['jenis_suhu'] = temp_melted['jenis_suhu'].map({
-            'suhu_min': 'Minimum',
-            'suhu_max': 'Maksimum', 
-            'suhu_rata': 'Rata-rata'
-        })
+        # Distribusi suhu dari ringkasan KDE dan kuartil (tanpa melt data mentah)
+        temp_types = {'suhu_min': 'Minimum', 'suhu_max': 'Maksimum', 'suhu_rata': 'Rata-rata'}
+        summaries = cached_column_summaries(df, filter_key, tuple(temp_types))
         
-        fig_violin = px.violin(temp_melted, x='jenis_suhu', y='suhu',
-                             title="Distribusi Suhu",
-                             box=True,
-                             labels={'suhu': 'Suhu (°C)', 'jenis_suhu': 'Jenis Suhu'})
+        fig_violin = build_violin_figure(summaries, temp_types)
+        fig_violin.update_layout(
+            title="Distribusi Suhu",
+            xaxis_title="Jenis Suhu",
+            yaxis_title="Suhu (°C)"
+        )
         st.plotly_chart(fig_violin, use_container_width=True)
     
     # Tren suhu bulanan
@@ -523,25 +590,35 @@ def temperature_tab(df):
     fig_monthly_temp.update_layout(xaxis_tickangle=-45)
     st.plotly_chart(fig_monthly_temp, use_container_width=True)
 
-def wind_humidity_tab(df):
+def wind_humidity_tab(df, filter_key):
     """Tab analisis angin dan kelembaban"""
     st.subheader("💨 Analisis Angin & Kelembaban")
     
     col1, col2 = st.columns(2)
     
     with col1:
-        # Distribusi kelembaban
-        fig_humidity = px.box(df, x='lokasi_lengkap', y='kelembaban_rata',
-                            title="Tingkat Kelembaban per Wilayah",
-                            labels={'kelembaban_rata': 'Kelembaban (%)', 'lokasi_lengkap': 'Wilayah'})
+        # Distribusi kelembaban dari kuartil per wilayah
+        humidity_boxes = cached_group_summaries(df, filter_key, 'kelembaban_rata')
+        
+        fig_humidity = build_box_figure(humidity_boxes)
+        fig_humidity.update_layout(
+            title="Tingkat Kelembaban per Wilayah",
+            xaxis_title="Wilayah",
+            yaxis_title="Kelembaban (%)"
+        )
         fig_humidity.update_xaxes(tickangle=45)
         st.plotly_chart(fig_humidity, use_container_width=True)
     
     with col2:
-        # Distribusi kecepatan angin
-        fig_wind = px.histogram(df, x='kecepatan_angin_rata', nbins=30,
-                              title="Distribusi Kecepatan Angin",
-                              labels={'kecepatan_angin_rata': 'Kecepatan Angin (m/s)', 'count': 'Jumlah Hari'})
+        # Distribusi kecepatan angin dari bin histogram
+        wind_hist = cached_histogram(df, filter_key, 'kecepatan_angin_rata', 30)
+        
+        fig_wind = build_histogram_figure(wind_hist)
+        fig_wind.update_layout(
+            title="Distribusi Kecepatan Angin",
+            xaxis_title="Kecepatan Angin (m/s)",
+            yaxis_title="Jumlah Hari"
+        )
         st.plotly_chart(fig_wind, use_container_width=True)
     
     # Perbandingan antar wilayah
@@ -560,6 +637,25 @@ def wind_humidity_tab(df):
     
     st.dataframe(wind_humidity_stats, use_container_width=True)
     
+    # Wind rose dari histogram arah x kecepatan yang disimpan per (stasiun, bulan)
+    st.subheader("🧭 Wind Rose")
+    
+    rose_kinds = {'Angin maksimum (FF_X / DDD_X)': wind.max_wind, 'Angin terbanyak (FF_AVG / DDD_CAR)': wind.prevailing_wind}
+    rose_kind = st.radio("Data angin:", list(rose_kinds), horizontal=True)
+    _, rose_counts = rose_kinds[rose_kind].combine(df, 'lokasi_lengkap', 'tanggal')
+    rose, calm_percent = wind.rose_table(rose_counts)
+    
+    if rose.empty:
+        st.info("Tidak ada data arah angin untuk filter yang dipilih")
+    else:
+        fig_rose = px.bar_polar(rose, r='percent', theta='direction', color='speed',
+                                category_orders={'direction': list(wind.SECTORS), 'speed': list(wind.SPEED_LABELS)},
+                                color_discrete_sequence=px.colors.sequential.Blues[2:],
+                                title=f"Wind Rose: {rose_kind} (tenang {calm_percent:.1f}% hari)",
+                                labels={'percent': 'Hari (%)', 'direction': 'Arah', 'speed': 'Kecepatan (m/s)'})
+        fig_rose.update_layout(height=500)
+        st.plotly_chart(fig_rose, use_container_width=True)
+    
     # Hubungan kelembaban dan suhu
     if len(df) > 0:
         st.subheader("🌡️ Hubungan Kelembaban dan Suhu")
@@ -567,15 +663,120 @@ def wind_humidity_tab(df):
         # Gunakan warna konsisten
         _, location_colors = get_consistent_colors()
         
-        fig_scatter = px.scatter(df, x='suhu_rata', y='kelembaban_rata', 
-                               color='lokasi_lengkap',
-                               title="Hubungan antara Suhu dan Kelembaban",
-                               labels={'suhu_rata': 'Suhu Rata-rata (°C)', 
-                                      'kelembaban_rata': 'Kelembaban (%)'},
-                               color_discrete_map=location_colors)
+        n_points = int(df[['suhu_rata', 'kelembaban_rata']].notna().all(axis=1).sum())
+        
+        # Data besar: tampilkan kepadatan (heatmap) dengan kontur per lokasi
+        if n_points > charts.SCATTER_POINT_LIMIT:
+            grid = cached_density_grid(df, filter_key, 'suhu_rata', 'kelembaban_rata')
+            
+            fig_scatter = go.Figure(go.Heatmap(
+                x=grid['x'], y=grid['y'], z=np.where(grid['total'] > 0, grid['total'], np.nan),
+                colorscale='Greys', colorbar=dict(title='Hari'), name='Semua wilayah'
+            ))
+            for i, (location, counts) in enumerate(grid['groups'].items()):
+                color = location_colors.get(location, px.colors.qualitative.Set2[i % len(px.colors.qualitative.Set2)])
+                fig_scatter.add_trace(go.Contour(
+                    x=grid['x'], y=grid['y'], z=counts,
+                    contours_coloring='lines', line=dict(color=color, width=2),
+                    ncontours=5, showscale=False, showlegend=True, name=location
+                ))
+            fig_scatter.update_layout(
+                title=f"Hubungan antara Suhu dan Kelembaban (kepadatan {n_points:,} hari)",
+                xaxis_title='Suhu Rata-rata (°C)',
+                yaxis_title='Kelembaban (%)'
+            )
+        else:
+            fig_scatter = px.scatter(df, x='suhu_rata', y='kelembaban_rata', 
+                                   color='lokasi_lengkap',
+                                   title="Hubungan antara Suhu dan Kelembaban",
+                                   labels={'suhu_rata': 'Suhu Rata-rata (°C)', 
+                                          'kelembaban_rata': 'Kelembaban (%)'},
+                                   color_discrete_map=location_colors,
+                                   render_mode=charts.render_mode_for(n_points))
         st.plotly_chart(fig_scatter, use_container_width=True)
 
-def timeseries_tab(df):
+@perf.monitor.cached('extreme_indices', st.cache_data(ttl=600, max_entries=32))
+def cached_extreme_indices(_df, filter_key):
+    """Indeks hujan ETCCDI per (lokasi, tahun), di-cache per filter"""
+    yearly = extremes.indices.compute(_df, 'lokasi_lengkap', 'tanggal', 'curah_hujan_clean')
+    return yearly.rename_axis(['lokasi_lengkap', 'tahun']).reset_index()
+
+@perf.monitor.cached('density_grid', st.cache_data(ttl=600, max_entries=32))
+def cached_density_grid(_df, filter_key, x, y):
+    """Histogram 2D x terhadap y per lokasi, di-cache per filter"""
+    return charts.density_grid(_df, x, y, group='lokasi_lengkap')
+
+@perf.monitor.cached('column_summaries', st.cache_data(ttl=600, max_entries=32))
+def cached_column_summaries(_df, filter_key, columns):
+    """Ringkasan statistik dan KDE per kolom, di-cache per filter"""
+    return distributions.summarize_columns(_df, list(columns))
+
+@perf.monitor.cached('group_summaries', st.cache_data(ttl=600, max_entries=32))
+def cached_group_summaries(_df, filter_key, variable):
+    """Statistik box per lokasi, di-cache per (variabel, filter)"""
+    return distributions.summarize_groups(_df, variable, 'lokasi_lengkap')
+
+@perf.monitor.cached('histogram', st.cache_data(ttl=600, max_entries=32))
+def cached_histogram(_df, filter_key, variable, bins):
+    """Bin histogram satu variabel, di-cache per filter"""
+    return distributions.histogram_summary(_df[variable].to_numpy(), bins)
+
+def build_violin_figure(summaries, labels):
+    """Menggambar violin dari kurva KDE dan statistik box yang sudah dihitung"""
+    fig = go.Figure()
+    colors = px.colors.qualitative.Plotly
+    for i, (column, label) in enumerate(labels.items()):
+        summary = summaries[column]
+        if summary['kde'] is None:
+            continue
+        grid, density = summary['kde']
+        half_width = 0.4 * density / density.max()
+        fig.add_trace(go.Scatter(
+            x=np.concatenate([i - half_width, (i + half_width)[::-1]]),
+            y=np.concatenate([grid, grid[::-1]]),
+            fill='toself', mode='lines', line=dict(color=colors[i % len(colors)], width=1),
+            name=label, hoverinfo='name'
+        ))
+        box = summary['box']
+        fig.add_trace(go.Box(
+            x=[i], q1=[box['q1']], median=[box['median']], q3=[box['q3']],
+            lowerfence=[box['lowerfence']], upperfence=[box['upperfence']], mean=[box['mean']],
+            width=0.08, fillcolor='white', line=dict(color='black', width=1),
+            name=label, showlegend=False
+        ))
+    fig.update_xaxes(tickvals=list(range(len(labels))), ticktext=list(labels.values()))
+    return fig
+
+def build_box_figure(boxes):
+    """Menggambar box plot dari kuartil dan fence yang sudah dihitung"""
+    names = [name for name, box in boxes.items() if box is not None]
+    stats = [boxes[name] for name in names]
+    return go.Figure(go.Box(
+        x=names,
+        q1=[box['q1'] for box in stats],
+        median=[box['median'] for box in stats],
+        q3=[box['q3'] for box in stats],
+        lowerfence=[box['lowerfence'] for box in stats],
+        upperfence=[box['upperfence'] for box in stats],
+        mean=[box['mean'] for box in stats],
+        showlegend=False
+    ))
+
+def build_histogram_figure(histogram):
+    """Menggambar histogram dari jumlah per bin yang sudah dihitung"""
+    fig = go.Figure()
+    if histogram is not None:
+        edges = histogram['edges']
+        fig.add_trace(go.Bar(
+            x=(edges[:-1] + edges[1:]) / 2,
+            y=histogram['counts'],
+            width=np.diff(edges),
+            marker_line_width=0
+        ))
+    fig.update_layout(bargap=0)
+    return fig
+
+def timeseries_tab(df, filter_key):
     """Tab analisis grafik waktu"""
     st.subheader("📈 Analisis Grafik Sepanjang Waktu")
     
@@ -592,64 +793,238 @@ def timeseries_tab(df):
     # Gunakan warna konsisten
     _, location_colors = get_consistent_colors()
     
+    # Jendela zoom dan resolusi grafik untuk downsampling
+    col1, col2 = st.columns([3, 1])
+    
+    with col1:
+        min_date = df['tanggal'].min().date()
+        max_date = df['tanggal'].max().date()
+        zoom_window = None
+        if min_date < max_date:
+            zoom_window = st.slider("Jendela zoom:", min_value=min_date, max_value=max_date,
+                                    value=(min_date, max_date), format="YYYY-MM-DD")
+    
+    with col2:
+        chart_width = st.select_slider("Resolusi grafik (px):", options=[800, 1200, 1600, 2400],
+                                       value=charts.DEFAULT_VIEWPORT_PX,
+                                       help="Jumlah titik per garis dibatasi sesuai lebar ini")
+        show_anomaly = st.toggle("Anomali", help="Selisih dari normal harian setiap stasiun")
+        fill_gaps = st.toggle("Isi data kosong", help="Hari kosong diisi dengan interpolasi, stasiun tetangga atau normal")
+    
+    max_points = charts.points_for_viewport(chart_width)
+    
+    value_col, value_label = variables[selected_var], selected_var
+    shared_col = {'curah_hujan_clean': 'rainfall_clean'}.get(value_col, value_col)
+    
+    # Nilai terisi dari engine gap-filling bersama, dengan sumber per hari
+    if fill_gaps:
+        df = df.assign(**gapfill.filler.filled(df, {value_col: shared_col},
+                                               station_col='lokasi_lengkap', date_col='tanggal'))
+        sources = pd.Series(df[f'{value_col}_source']).value_counts(normalize=True)
+        st.caption("Hari per sumber: " + ", ".join(f"{FILL_SOURCE_LABELS[code]} {share:.1%}"
+                                                   for code, share in sources.sort_index().items()))
+        value_col = f'{value_col}_filled'
+    
+    zoomed_df = charts.clip_to_window(df, 'tanggal', zoom_window)
+    # Rata-rata bergerak memakai nilai aslinya; kolom anomali hanya ada di zoomed_df
+    ma_col = value_col
+    
+    # Anomali terhadap normal harian (dihitung dari seluruh data, bukan hanya data terfilter)
+    if show_anomaly:
+        anomalies = climatology.normals.anomalies(zoomed_df, {value_col: shared_col},
+                                                  station_col='lokasi_lengkap', date_col='tanggal')
+        zoomed_df = zoomed_df.assign(**anomalies)
+        value_col, value_label = f'{value_col}_anomaly', f"Anomali {selected_var}"
+        st.caption(f"Anomali terhadap normal harian per stasiun, dihaluskan {climatology.SMOOTHING_DAYS} hari")
+    
     # Grafik time series
     if df['lokasi_lengkap'].nunique() > 1:
-        daily_data = df.groupby(['tanggal', 'lokasi_lengkap'])[variables[selected_var]].mean().reset_index()
+        daily_data = zoomed_df.groupby(['tanggal', 'lokasi_lengkap'])[value_col].mean().reset_index()
+        daily_data = charts.downsample_series(daily_data, 'tanggal', value_col,
+                                              max_points, group='lokasi_lengkap')
         
-        fig_ts = px.line(daily_data, x='tanggal', y=variables[selected_var],
+        fig_ts = px.line(daily_data, x='tanggal', y=value_col,
                         color='lokasi_lengkap',
-                        title=f"Grafik Harian: {selected_var}",
-                        labels={'tanggal': 'Tanggal', variables[selected_var]: selected_var},
-                        color_discrete_map=location_colors)
+                        title=f"Grafik Harian: {value_label}",
+                        labels={'tanggal': 'Tanggal', value_col: value_label},
+                        color_discrete_map=location_colors,
+                        render_mode=charts.render_mode_for(len(daily_data)))
         fig_ts.update_layout(height=500)
+        if show_anomaly:
+            fig_ts.add_hline(y=0, line_dash='dot', line_color='gray')
         st.plotly_chart(fig_ts, use_container_width=True)
     else:
-        daily_data = df.groupby('tanggal')[variables[selected_var]].mean().reset_index()
+        daily_data = zoomed_df.groupby('tanggal')[value_col].mean().reset_index()
+        daily_data = charts.downsample_series(daily_data, 'tanggal', value_col, max_points)
         
-        fig_ts = px.line(daily_data, x='tanggal', y=variables[selected_var],
-                        title=f"Grafik Harian: {selected_var}",
-                        labels={'tanggal': 'Tanggal', variables[selected_var]: selected_var})
+        fig_ts = px.line(daily_data, x='tanggal', y=value_col,
+                        title=f"Grafik Harian: {value_label}",
+                        labels={'tanggal': 'Tanggal', value_col: value_label},
+                        render_mode=charts.render_mode_for(len(daily_data)))
         fig_ts.update_layout(height=500)
+        if show_anomaly:
+            fig_ts.add_hline(y=0, line_dash='dot', line_color='gray')
         st.plotly_chart(fig_ts, use_container_width=True)
     
     # Moving averages
     st.subheader("📊 Rata-rata Bergerak")
     
-    col1, col2 = st.columns([1, 3])
+    col1, col2 = st.columns([3, 1])
     
     with col1:
-        window_size = st.slider("Periode rata-rata (hari):", 
-                               min_value=3, max_value=30, value=7)
+        windows = st.multiselect("Periode rata-rata (hari):", [3, 7, 14, 30, 90, 365],
+                                 default=[7, 30, 90])
     
-    # Hitung moving averages untuk setiap lokasi
-    ma_data = []
-    for location in df['lokasi_lengkap'].unique():
-        location_data = df[df['lokasi_lengkap'] == location].copy()
-        location_data = location_data.sort_values('tanggal')
-        location_data[f'MA_{window_size}'] = location_data[variables[selected_var]].rolling(
-            window=window_size, center=True).mean()
-        ma_data.append(location_data)
+    with col2:
+        ewm_span = 0
+        if st.checkbox("Pemulusan eksponensial"):
+            ewm_span = st.slider("Rentang pemulusan (hari):", min_value=3, max_value=90, value=14)
+    
+    if not windows and not ewm_span:
+        st.info("Pilih minimal satu periode rata-rata")
+        return
     
-    ma_df = pd.concat(ma_data)
+    # Hitung moving averages untuk semua lokasi sekaligus (di-cache per filter)
+    ma_df = cached_moving_averages(df, filter_key, ma_col, tuple(sorted(windows)), ewm_span)
+    ma_df = charts.clip_to_window(ma_df, 'tanggal', zoom_window)
+    ma_df = charts.downsample_series(ma_df, 'tanggal', 'nilai', max_points,
+                                     group=['lokasi_lengkap', 'rata_rata'], method='lttb')
     
-    fig_ma = px.line(ma_df, x='tanggal', y=f'MA_{window_size}',
+    fig_ma = px.line(ma_df, x='tanggal', y='nilai',
                     color='lokasi_lengkap',
-                    title=f"Tren {selected_var} (Rata-rata {window_size} Hari)",
-                    labels={'tanggal': 'Tanggal', f'MA_{window_size}': f'{selected_var} (Rata-rata)'},
-                    color_discrete_map=location_colors)
+                    line_dash='rata_rata',
+                    title=f"Tren {selected_var} (Rata-rata Bergerak)",
+                    labels={'tanggal': 'Tanggal', 'nilai': f'{selected_var} (Rata-rata)', 'rata_rata': 'Rata-rata'},
+                    color_discrete_map=location_colors,
+                    render_mode=charts.render_mode_for(len(ma_df)))
     fig_ma.update_layout(height=500)
     st.plotly_chart(fig_ma, use_container_width=True)
 
-def pivot_table_tab(df):
+@perf.monitor.cached('moving_averages', st.cache_data(ttl=600, max_entries=64))
+def cached_moving_averages(_df, filter_key, variable, windows, ewm_span):
+    """Moving averages per lokasi dalam format panjang, di-cache per (variabel, periode, filter)"""
+    def compute():
+        wide = aggregations.grouped_moving_averages(_df, 'tanggal', 'lokasi_lengkap', variable, windows, ewm_span)
+        labels = {f'MA_{window}': f'{window} hari' for window in windows}
+        if ewm_span:
+            labels[f'EWM_{ewm_span}'] = f'EWM {ewm_span} hari'
+        long_df = wide.melt(id_vars=['lokasi_lengkap', 'tanggal'], value_vars=list(labels),
+                            var_name='rata_rata', value_name='nilai')
+        long_df['rata_rata'] = long_df['rata_rata'].map(labels)
+        return long_df
+
+    # Juga disimpan di disk agar replika lain dengan filter yang sama memakainya
+    return store.frames.get_or_create('moving_averages_id', (filter_key, variable, windows, ewm_span), compute)
+
+def map_tab(df, filter_key):
+    """Tab peta hasil interpolasi"""
+    st.subheader("🗺️ Peta Cuaca Hasil Interpolasi")
+    
+    # Koordinat stasiun dari DimLokasi, hanya untuk lokasi yang dipilih
+    stations = data.load_stations()
+    stations = stations[stations['location_full'].isin(df['lokasi_lengkap'].unique())].dropna(subset=['lat', 'lon'])
+    if len(stations) < 2:
+        st.info("Peta membutuhkan minimal dua stasiun terpilih dengan koordinat di DimLokasi.")
+        return
+    
+    variables = {
+        'Curah Hujan (mm)': ('curah_hujan_clean', 'sum', 'Blues'),
+        'Suhu Rata-rata (°C)': ('suhu_rata', 'mean', 'RdYlBu_r'),
+        'Kelembaban Rata-rata (%)': ('kelembaban_rata', 'mean', 'Teal')
+    }
+    periods = {'Harian': 'D', 'Mingguan': 'W', 'Bulanan': 'M'}
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        selected_var = st.selectbox("Variabel peta:", list(variables))
+    with col2:
+        years = sorted(df['tahun'].unique(), reverse=True)
+        selected_year = st.selectbox("Tahun:", years)
+    with col3:
+        selected_period = st.radio("Frame per:", list(periods), index=1, horizontal=True)
+    
+    value_col, how, color_scale = variables[selected_var]
+    station_key = tuple(zip(stations['lat'], stations['lon'], stations['elevation']))
+    interpolator = spatial.interpolator(station_key)
+    adjust_elevation = False
+    if value_col == 'suhu_rata':
+        adjust_elevation = st.toggle("Koreksi elevasi", disabled=not interpolator.can_adjust_elevation,
+                                     help="Koreksi lapse rate ke medan pada WEATHER_GRID_ELEVATION")
+    
+    labels, frames = cached_map_frames(df, filter_key, tuple(stations['location_full']), station_key,
+                                       value_col, how, selected_year, periods[selected_period], adjust_elevation)
+    if not len(frames):
+        st.info("Tidak ada data untuk tahun yang dipilih.")
+        return
+    if np.isnan(frames).all():
+        st.info("Tidak ada stasiun dengan nilai variabel ini pada tahun yang dipilih.")
+        return
+    
+    animated = len(frames) > 1
+    fig_map = px.imshow(frames if animated else frames[0], animation_frame=0 if animated else None,
+                        x=interpolator.lons, y=interpolator.lats, origin='lower',
+                        zmin=np.nanmin(frames), zmax=np.nanmax(frames), color_continuous_scale=color_scale,
+                        labels={'x': 'Bujur', 'y': 'Lintang', 'color': selected_var, 'animation_frame': 'Periode'},
+                        title=f"{selected_var}, {selected_period.lower()} ({selected_year})")
+    # Label slider memakai tanggal awal tiap periode
+    if animated:
+        for step, label in zip(fig_map.layout.sliders[0].steps, labels):
+            step.label = label
+    fig_map.add_scatter(x=stations['lon'], y=stations['lat'], mode='markers+text', text=stations['location_full'],
+                        textposition='top center', marker=dict(color='black', size=8), showlegend=False)
+    fig_map.update_layout(height=600)
+    st.plotly_chart(fig_map, use_container_width=True)
+    st.caption(f"Inverse distance weighting (pangkat {spatial.IDW_POWER}) dari {spatial.NEIGHBOURS} stasiun "
+               f"terdekat pada grid {spatial.GRID_STEP}°")
+
+@perf.monitor.cached('map_frames', st.cache_data(ttl=600, max_entries=32))
+def cached_map_frames(_df, filter_key, station_names, station_key, variable, how, year, freq, adjust_elevation):
+    """Grid interpolasi per periode dalam satu tahun, di-cache per (variabel, tahun, periode, filter)"""
+    period_starts, values = spatial.station_matrix(_df[_df['tahun'] == year], station_names, variable,
+                                                   'lokasi_lengkap', 'tanggal', freq, how)
+    frames = spatial.interpolator(station_key).frames(values, adjust_elevation).astype('float32')
+    return [start.strftime('%d %b') for start in period_starts], frames
+
+@perf.monitor.cached('pivot_cube', st.cache_data(ttl=600, max_entries=32))
+def cached_pivot_cube(_df, filter_key):
+    """Cube agregat dari baris terfilter, yang direduksi oleh setiap pivot table"""
+    return cube.aggregates.select(_df, 'lokasi_lengkap', COLUMN_NAMES)
+
+def download_buttons(frame, file_stem, index=True):
+    """Download CSV, CSV gzip dan Parquet yang baru dibuat saat tombol diklik"""
+    formats = {'csv': "💾 Download CSV", 'csv.gz': "🗜️ CSV (gzip)", 'parquet': "📦 Parquet"}
+    for column, (fmt, label) in zip(st.columns(len(formats)), formats.items()):
+        with column:
+            st.download_button(
+                label=label,
+                data=exports.exporter(frame, fmt, index=index),
+                file_name=f"{file_stem}.{fmt}",
+                mime=exports.MIME_TYPES[fmt],
+                key=f"download_{file_stem}_{fmt}"
+            )
+
+def pivot_table_tab(df, filter_key):
     """Tab untuk analisis pivot table interaktif"""
     st.subheader("📋 Analisis Pivot Table")
     
+    # Export data harian sesuai filter, dibuat per chunk saat diklik
+    with st.expander("📦 Export data harian terfilter"):
+        st.write(f"{len(df):,} baris untuk filter lokasi dan tanggal saat ini.")
+        download_buttons(df.drop(columns=['rainfall_level']), "data_cuaca_harian", index=False)
+    
     # Definisi urutan bulan yang benar (dalam bahasa Inggris sesuai database)
     month_order = [
         'January', 'February', 'March', 'April', 'May', 'June',
         'July', 'August', 'September', 'October', 'November', 'December'
     ]
     
+    # Pivot direduksi dari count, sum, sum of squares, min dan max per
+    # (lokasi, tahun, bulan, kategori hujan), bukan dari baris harian
+    pivot_cube = cached_pivot_cube(df, filter_key)
+    pivot_labels = {**PIVOT_LABELS, 'month': ('',) + tuple(month_order)}
+    # Nama variabel di cube untuk kolom yang diganti namanya di dashboard ini
+    cube_variables = {name: column for column, name in COLUMN_NAMES.items()}
+    
     # Pilihan jenis pivot table
     pivot_type = st.selectbox(
         "Pilih jenis analisis pivot table:",
@@ -677,30 +1052,15 @@ def pivot_table_tab(df):
             "Minimum": "min"
         }
         
-        # Buat pivot table
-        pivot_rainfall = df.pivot_table(
-            values='curah_hujan_clean',
-            index='lokasi_lengkap',
-            columns='nama_bulan',
-            aggfunc=agg_func_map[agg_option],
-            fill_value=0
-        ).round(2)
-        
-        # Urutkan kolom berdasarkan urutan bulan yang benar
-        available_months = [month for month in month_order if month in pivot_rainfall.columns]
-        pivot_rainfall = pivot_rainfall.reindex(columns=available_months)
+        # Pivot dari cube; kolom bulan 1-12 sudah berurutan dan diberi nama bulan
+        pivot_rainfall = pivot_cube.pivot('rainfall_clean', 'location', 'month', agg_func_map[agg_option],
+                                          labels=pivot_labels).round(2)
         
         st.write(f"**{agg_option} Curah Hujan (mm) per Bulan dan Lokasi:**")
         st.dataframe(pivot_rainfall, use_container_width=True)
         
-        # Download button
-        csv = pivot_rainfall.to_csv()
-        st.download_button(
-            label="💾 Download CSV",
-            data=csv,
-            file_name=f"pivot_curah_hujan_{agg_option.lower()}.csv",
-            mime="text/csv"
-        )
+        # Tombol download, file dibuat saat diklik
+        download_buttons(pivot_rainfall, f"pivot_curah_hujan_{agg_option.lower()}")
         
         # Visualisasi heatmap
         fig_heatmap = px.imshow(
@@ -714,13 +1074,8 @@ def pivot_table_tab(df):
     elif pivot_type == "Statistik Cuaca per Wilayah":
         st.subheader("🌤️ Pivot Table: Statistik Cuaca Komprehensif")
         
-        # Multi-index pivot dengan berbagai variabel cuaca
-        weather_stats = df.groupby('lokasi_lengkap').agg({
-            'curah_hujan_clean': ['count', 'mean', 'max'],
-            'suhu_rata': ['mean', 'min', 'max'],
-            'kelembaban_rata': ['mean', 'min', 'max'],
-            'kecepatan_angin_rata': ['mean', 'max']
-        }).round(2)
+        # Statistik berbagai variabel cuaca per wilayah
+        weather_stats = pivot_cube.table('location', aggregations.REGIONAL_STATISTICS).round(2)
         
         # Flatten column names
         weather_stats.columns = [
@@ -733,14 +1088,8 @@ def pivot_table_tab(df):
         st.write("**Statistik Cuaca Komprehensif per Wilayah:**")
         st.dataframe(weather_stats, use_container_width=True)
         
-        # Download button
-        csv = weather_stats.to_csv()
-        st.download_button(
-            label="💾 Download CSV",
-            data=csv,
-            file_name="pivot_statistik_cuaca.csv",
-            mime="text/csv"
-        )
+        # Tombol download, file dibuat saat diklik
+        download_buttons(weather_stats, "pivot_statistik_cuaca")
         
         # Bar chart untuk perbandingan
         metric_to_plot = st.selectbox(
@@ -760,20 +1109,6 @@ def pivot_table_tab(df):
     elif pivot_type == "Analisis Musiman":
         st.subheader("🍂 Pivot Table: Analisis Musiman")
         
-        # Definisi musim berdasarkan bulan (nama bulan dalam bahasa Inggris)
-        def get_season(month):
-            if month in ['December', 'January', 'February']:
-                return 'Musim Hujan'
-            elif month in ['March', 'April', 'May']:
-                return 'Peralihan ke Kemarau'
-            elif month in ['June', 'July', 'August']:
-                return 'Musim Kemarau'
-            else:
-                return 'Peralihan ke Hujan'
-        
-        df_season = df.copy()
-        df_season['musim'] = df_season['nama_bulan'].apply(get_season)
-        
         variable_options = {
             "Curah Hujan": "curah_hujan_clean",
             "Suhu Rata-rata": "suhu_rata",
@@ -783,30 +1118,16 @@ def pivot_table_tab(df):
         
         selected_var = st.selectbox("Pilih variabel untuk analisis musiman:", list(variable_options.keys()))
         
-        seasonal_pivot = df_season.pivot_table(
-            values=variable_options[selected_var],
-            index='lokasi_lengkap',
-            columns='musim',
-            aggfunc='mean',
-            fill_value=0
-        ).round(2)
-        
-        # Reorder columns untuk urutan musim yang logis
-        season_order = ['Musim Kemarau', 'Peralihan ke Hujan', 'Musim Hujan', 'Peralihan ke Kemarau']
-        available_seasons = [season for season in season_order if season in seasonal_pivot.columns]
-        seasonal_pivot = seasonal_pivot.reindex(columns=available_seasons)
+        # Musim dari kode musim di cube, kolom sudah dalam urutan musim yang logis
+        selected_column = variable_options[selected_var]
+        seasonal_pivot = pivot_cube.pivot(cube_variables.get(selected_column, selected_column), 'location', 'season',
+                                          labels=pivot_labels).round(2)
         
         st.write(f"**Rata-rata {selected_var} per Musim:**")
         st.dataframe(seasonal_pivot, use_container_width=True)
         
-        # Download button
-        csv = seasonal_pivot.to_csv()
-        st.download_button(
-            label="💾 Download CSV",
-            data=csv,
-            file_name=f"pivot_musiman_{selected_var.lower().replace(' ', '_')}.csv",
-            mime="text/csv"
-        )
+        # Tombol download, file dibuat saat diklik
+        download_buttons(seasonal_pivot, f"pivot_musiman_{selected_var.lower().replace(' ', '_')}")
         
         # Radar chart untuk analisis musiman
         fig_radar = go.Figure()
@@ -838,14 +1159,23 @@ def pivot_table_tab(df):
         
         col1, col2, col3 = st.columns(3)
         
+        # Kolom dashboard -> dimensi cube
+        pivot_dimensions = {
+            'lokasi_lengkap': 'location',
+            'nama_bulan': 'month',
+            'nama_musim': 'season',
+            'tahun': 'year',
+            'curah_hujan_kategori': 'level'
+        }
+        
         with col1:
             # Pilih index (baris)
-            index_options = ['lokasi_lengkap', 'nama_bulan', 'tahun', 'curah_hujan_kategori']
+            index_options = ['lokasi_lengkap', 'nama_bulan', 'nama_musim', 'tahun', 'curah_hujan_kategori']
             selected_index = st.selectbox("Pilih Index (Baris):", index_options)
         
         with col2:
             # Pilih columns
-            column_options = ['nama_bulan', 'tahun', 'lokasi_lengkap', 'curah_hujan_kategori']
+            column_options = ['nama_bulan', 'nama_musim', 'tahun', 'lokasi_lengkap', 'curah_hujan_kategori']
             column_options = [col for col in column_options if col != selected_index]
             selected_columns = st.selectbox("Pilih Columns (Kolom):", column_options)
         
@@ -876,30 +1206,21 @@ def pivot_table_tab(df):
         
         # Buat pivot table kustom
         try:
-            custom_pivot = df.pivot_table(
-                values=value_options[selected_value],
-                index=selected_index,
-                columns=selected_columns,
-                aggfunc=agg_function,
-                fill_value=0
-            ).round(2)
-            
-            # Jika columns adalah nama_bulan, urutkan sesuai kalender
-            if selected_columns == 'nama_bulan':
-                available_months = [month for month in month_order if month in custom_pivot.columns]
-                custom_pivot = custom_pivot.reindex(columns=available_months)
+            # Bulan, musim dan kategori keluar dari cube dalam urutan kalender dan kode
+            selected_column = value_options[selected_value]
+            custom_pivot = pivot_cube.pivot(
+                cube_variables.get(selected_column, selected_column),
+                pivot_dimensions[selected_index],
+                pivot_dimensions[selected_columns],
+                agg_function,
+                labels=pivot_labels
+            ).round(2).rename_axis(index=selected_index, columns=selected_columns)
             
             st.write(f"**Pivot Table: {selected_value} per {selected_index} dan {selected_columns}**")
             st.dataframe(custom_pivot, use_container_width=True)
             
-            # Download button
-            csv = custom_pivot.to_csv()
-            st.download_button(
-                label="💾 Download CSV",
-                data=csv,
-                file_name=f"pivot_kustom_{selected_value.lower().replace(' ', '_')}.csv",
-                mime="text/csv"
-            )
+            # Tombol download, file dibuat saat diklik
+            download_buttons(custom_pivot, f"pivot_kustom_{selected_value.lower().replace(' ', '_')}")
             
             # Visualisasi otomatis jika ukuran data memungkinkan
             if custom_pivot.shape[0] <= 10 and custom_pivot.shape[1] <= 12:
@@ -0,0 +1,39 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+pd = pytest.importorskip('pandas')
+pytest.importorskip('sqlalchemy')
+
+from weather import aggregations
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(12)
+    dates = pd.date_range('2021-01-01', '2021-12-31')
+    df = pd.DataFrame({
+        'location_full': np.repeat(['Bandung (Kota)', 'Bogor (Kabupaten)', 'Cirebon (Kabupaten)'], len(dates)),
+        'date': np.tile(dates, 3),
+        'suhu_rata': rng.normal(26, 2, 3 * len(dates)),
+    })
+    df.loc[rng.random(len(df)) < 0.05, 'suhu_rata'] = np.nan
+    # Shuffled, as the filtered frames are not ordered by station and date
+    return df.sample(frac=1, random_state=1).reset_index(drop=True)
+
+
+def test_grouped_moving_averages_match_a_rolling_mean_per_station(frame):
+    result = aggregations.grouped_moving_averages(frame, 'date', 'location_full', 'suhu_rata', (7, 30), ewm_span=14)
+    assert len(result) == len(frame)
+
+    for station, rows in result.groupby('location_full'):
+        expected = frame[frame['location_full'] == station].sort_values('date')['suhu_rata'].reset_index(drop=True)
+        rows = rows.reset_index(drop=True)
+        assert rows['date'].is_monotonic_increasing
+        for window in (7, 30):
+            np.testing.assert_allclose(rows[f'MA_{window}'], expected.rolling(window, center=True).mean())
+        np.testing.assert_allclose(rows['EWM_14'], expected.ewm(span=14, ignore_na=True).mean())
+
+
+def test_grouped_moving_averages_without_smoothing(frame):
+    result = aggregations.grouped_moving_averages(frame, 'date', 'location_full', 'suhu_rata', (7,))
+    assert list(result.columns) == ['location_full', 'date', 'suhu_rata', 'MA_7']
@@ -0,0 +1,56 @@
+import pytest
+
+pytest.importorskip('numpy')
+pd = pytest.importorskip('pandas')
+pytest.importorskip('pyarrow')
+pytest.importorskip('sqlalchemy')
+pytest.importorskip('streamlit')
+pytest.importorskip('plotly')
+
+from weather import bench
+
+BASELINE = {'seconds': 0.100, 'peak_mb': 50.0}
+
+
+def test_regressions_past_the_tolerances():
+    assert bench.regressions({'seconds': 0.120, 'peak_mb': 54.0}, BASELINE, 0.25, 0.10) == []
+    found = bench.regressions({'seconds': 0.130, 'peak_mb': 56.0}, BASELINE, 0.25, 0.10)
+    assert found == ['time 0.1000s -> 0.1300s', 'memory 50.0MB -> 56.0MB']
+
+
+def test_small_differences_are_noise():
+    # Double the time and memory, but below MIN_SECONDS and MIN_MEGABYTES
+    assert bench.regressions({'seconds': 0.004, 'peak_mb': 1.5}, {'seconds': 0.002, 'peak_mb': 0.75}) == []
+    assert bench.regressions({'seconds': 10.0, 'peak_mb': 1000.0}, None) == []
+
+
+def test_save_baseline_keeps_entries_that_were_not_run(tmp_path):
+    path = tmp_path / 'baseline.json'
+    bench.save_baseline({'a 5x1': BASELINE}, path)
+    bench.save_baseline({'b 5x1': {'seconds': 0.2, 'peak_mb': 1.0}}, path)
+    baseline = bench.load_baseline(path)
+    assert set(baseline['results']) == {'a 5x1', 'b 5x1'}
+    assert baseline['environment']['pandas'] == pd.__version__
+    assert bench.load_baseline(tmp_path / 'missing.json') == {}
+
+
+def test_parse_sizes():
+    assert bench.parse_sizes('5x1,100x10,') == [(5, 1), (100, 10)]
+
+
+def test_synthetic_frame_is_shaped_like_the_query():
+    raw = bench.synthetic_frame(3, 1)
+    assert len(raw) == 3 * 366
+    assert raw['fact_id'].is_unique
+    assert set(raw['curah_hujan'].dropna()) & {8888, 9999}
+
+
+@pytest.fixture(scope='module')
+def frames():
+    return bench.Frames(2, 1)
+
+
+@pytest.mark.parametrize('name', bench.BENCHMARKS)
+def test_every_benchmark_runs(frames, name):
+    seconds, peak_mb = bench.measure(bench.BENCHMARKS[name], frames, repeat=1)
+    assert seconds > 0 and peak_mb >= 0
@@ -0,0 +1,66 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+pd = pytest.importorskip('pandas')
+
+from weather import charts
+
+
+def test_lttb_keeps_the_ends_and_one_point_per_bucket():
+    rng = np.random.default_rng(1)
+    x = np.arange(10000)
+    y = rng.normal(size=len(x))
+    y[4321] = 50.0
+    keep = charts.lttb_indices(x, y, 200)
+    assert len(keep) == 200
+    assert keep[0] == 0 and keep[-1] == len(x) - 1
+    assert np.all(np.diff(keep) > 0)
+    # A lone spike is the largest triangle of its bucket
+    assert 4321 in keep
+
+
+def test_lttb_returns_everything_when_there_is_nothing_to_drop():
+    assert charts.lttb_indices(np.arange(5), np.arange(5), 10).tolist() == [0, 1, 2, 3, 4]
+
+
+@pytest.mark.parametrize('method', ['minmax', 'lttb'])
+def test_downsample_series_per_group(method):
+    rng = np.random.default_rng(2)
+    dates = pd.date_range('2000-01-01', periods=5000)
+    df = pd.DataFrame({
+        'date': np.tile(dates, 2),
+        'location_full': np.repeat(['A (Kota)', 'B (Kota)'], len(dates)),
+        'value': rng.normal(size=2 * len(dates)),
+    })
+    df.loc[df.sample(frac=0.05, random_state=0).index, 'value'] = np.nan
+
+    result = charts.downsample_series(df, 'date', 'value', 300, group='location_full', method=method)
+    for location, rows in result.groupby('location_full'):
+        assert len(rows) <= 300
+        assert rows['date'].is_monotonic_increasing
+        assert rows['value'].notna().all()
+    if method == 'minmax':
+        # Every series keeps its extremes
+        pd.testing.assert_frame_equal(result.groupby('location_full')['value'].agg(['min', 'max']),
+                                      df.groupby('location_full')['value'].agg(['min', 'max']))
+
+
+def test_density_grid_matches_histogram2d():
+    rng = np.random.default_rng(13)
+    df = pd.DataFrame({
+        'suhu_rata': rng.normal(26, 2, 5000),
+        'kelembaban_rata': rng.uniform(60, 95, 5000),
+        'location_full': rng.choice(['B (Kota)', 'A (Kabupaten)'], 5000),
+    })
+    df.loc[::50, 'suhu_rata'] = np.nan
+    grid = charts.density_grid(df, 'suhu_rata', 'kelembaban_rata', group='location_full', bins=20)
+
+    valid = df.dropna()
+    expected, x_edges, y_edges = np.histogram2d(valid['suhu_rata'], valid['kelembaban_rata'], bins=20)
+    np.testing.assert_array_equal(grid['total'], expected.T)
+    np.testing.assert_allclose(grid['x'], (x_edges[:-1] + x_edges[1:]) / 2)
+    assert list(grid['groups']) == ['A (Kabupaten)', 'B (Kota)']
+    np.testing.assert_array_equal(sum(grid['groups'].values()), grid['total'])
+    station = valid[valid['location_full'] == 'A (Kabupaten)']
+    by_station = np.histogram2d(station['suhu_rata'], station['kelembaban_rata'], bins=[x_edges, y_edges])[0]
+    np.testing.assert_array_equal(grid['groups']['A (Kabupaten)'], by_station.T)
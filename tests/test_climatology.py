@@ -0,0 +1,86 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+pd = pytest.importorskip('pandas')
+pytest.importorskip('sqlalchemy')
+
+from weather import climatology
+
+
+def _frame(rng, stations=('A (Kota)', 'B (Kabupaten)'), start='2016-01-01', end='2019-12-31'):
+    dates = pd.date_range(start, end)
+    df = pd.DataFrame({
+        'location_full': np.repeat(stations, len(dates)),
+        'date': np.tile(dates, len(stations)),
+    })
+    for variable in climatology.VARIABLES:
+        df[variable] = rng.normal(25, 3, len(df))
+    return df
+
+
+def _assert_same_normals(left, right):
+    for a, b in zip(left.normals(), right.normals()):
+        np.testing.assert_allclose(a, b, equal_nan=True)
+
+
+def test_day_of_year_keeps_1_march_fixed():
+    days = climatology.day_of_year(pd.to_datetime(['2019-02-28', '2019-03-01', '2020-02-29', '2020-12-31']))
+    assert isinstance(days, np.ndarray)
+    assert days.tolist() == [58, 60, 59, 365]
+
+
+def test_normals_are_the_smoothed_day_of_year_mean():
+    df = _frame(np.random.default_rng(1))
+    normals = climatology.Climatology(window=1, min_observations=1)
+    normals.update(df)
+    mean, std = normals.normals()
+    station = df[df['location_full'] == 'B (Kabupaten)']
+    on_day = station[climatology.day_of_year(station['date']) == 100]['suhu_rata']
+    row, column = normals.stations['B (Kabupaten)'], climatology.VARIABLES.index('suhu_rata')
+    np.testing.assert_allclose(mean[row, 100, column], on_day.mean())
+    np.testing.assert_allclose(std[row, 100, column], on_day.std(ddof=0))
+
+
+def test_update_only_adds_new_days():
+    df = _frame(np.random.default_rng(2))
+    incremental = climatology.Climatology()
+    incremental.update(df[df['date'] < '2018-05-17'], version=1)
+    incremental.update(df, version=2)
+    once = climatology.Climatology()
+    once.update(df)
+    _assert_same_normals(incremental, once)
+
+
+def test_changed_days_are_recounted_for_their_station_only():
+    df = _frame(np.random.default_rng(3))
+    normals = climatology.Climatology()
+    normals.update(df, version=1)
+    untouched = normals._sum[normals.stations['A (Kota)']].copy()
+
+    updated = df.copy()
+    updated.loc[(updated['location_full'] == 'B (Kabupaten)') & (updated['date'].dt.year == 2017), 'suhu_rata'] += 5
+    normals.update(updated, version=2)
+    fresh = climatology.Climatology()
+    fresh.update(updated)
+    _assert_same_normals(normals, fresh)
+    np.testing.assert_array_equal(normals._sum[normals.stations['A (Kota)']], untouched)
+
+
+def test_same_version_is_not_counted_again():
+    df = _frame(np.random.default_rng(4))
+    normals = climatology.Climatology()
+    normals.update(df, version=1)
+    before = normals.normals()
+    normals.update(df.assign(suhu_rata=df['suhu_rata'] + 10), version=1)
+    assert normals.normals() is before
+
+
+def test_anomalies_are_values_minus_normals():
+    df = _frame(np.random.default_rng(5))
+    normals = climatology.Climatology()
+    normals.update(df)
+    view = df.rename(columns={'suhu_rata': 'temperature'})
+    result = normals.anomalies(view.iloc[::97], {'temperature': 'suhu_rata'})
+    np.testing.assert_allclose(result['temperature_anomaly'],
+                               view['temperature'].iloc[::97] - result['temperature_normal'])
+    assert result['temperature_normal'].notna().all()
@@ -0,0 +1,115 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+pd = pytest.importorskip('pandas')
+pytest.importorskip('pyarrow')
+pytest.importorskip('sqlalchemy')
+
+from weather import aggregations, cube
+
+STATIONS = ('Bandung (Kota)', 'Bogor (Kabupaten)', 'Cirebon (Kabupaten)')
+
+
+@pytest.fixture(scope='module')
+def frame():
+    rng = np.random.default_rng(42)
+    dates = pd.date_range('2019-11-03', '2021-02-20')
+    df = pd.DataFrame({
+        'location_full': np.repeat(STATIONS, len(dates)),
+        'date': np.tile(dates, len(STATIONS)),
+    })
+    dates = pd.DatetimeIndex(df['date'])
+    df['tahun'] = dates.year
+    df['bulan'] = dates.month
+    df['urutan_bulan'] = (dates.year * 12 + dates.month - 1).astype(np.int32)
+    for variable in cube.VARIABLES:
+        values = rng.gamma(2.0, 5.0, len(df))
+        values[rng.random(len(df)) < 0.1] = np.nan
+        df[variable] = values
+    df['rainfall_level'] = rng.integers(0, cube.LEVELS, len(df)).astype(np.int8)
+    return df
+
+
+def _naive(df, variable, index, columns, aggfunc):
+    keys = {
+        'location': df['location_full'],
+        'year': df['tahun'],
+        'month': df['bulan'],
+        'season': pd.Series(aggregations.SEASON_CODES[df['bulan'] - 1], index=df.index),
+        'level': df['rainfall_level'].astype(int),
+    }
+    grouped = df[variable].groupby([keys[index].rename(index), keys[columns].rename(columns)]).agg(aggfunc)
+    table = grouped.unstack(columns)
+    return table.fillna(0) if aggfunc in ('count', 'sum') else table
+
+
+def _assert_pivot_equal(result, expected):
+    expected = expected.loc[:, expected.columns.isin(result.columns)]
+    np.testing.assert_allclose(result.loc[expected.index, expected.columns].to_numpy(), expected.to_numpy(),
+                               rtol=1e-9, atol=1e-9)
+
+
+@pytest.mark.parametrize('aggfunc', cube.AGGREGATES)
+@pytest.mark.parametrize('index, columns', [('location', 'month'), ('location', 'season'),
+                                            ('year', 'level'), ('month', 'location')])
+def test_pivot_matches_groupby(frame, aggfunc, index, columns):
+    full = cube.AggregateCube.from_frame(frame)
+    result = full.pivot('rainfall_clean', index, columns, aggfunc=aggfunc)
+    expected = _naive(frame, 'rainfall_clean', index, columns, aggfunc)
+    assert sorted(result.index) == sorted(expected.index)
+    _assert_pivot_equal(result, expected)
+
+
+def test_empty_cells_are_zero_only_for_count_and_sum(frame):
+    # Bogor has no rainfall in 2020, so its 2020 cell is empty
+    gap = frame.assign(rainfall_clean=frame['rainfall_clean'].mask(
+        (frame['location_full'] == STATIONS[1]) & (frame['tahun'] == 2020)))
+    full = cube.AggregateCube.from_frame(gap)
+    for aggfunc in cube.AGGREGATES:
+        cell = full.pivot('rainfall_clean', 'location', 'year', aggfunc=aggfunc).loc[STATIONS[1], 2020]
+        if aggfunc in ('count', 'sum'):
+            assert cell == 0
+        else:
+            assert np.isnan(cell)
+
+
+def test_pivot_without_columns_is_a_series(frame):
+    result = cube.AggregateCube.from_frame(frame).pivot('suhu_rata', 'location')
+    expected = frame.groupby('location_full')['suhu_rata'].mean()
+    assert isinstance(result, pd.Series)
+    np.testing.assert_allclose(result.loc[expected.index], expected)
+
+
+def test_select_matches_a_cube_of_the_filtered_rows(frame):
+    full = cube.AggregateCube.from_frame(frame)
+    # Cuts the first and last month and leaves one station out
+    filtered = frame[frame['date'].between('2020-01-17', '2020-11-09')
+                     & (frame['location_full'] != STATIONS[2])]
+    selected = full.select(filtered)
+    direct = cube.AggregateCube.from_frame(filtered)
+    for aggfunc in cube.AGGREGATES:
+        pd.testing.assert_frame_equal(selected.pivot('kelembaban_rata', 'location', 'month', aggfunc),
+                                      direct.pivot('kelembaban_rata', 'location', 'month', aggfunc))
+
+
+def test_select_of_stations_the_cube_has_not_seen(frame):
+    full = cube.AggregateCube.from_frame(frame[frame['location_full'] != STATIONS[0]])
+    selected = full.select(frame)
+    expected = frame.groupby('location_full')['suhu_max'].max()
+    np.testing.assert_allclose(selected.pivot('suhu_max', 'location', aggfunc='max').loc[expected.index], expected)
+
+
+def test_table_and_labels(frame):
+    labels = {'season': dict(enumerate(aggregations.SEASONS))}
+    table = cube.AggregateCube.from_frame(frame).table('season', {'rainfall_clean': ['count', 'mean']}, labels)
+    seasons = pd.Series(np.asarray(aggregations.SEASONS)[aggregations.SEASON_CODES[frame['bulan'] - 1]],
+                        index=frame.index, name='season')
+    expected = frame.groupby(seasons)['rainfall_clean'].agg(['count', 'mean'])
+    assert list(table.columns) == ['rainfall_clean_count', 'rainfall_clean_mean']
+    np.testing.assert_allclose(table.loc[expected.index].to_numpy(), expected.to_numpy())
+
+
+def test_empty_frame(frame):
+    empty = cube.AggregateCube.from_frame(frame.iloc[:0])
+    assert empty.count.size == 0
+    assert cube.AggregateCube.from_frame(frame).select(frame.iloc[:0]).count.size == 0
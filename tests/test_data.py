@@ -0,0 +1,90 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+pd = pytest.importorskip('pandas')
+pytest.importorskip('streamlit')
+pytest.importorskip('sqlalchemy')
+
+from weather import aggregations, data
+
+
+def _raw():
+    return pd.DataFrame({
+        'fact_id': [1, 2, 3, 4, 5, 6],
+        'curah_hujan': [0.0, 3.0, 8888.0, 15.0, 9999.0, 120.0],
+        'suhu_rata': [26.0, 27.0, np.nan, 25.5, 26.5, 24.0],
+        'nama_lokasi': ['Bogor', 'Bogor', 'Bandung', 'Bandung', 'Cirebon', 'Cirebon'],
+        'jenis_lokasi': ['Kota', 'Kota', 'Kota', 'Kota', 'Kabupaten', 'Kabupaten'],
+        'tanggal': pd.date_range('2024-02-27', periods=6),
+    })
+
+
+def test_cleaning_adds_the_shared_columns():
+    df = data.clean_weather_data(_raw())
+    np.testing.assert_array_equal(df['rainfall_clean'], [0.0, 3.0, np.nan, 15.0, np.nan, 120.0])
+    levels = [data.RAINFALL_LEVELS[code] for code in df['rainfall_level']]
+    assert levels == ['no_rain', 'light', 'no_data', 'moderate', 'no_data', 'very_heavy']
+    assert df['location_full'].tolist()[::2] == ['Bogor (Kota)', 'Bandung (Kota)', 'Cirebon (Kabupaten)']
+    assert df['date'].dtype.kind == 'M' and 'tanggal' not in df
+
+
+def test_rainfall_level_boundaries():
+    values = np.array([np.nan, 0.0, 5.0, 5.1, 20.0, 50.0, 50.1])
+    assert data.rainfall_levels(values).tolist() == [0, 1, 2, 3, 3, 4, 5]
+
+
+def test_label_view_renames_and_labels_without_copying():
+    df = data.clean_weather_data(_raw())
+    view = data.label_view(df, {'location_full': 'lokasi_lengkap', 'rainfall_clean': 'curah_hujan_clean'},
+                           {'kategori': ('rainfall_level', ['a', 'b', 'c', 'd', 'e', 'f'])})
+    assert 'lokasi_lengkap' in view and 'location_full' in df and 'kategori' not in df
+    assert np.shares_memory(view['curah_hujan_clean'].to_numpy(), df['rainfall_clean'].to_numpy())
+    assert isinstance(view['kategori'].dtype, pd.CategoricalDtype)
+    assert view['kategori'].tolist() == ['b', 'c', 'a', 'd', 'a', 'f']
+
+
+def test_data_version_prefers_the_source_version():
+    df = data.clean_weather_data(_raw())
+    assert data.get_data_version(df) == (6, 6)
+    df.attrs['data_version'] = (6, 6, '2024-03-01 10:00:00')
+    assert data.get_data_version(df) == (6, 6, '2024-03-01 10:00:00')
+
+
+def test_incomplete_mysql_settings_raise(monkeypatch):
+    monkeypatch.delenv('MYSQL_PASSWORD', raising=False)
+    with pytest.raises(data.SettingsError):
+        data.create_engine_from_env()
+
+
+def test_calendar_columns_follow_the_dimwaktu_definitions():
+    dates = pd.date_range('2019-12-25', '2021-01-05')
+    columns = data.calendar_columns(dates)
+    assert columns['hari_dalam_tahun'].tolist() == dates.dayofyear.tolist()
+    assert columns['minggu_iso'].tolist() == dates.isocalendar().week.tolist()
+    # Dekad 1-36: days 1-10, 11-20 and the rest of each month, as in DBInput's LEAST(CEIL(day / 10), 3)
+    expected_dekad = (dates.month - 1) * 3 + np.minimum(np.ceil(dates.day / 10), 3)
+    assert columns['dekad'].tolist() == expected_dekad.astype(int).tolist()
+    seasons = [aggregations.SEASON_OF_MONTH[month] for month in dates.month]
+    assert [aggregations.SEASONS[code] for code in columns['musim']] == seasons
+    assert columns['urutan_bulan'].tolist() == (dates.year * 12 + dates.month - 1).tolist()
+    assert columns['hari_dalam_tahun'].dtype == np.int16 and columns['dekad'].dtype == np.int8
+
+
+def test_cleaning_keeps_stored_calendar_columns_and_fills_missing_ones():
+    raw = _raw()
+    raw['musim'] = [2.0, 2.0, 3.0, 3.0, 3.0, 3.0]
+    raw['dekad'] = [9.0, 9.0, np.nan, 7.0, 7.0, 7.0]
+    df = data.clean_weather_data(raw)
+    assert df['musim'].dtype == np.int8 and df['musim'].tolist() == [2, 2, 3, 3, 3, 3]
+    # A column with NULLs, e.g. dates DBInput has not filled yet, is derived from the date instead
+    assert df['dekad'].tolist() == data.calendar_columns(df['date'])['dekad'].tolist()
+    assert 'minggu_iso' in df and df['urutan_bulan'].dtype == np.int32
+
+
+def test_seasonal_pivot_reads_season_codes(monkeypatch):
+    monkeypatch.setattr(aggregations.duck, 'AGGREGATION_BACKEND', 'pandas')
+    df = data.clean_weather_data(_raw())
+    pivot = aggregations.seasonal_pivot(df, 'suhu_rata', 'location_full')
+    assert list(pivot.columns) == ['rainy', 'transition_to_dry']
+    assert pivot.loc['Bandung (Kota)', 'transition_to_dry'] == 25.5
+    assert pivot.loc['Bogor (Kota)', 'rainy'] == 26.5
@@ -0,0 +1,106 @@
+import os
+import runpy
+
+import pytest
+
+pytest.importorskip('pandas')
+pytest.importorskip('dotenv')
+mysql_connector = pytest.importorskip('mysql.connector')
+
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Scripts', 'DBInput.py')
+
+CSV = """TANGGAL,TN,TX,TAVG,RH_AVG,RR,SS,FF_X,DDD_X,FF_AVG,DDD_CAR
+01-01-2024,22,30,26,80,"12,5",5,4,90,2,N
+02-01-2024,22,30,26,80,8888,5,4,C,2,-
+03-01-2024,22,30,26,80,9999,5,4,8888,2,NE
+04-02-2024,22,30,26,80,-,5,4,180,2,S
+"""
+
+
+class FakeCursor:
+    """Answers the script's queries like a database that already has every column and no counters"""
+
+    def __init__(self, stored_values=0, counted_values=0):
+        self.totals = (stored_values, counted_values)
+        self.statements = []
+        self.rowcount = 0
+        self._result = []
+
+    def execute(self, sql, params=None):
+        self.statements.append((' '.join(sql.split()), params))
+        if 'COLUMN_NAME FROM information_schema' in sql:
+            self._result = [(name,) for name in ('hari_dalam_tahun', 'minggu_iso', 'dekad', 'musim', 'urutan_bulan')]
+        elif 'FROM KelengkapanData' in sql and 'SUM' in sql:
+            self._result = [self.totals]
+        else:
+            self._result = [(1,)]
+
+    def executemany(self, sql, rows):
+        self.statements.append((' '.join(sql.split()), list(rows)))
+
+    def fetchone(self):
+        return self._result[0]
+
+    def fetchall(self):
+        return self._result
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def cursor(self):
+        return self._cursor
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def _run(tmp_path, monkeypatch, cursor):
+    (tmp_path / 'Data').mkdir()
+    (tmp_path / 'Data' / 'Data BMKG - Kota Bogor.csv').write_text(CSV)
+    monkeypatch.chdir(tmp_path)
+    for name in ('MYSQL_HOST', 'MYSQL_USER', 'MYSQL_PASSWORD', 'MYSQL_DATABASE'):
+        monkeypatch.setenv(name, 'test')
+    monkeypatch.setenv('MYSQL_PORT', '3306')
+    monkeypatch.setattr(mysql_connector, 'connect', lambda **kwargs: FakeConnection(cursor))
+    runpy.run_path(SCRIPT)
+    return cursor.statements
+
+
+def _counters(statements):
+    rows = [params for sql, params in statements if sql.startswith('INSERT INTO KelengkapanData')]
+    assert len(rows) == 1
+    return {(tahun, bulan, variabel): counts for _, tahun, bulan, variabel, *counts in rows[0]}
+
+
+def test_import_counts_each_value_status(tmp_path, monkeypatch):
+    counters = _counters(_run(tmp_path, monkeypatch, FakeCursor()))
+    # jumlah_terukur, jumlah_8888, jumlah_9999, jumlah_kosong
+    assert counters[(2024, 1, 'curah_hujan')] == [1, 1, 1, 0]
+    assert counters[(2024, 2, 'curah_hujan')] == [0, 0, 0, 1]
+    assert counters[(2024, 1, 'arah_angin_max')] == [2, 1, 0, 0]
+    assert counters[(2024, 1, 'arah_angin_terbanyak')] == [2, 0, 0, 1]
+    assert counters[(2024, 1, 'suhu_min')] == [3, 0, 0, 0]
+    assert len(counters) == 2 * 10
+
+
+def test_table_is_created_and_recounted_only_when_counters_fall_short(tmp_path, monkeypatch):
+    statements = [sql for sql, _ in _run(tmp_path, monkeypatch, FakeCursor(stored_values=40, counted_values=0))]
+    assert any(sql.startswith('CREATE TABLE IF NOT EXISTS KelengkapanData') for sql in statements)
+    recount = statements.index('DELETE FROM KelengkapanData')
+    assert statements[recount + 1].startswith('INSERT INTO KelengkapanData')
+    assert 'FROM FactDataIklim' in statements[recount + 1]
+    # The recount runs before the import adds the new rows' counters
+    assert recount < next(i for i, sql in enumerate(statements) if sql.startswith('INSERT INTO FactDataIklim'))
+
+
+def test_complete_counters_are_not_recounted(tmp_path, monkeypatch):
+    statements = [sql for sql, _ in _run(tmp_path, monkeypatch, FakeCursor(stored_values=40, counted_values=40))]
+    assert 'DELETE FROM KelengkapanData' not in statements
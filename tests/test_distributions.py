@@ -0,0 +1,50 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+pd = pytest.importorskip('pandas')
+
+from weather import distributions
+
+
+def test_box_summary_matches_quartiles_and_tukey_fences():
+    values = np.r_[np.arange(1.0, 21.0), 100.0, np.nan]
+    box = distributions.box_summary(values)
+    q1, median, q3 = np.quantile(values[:-1], [0.25, 0.5, 0.75])
+    assert (box['count'], box['q1'], box['median'], box['q3']) == (21, q1, median, q3)
+    assert box['max'] == 100.0
+    # 100 is an outlier, so the upper whisker stops at the largest value inside the fence
+    assert (box['lowerfence'], box['upperfence']) == (1.0, 20.0)
+    assert distributions.box_summary([np.nan]) is None
+
+
+def test_kde_curve_integrates_to_one_and_peaks_at_the_mode():
+    rng = np.random.default_rng(14)
+    values = rng.normal(25, 2, 20000)
+    grid, density = distributions.kde_curve(values, grid_points=256)
+    assert np.trapezoid(density, grid) == pytest.approx(1.0, abs=0.01)
+    assert grid[np.argmax(density)] == pytest.approx(25, abs=0.3)
+    # Close to the exact Gaussian kernel sum on the same grid
+    bandwidth = 1.06 * values.std() * len(values) ** (-1 / 5)
+    exact = np.exp(-0.5 * ((grid[:, None] - values[None, :]) / bandwidth) ** 2).sum(axis=1)
+    exact /= len(values) * bandwidth * np.sqrt(2 * np.pi)
+    np.testing.assert_allclose(density, exact, atol=1e-3)
+
+
+def test_kde_curve_of_a_constant_series():
+    grid, density = distributions.kde_curve(np.full(10, 30.0))
+    assert np.isfinite(density).all() and grid[np.argmax(density)] == pytest.approx(30, abs=0.1)
+
+
+def test_histogram_summary_matches_numpy():
+    values = np.r_[np.linspace(0, 10, 101), np.nan]
+    summary = distributions.histogram_summary(values, bins=5)
+    counts, edges = np.histogram(values[:-1], bins=5)
+    np.testing.assert_array_equal(summary['counts'], counts)
+    np.testing.assert_array_equal(summary['edges'], edges)
+
+
+def test_summarize_groups_per_station():
+    df = pd.DataFrame({'station': ['B', 'A', 'B', 'A', 'B'], 'value': [1.0, 2.0, 3.0, 4.0, np.nan]})
+    groups = distributions.summarize_groups(df, 'value', 'station')
+    assert list(groups) == ['A', 'B']
+    assert groups['A']['mean'] == 3.0 and groups['B']['count'] == 2
@@ -0,0 +1,79 @@
+import os
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pd = pytest.importorskip('pandas')
+pytest.importorskip('pyarrow')
+pytest.importorskip('duckdb')
+pytest.importorskip('streamlit')
+pytest.importorskip('sqlalchemy')
+
+from weather import data, duck
+
+HEADER = 'TANGGAL,TN,TX,TAVG,RH_AVG,RR,SS,FF_X,DDD_X,FF_AVG,DDD_CAR,,ID WMO,96753\n'
+
+BOGOR = HEADER + """01-01-2024,"23,6","31,3","27,5",85,"16,4","3,9",4,10,1,C,,Nama Stasiun,Stasiun Klimatologi Jawa Barat
+02-01-2024,-,"32,8","27,2",86,8888,"2,3",3,45,0,C,,Lintang,-650.000
+2024-03-10,"24,4","29,8","26,4",90,"13,7","2,2",3,260,1,-,,Bujur,10.675.000
+bukan tanggal,"24,2","31,6","25,6",91,1,"0,4",4,170,1,C,,Elevasi,207 Meter
+"""
+
+MAJALENGKA = HEADER + """01-01-2024,"22,0","30,0","26,0",80,0,"5,0",5,90,2,E,,Nama Stasiun,Stasiun Meteorologi Kertajati
+"""
+
+
+@pytest.fixture
+def source(tmp_path):
+    (tmp_path / 'Data BMKG - Kota Bogor.csv').write_text(BOGOR)
+    (tmp_path / 'Data BMKG - Kab. Majalengka.csv').write_text(MAJALENGKA)
+    return str(tmp_path)
+
+
+def test_csv_rows_are_parsed_like_the_import_script(source):
+    df = duck.read_table(source).to_pandas()
+    assert len(df) == 4
+    bogor = df[df['nama_lokasi'] == 'Bogor'].sort_values('tanggal').reset_index(drop=True)
+    assert (bogor['jenis_lokasi'] == 'Kota').all() and bogor['nama_stasiun'][0] == 'Stasiun Klimatologi Jawa Barat'
+    np.testing.assert_allclose(bogor['curah_hujan'], [16.4, 8888.0, 13.7])
+    assert np.isnan(bogor['suhu_min'][1])
+    assert bogor['arah_angin_terbanyak'][:2].tolist() == ['C', 'C'] and pd.isna(bogor['arah_angin_terbanyak'][2])
+    assert pd.to_datetime(bogor['tanggal']).dt.strftime('%Y-%m-%d').tolist() == ['2024-01-01', '2024-01-02',
+                                                                                 '2024-03-10']
+    majalengka = df[df['nama_lokasi'] == 'Majalengka']
+    assert majalengka['jenis_lokasi'].tolist() == ['Kabupaten']
+
+    # Calendar columns agree with the ones the loader derives from the date
+    expected = data.calendar_columns(df['tanggal'])
+    for column, values in expected.items():
+        assert df[column].tolist() == values.tolist(), column
+
+
+def test_station_rows_use_the_scaled_coordinates(source):
+    stations = duck.read_stations(source).set_index('nama_lokasi')
+    assert stations.loc['Bogor', ['lintang', 'bujur', 'elevasi']].tolist() == [-650000, 10675000, 207.0]
+    # Without coordinate rows a station has no location, as in a DimLokasi row without them
+    assert 'Majalengka' not in stations.index
+
+
+def test_source_version_changes_when_a_file_is_replaced(source):
+    before = duck.source_version(source)
+    path = os.path.join(source, 'Data BMKG - Kab. Majalengka.csv')
+    with open(path, 'a') as f:
+        f.write('02-01-2024,"22,0","30,0","26,0",80,0,"5,0",5,90,2,E,,,\n')
+    assert duck.source_version(source) != before
+    assert len(duck.read_table(source)) == 5
+
+
+@pytest.mark.parametrize('aggfunc', ['mean', 'max', 'min', 'count'])
+def test_pivot_matches_pandas_pivot_table(aggfunc):
+    rng = np.random.default_rng(15)
+    df = pd.DataFrame({
+        'location_full': rng.choice(['A (Kota)', 'B (Kabupaten)', None], 500),
+        'bulan': rng.integers(1, 13, 500),
+        'rainfall_clean': np.where(rng.random(500) < 0.1, np.nan, rng.gamma(2, 5, 500)),
+    })
+    result = duck.pivot(df, 'rainfall_clean', 'location_full', 'bulan', aggfunc)
+    expected = df.pivot_table(values='rainfall_clean', index='location_full', columns='bulan', aggfunc=aggfunc,
+                              fill_value=0).round(2)
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False, check_names=False)
@@ -0,0 +1,46 @@
+import gzip
+import io
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pd = pytest.importorskip('pandas')
+pq = pytest.importorskip('pyarrow.parquet')
+
+from weather import exports
+
+
+def _read_parquet(payload):
+    return pq.read_table(io.BytesIO(payload)).to_pandas()
+
+
+def _frame():
+    return pd.DataFrame({
+        'location_full': ['A (Kota)', 'B (Kabupaten)'] * 5,
+        'rainfall_clean': [0.0, 1.5, np.nan, 20.0, 3.2, np.nan, 0.0, 7.7, 55.1, 0.4],
+        'tahun': np.arange(2015, 2025, dtype=np.int16),
+        'arah_angin_max': [None] * 6 + ['N', 'SE', None, 'W'],
+    })
+
+
+@pytest.mark.parametrize('chunk_rows', [3, 4, 100])
+def test_parquet_chunks_share_one_schema(chunk_rows):
+    df = _frame()
+    result = _read_parquet(exports.to_parquet(df, chunk_rows=chunk_rows))
+    pd.testing.assert_frame_equal(result, df)
+
+
+def test_parquet_column_missing_after_the_first_chunk():
+    df = _frame().iloc[::-1].reset_index(drop=True)
+    result = _read_parquet(exports.to_parquet(df, index=False, chunk_rows=3))
+    pd.testing.assert_frame_equal(result, df)
+
+
+def test_parquet_of_an_empty_frame():
+    df = _frame().iloc[:0]
+    assert _read_parquet(exports.to_parquet(df, index=False)).columns.tolist() == df.columns.tolist()
+
+
+def test_csv_gz_matches_to_csv():
+    df = _frame()
+    assert gzip.decompress(exports.to_csv_gz(df, chunk_rows=3)).decode('utf-8') == df.to_csv()
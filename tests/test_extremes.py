@@ -0,0 +1,75 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+pd = pytest.importorskip('pandas')
+pytest.importorskip('sqlalchemy')
+
+from weather import extremes
+
+
+def _longest_run(flags):
+    longest = current = 0
+    for flag in flags:
+        current = current + 1 if flag else 0
+        longest = max(longest, current)
+    return longest
+
+
+def _naive_indices(series):
+    """ETCCDI indices of a daily series with a full calendar index, one year at a time"""
+    rows = {}
+    for year, rain in series.groupby(series.index.year):
+        values = rain.to_numpy()
+        valid = ~np.isnan(values)
+        five_day = [values[i - 4:i + 1].sum() for i in range(4, len(values)) if valid[i - 4:i + 1].all()]
+        row = {
+            'days': int(valid.sum()),
+            'CDD': _longest_run(valid & (np.nan_to_num(values, nan=np.inf) < extremes.WET_DAY_MM)),
+            'CWD': _longest_run(valid & (np.nan_to_num(values, nan=-np.inf) >= extremes.WET_DAY_MM)),
+            'Rx1day': np.nanmax(values) if valid.any() else np.nan,
+            'Rx5day': max(five_day) if five_day else np.nan,
+        }
+        for mm in extremes.HEAVY_DAY_MM:
+            row[f'R{mm}mm'] = int((valid & (np.nan_to_num(values, nan=-np.inf) >= mm)).sum())
+        row['PRCPTOT'] = values[valid & (np.nan_to_num(values) >= extremes.WET_DAY_MM)].sum()
+        rows[year] = row
+    return pd.DataFrame.from_dict(rows, orient='index')[list(extremes.INDICES)]
+
+
+def test_station_indices_match_a_loop_per_year():
+    rng = np.random.default_rng(3)
+    dates = pd.date_range('2017-03-15', '2020-10-02')
+    rain = np.where(rng.random(len(dates)) < 0.4, rng.gamma(0.8, 15.0, len(dates)), 0.0)
+    rain[rng.random(len(dates)) < 0.08] = np.nan
+    # Rows arrive shuffled and with whole missing days, which the calendar must restore
+    keep = rng.random(len(dates)) > 0.03
+    order = rng.permutation(keep.sum())
+    result = extremes.station_indices(dates[keep][order], rain[keep][order])
+
+    full = pd.Series(np.where(keep, rain, np.nan), index=dates)
+    expected = _naive_indices(full)
+    assert result.index.tolist() == expected.index.tolist()
+    for index in extremes.INDICES:
+        np.testing.assert_allclose(result[index].to_numpy(dtype='float64'),
+                                   expected[index].to_numpy(dtype='float64'), err_msg=index)
+
+
+def test_spells_stop_at_the_end_of_the_year():
+    dates = pd.date_range('2019-12-20', '2020-01-10')
+    result = extremes.station_indices(dates, np.zeros(len(dates)))
+    assert result['CDD'].tolist() == [12, 10]
+
+
+def test_cached_compute_matches_direct_computation():
+    dates = pd.date_range('2018-01-01', '2019-12-31')
+    rng = np.random.default_rng(4)
+    df = pd.DataFrame({
+        'location_full': np.repeat(['A (Kota)', 'B (Kota)'], len(dates)),
+        'date': np.tile(dates, 2),
+        'rainfall_clean': rng.gamma(0.5, 10.0, 2 * len(dates)),
+    })
+    cache = extremes.ExtremeIndices(workers=2)
+    first, second = cache.compute(df), cache.compute(df)
+    pd.testing.assert_frame_equal(first, second)
+    direct = extremes.station_indices(dates, df['rainfall_clean'].to_numpy()[len(dates):])
+    np.testing.assert_allclose(first.loc['B (Kota)'].to_numpy(dtype='float64'), direct.to_numpy(dtype='float64'))
@@ -0,0 +1,100 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+pd = pytest.importorskip('pandas')
+pa = pytest.importorskip('pyarrow')
+sqlalchemy = pytest.importorskip('sqlalchemy')
+
+from weather import fetch, wind
+
+
+@pytest.fixture
+def engine():
+    engine = sqlalchemy.create_engine('sqlite://')
+    rows = [
+        {'id': 1, 'reading': 10, 'rain': 0.5, 'arah': '90', 'nama': 'Bogor'},
+        {'id': 2, 'reading': 20, 'rain': None, 'arah': 'N', 'nama': 'Bandung'},
+        {'id': 3, 'reading': None, 'rain': 2.0, 'arah': None, 'nama': None},
+        {'id': 4, 'reading': 2 ** 40, 'rain': 3.5, 'arah': 'C', 'nama': 'Cirebon'},
+        {'id': 5, 'reading': 50, 'rain': 0.0, 'arah': '225', 'nama': 'Majalengka'},
+    ]
+    with engine.begin() as conn:
+        conn.execute(sqlalchemy.text(
+            "CREATE TABLE readings (id INTEGER, reading INTEGER, rain REAL, arah TEXT, nama TEXT)"))
+        conn.execute(sqlalchemy.text(
+            "INSERT INTO readings VALUES (:id, :reading, :rain, :arah, :nama)"), rows)
+    return engine
+
+
+def _read(engine, chunk_rows, clean=None):
+    return fetch.read_sql_chunked(engine, "SELECT * FROM readings ORDER BY id", clean=clean, chunk_rows=chunk_rows)
+
+
+@pytest.mark.parametrize('chunk_rows', [1, 2, 3, 10])
+def test_chunked_fetch_matches_read_sql(engine, chunk_rows):
+    df, chunks = _read(engine, chunk_rows)
+    expected = pd.read_sql("SELECT * FROM readings ORDER BY id", engine)
+    assert chunks == -(-len(expected) // chunk_rows)
+    assert df['id'].tolist() == expected['id'].tolist()
+    np.testing.assert_allclose(df['rain'], expected['rain'], rtol=1e-6)
+    assert df['nama'].isna().tolist() == expected['nama'].isna().tolist()
+    assert df['nama'].dropna().tolist() == expected['nama'].dropna().tolist()
+
+
+@pytest.mark.parametrize('chunk_rows', [1, 2, 3, 10])
+def test_integer_nulls_stay_missing_and_large_values_fit(engine, chunk_rows):
+    reading = _read(engine, chunk_rows)[0]['reading']
+    assert reading.isna().tolist() == [False, False, True, False, False]
+    assert reading.dropna().astype('int64').tolist() == [10, 20, 2 ** 40, 50]
+
+
+def test_integer_column_without_nulls_is_narrowed(engine):
+    df = _read(engine, 2)[0]
+    assert df['id'].dtype == np.int32
+
+
+def test_cleaned_sector_codes_keep_their_dtype(engine):
+    def clean(chunk):
+        chunk['arah'] = wind.sector_codes(chunk['arah'])
+        return chunk
+
+    df = _read(engine, 2, clean)[0]
+    assert df['arah'].dtype == np.int8
+    e, n, sw = (wind.SECTORS.index(name) for name in ('E', 'N', 'SW'))
+    assert df['arah'].tolist() == [e, n, wind.MISSING, wind.CALM, sw]
+
+
+def test_fit_column_promotes_only_when_needed():
+    column = np.zeros(4, dtype=np.int32)
+    assert fetch._fit_column(column, pd.Series([1, 2], dtype='int64')) is column
+    assert fetch._fit_column(column, pd.Series([2 ** 33])).dtype == np.int64
+    assert fetch._fit_column(column, pd.Series([1.0, np.nan])).dtype == np.float64
+
+
+@pytest.mark.parametrize('batch_size', [1, 2, 10])
+def test_arrow_fetch_matches_read_sql(engine, monkeypatch, batch_size):
+    monkeypatch.setattr(fetch, 'connectorx', None)
+    query = "SELECT * FROM readings ORDER BY id"
+    table = fetch.read_arrow_table(engine, query, batch_size=batch_size)
+    df = fetch.arrow_to_pandas(table)
+    expected = pd.read_sql(query, engine)
+    assert df['id'].tolist() == expected['id'].tolist()
+    np.testing.assert_allclose(df['rain'], expected['rain'])
+    # A column that is NULL in a whole batch takes the type of the other batches
+    assert df['nama'].dtype == pd.ArrowDtype(pa.string())
+    assert df['nama'].isna().tolist() == expected['nama'].isna().tolist()
+
+
+def test_record_batches_turn_decimals_into_floats():
+    import decimal
+    batch = fetch.rows_to_record_batch([(decimal.Decimal('1.25'), 'a'), (None, None)], ['value', 'name'])
+    assert batch.schema.field('value').type == pa.float64()
+    assert batch.column(0).to_pylist() == [1.25, None]
+
+
+def test_auto_backend_needs_connectorx(monkeypatch):
+    monkeypatch.setattr(fetch, 'connectorx', None)
+    assert fetch.resolve_backend('auto') == 'pandas'
+    assert fetch.resolve_backend('chunked') == 'chunked'
+    monkeypatch.setattr(fetch, 'connectorx', object())
+    assert fetch.resolve_backend('auto') == 'arrow'
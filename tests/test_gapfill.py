@@ -0,0 +1,105 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('pandas')
+pytest.importorskip('sqlalchemy')
+
+from weather import gapfill
+
+
+def test_short_gaps_are_interpolated_and_long_gaps_left():
+    nan = np.nan
+    values = np.array([[1.0, nan, nan, 4.0, nan, nan, nan, nan, 9.0, nan]])
+    filled, sources = gapfill.fill_array(values, max_gap=3)
+    np.testing.assert_allclose(filled[0, :4], [1.0, 2.0, 3.0, 4.0])
+    assert np.isnan(filled[0, 4:8]).all() and np.isnan(filled[0, 9])
+    assert sources[0].tolist() == [gapfill.OBSERVED, gapfill.LINEAR, gapfill.LINEAR, gapfill.OBSERVED] + \
+        [gapfill.MISSING] * 4 + [gapfill.OBSERVED, gapfill.MISSING]
+
+
+def test_regression_matches_polyfit():
+    rng = np.random.default_rng(8)
+    x = rng.normal(25, 2, 400)
+    y = 3.0 + 0.8 * x + rng.normal(0, 0.5, 400)
+    x[rng.random(400) < 0.1] = np.nan
+    y[rng.random(400) < 0.1] = np.nan
+    intercept, slope, r2, usable = gapfill.regression(gapfill._pair_sums(np.vstack([y, x])))
+
+    both = ~np.isnan(x) & ~np.isnan(y)
+    expected_slope, expected_intercept = np.polyfit(x[both], y[both], 1)
+    assert usable[0, 1] and not usable[0, 0]
+    np.testing.assert_allclose([slope[0, 1], intercept[0, 1]], [expected_slope, expected_intercept])
+    np.testing.assert_allclose(r2[0, 1], np.corrcoef(x[both], y[both])[0, 1] ** 2)
+
+
+def test_neighbour_then_climatology_then_minimum():
+    rng = np.random.default_rng(9)
+    days = 200
+    neighbour = rng.gamma(2.0, 5.0, days)
+    target = 1.0 + 2.0 * neighbour
+    target[100:110] = np.nan
+    neighbour[105:110] = np.nan
+    values = np.vstack([target, neighbour])
+    normal = np.full(values.shape, -4.0)
+
+    coefficients = gapfill.regression(gapfill._pair_sums(values))
+    filled, sources = gapfill.fill_array(values, normal, coefficients, max_gap=0, minimum=0.0)
+    np.testing.assert_allclose(filled[0, 100:105], 1.0 + 2.0 * neighbour[100:105])
+    assert (sources[0, 100:105] == gapfill.NEIGHBOUR).all()
+    # Neither station has these days: the normal, raised to the minimum
+    assert (sources[0, 105:110] == gapfill.CLIMATOLOGY).all()
+    np.testing.assert_array_equal(filled[0, 105:110], 0.0)
+    np.testing.assert_array_equal(filled[0, :100], values[0, :100])
+
+
+def _station_frame(rng, stations=3, days=800):
+    pd = pytest.importorskip('pandas')
+    from weather import climatology
+    dates = pd.date_range('2020-01-01', periods=days, freq='D')
+    frames = []
+    for k in range(stations):
+        frame = pd.DataFrame({'location_full': f'Station {k}', 'date': dates})
+        for variable in climatology.VARIABLES:
+            frame[variable] = 20.0 + k + rng.normal(0, 1, days)
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True)
+
+
+def test_filler_update_and_filled_on_station_frame():
+    from weather import climatology
+    rng = np.random.default_rng(10)
+    df = _station_frame(rng)
+    observed = df['suhu_rata'].copy()
+    df.loc[10:11, 'suhu_rata'] = np.nan            # short gap: interpolated
+    df.loc[100:120, 'suhu_rata'] = np.nan          # long gap: a neighbour or the normal
+
+    normals = climatology.Climatology()
+    normals.update(df)
+    filler = gapfill.GapFiller(normals=normals)
+    filler.update(df)
+    result = filler.filled(df, {'suhu_rata': 'suhu_rata'})
+
+    assert result.index.equals(df.index)
+    present = df['suhu_rata'].notna().to_numpy()
+    np.testing.assert_array_equal(result['suhu_rata_filled'].to_numpy()[present], observed.to_numpy()[present])
+    assert (result['suhu_rata_source'].to_numpy()[present] == gapfill.OBSERVED).all()
+    assert (result.loc[10:11, 'suhu_rata_source'] == gapfill.LINEAR).all()
+    assert result.loc[100:120, 'suhu_rata_source'].isin([gapfill.NEIGHBOUR, gapfill.CLIMATOLOGY]).all()
+    assert result['suhu_rata_filled'].notna().all()
+
+
+def test_filler_update_adds_new_days_only():
+    from weather import climatology
+    rng = np.random.default_rng(11)
+    df = _station_frame(rng, days=400)
+    normals = climatology.Climatology()
+    normals.update(df)
+    filler = gapfill.GapFiller(normals=normals)
+    filler.update(df[df['date'] < '2020-12-01'])
+    filler.update(df)
+
+    fresh = gapfill.GapFiller(normals=normals)
+    fresh.update(df)
+    columns = {variable: variable for variable in climatology.VARIABLES}
+    np.testing.assert_allclose(filler.filled(df, columns).to_numpy(dtype=float),
+                               fresh.filled(df, columns).to_numpy(dtype=float))
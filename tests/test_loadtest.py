@@ -0,0 +1,70 @@
+import datetime
+import random
+import threading
+
+import pytest
+
+pytest.importorskip('numpy')
+pytest.importorskip('streamlit')
+
+from weather import latency, loadtest
+
+LABELS = latency.SCRIPTS['streamlit_dashboard.py']
+PERIOD = (datetime.date(2020, 1, 1), datetime.date(2024, 12, 31))
+
+
+class FakeWidget:
+    options = ['Bandung (Kota)', 'Bogor (Kota)', 'Bogor (Kabupaten)', 'Cirebon (Kota)', 'Depok (Kota)']
+
+
+def test_random_actions_stay_within_the_widgets():
+    rng = random.Random(0)
+    seen = set()
+    for _ in range(200):
+        action, changes = loadtest.random_action(LABELS, rng, PERIOD)
+        seen.add(action)
+        for kind, label, value in changes:
+            value = value(FakeWidget()) if callable(value) else value
+            if kind == 'multiselect':
+                assert 2 <= len(value) <= 4 and set(value) <= set(FakeWidget.options)
+            elif kind == 'selectbox':
+                assert value in FakeWidget.options
+            elif kind == 'date_input':
+                assert PERIOD[0] <= value[0] <= value[1] <= PERIOD[1]
+            elif label == latency.SECTION_KEY:
+                assert value in LABELS['sections']
+            else:
+                assert label == LABELS['mode'] and value in LABELS['modes']
+    assert seen == set(loadtest.ACTIONS)
+
+
+def test_random_actions_repeat_with_the_seed():
+    def actions(seed):
+        rng = random.Random(seed)
+        return [loadtest.random_action(LABELS, rng, PERIOD)[0] for _ in range(20)]
+    assert actions(3) == actions(3)
+
+
+def test_latency_summary_skips_failed_reruns():
+    results = [{'action': 'open', 'ms': 900.0}, {'action': 'section', 'ms': 10.0},
+               {'action': 'section', 'ms': 30.0}, {'action': 'date range', 'ms': None}]
+    summary = loadtest.latency_summary(results)
+    assert summary['all'] == {'count': 3, 'p50_ms': 30.0, 'p95_ms': 813.0, 'max_ms': 900.0}
+    assert summary['section']['p50_ms'] == 20.0
+    assert 'date range' not in summary
+
+
+def test_failed_session_records_an_error_and_releases_the_others(tmp_path, monkeypatch):
+    monkeypatch.setattr(latency, 'ROOT', str(tmp_path))
+    results, start = [], threading.Barrier(2)
+    loadtest.run_session('streamlit_dashboard.py', 1, 0, results, start)
+    assert start.broken
+    assert results[0]['action'] == 'open' and results[0]['ms'] is None and results[0]['errors'] == 1
+
+
+def test_memory_samples_until_stopped():
+    samples, stop = [], threading.Event()
+    stop.set()
+    loadtest.sample_memory(samples, stop)
+    assert samples == []
+    assert loadtest.rss_bytes() is None or loadtest.rss_bytes() > 0
@@ -0,0 +1,73 @@
+import functools
+
+import pytest
+
+pytest.importorskip('numpy')
+pd = pytest.importorskip('pandas')
+sqlalchemy = pytest.importorskip('sqlalchemy')
+
+from weather import perf
+
+
+@pytest.fixture
+def monitor(tmp_path):
+    return perf.PerfMonitor(enabled=True, log_path=str(tmp_path / 'perf.jsonl'))
+
+
+def test_disabled_monitor_records_nothing():
+    monitor = perf.PerfMonitor(enabled=False, log_path='')
+    with monitor.timed('tab', 'overview'):
+        pass
+    monitor.count('pool', 'checkouts')
+    assert not monitor.events and not monitor.counters
+    assert monitor.timing_summary().empty
+
+
+def test_timings_are_summarised_and_logged(monitor, tmp_path):
+    for _ in range(3):
+        with monitor.timed('tab', 'overview'):
+            pass
+
+    @monitor.timed_function('clean')
+    def clean():
+        return 1
+
+    assert clean() == 1
+    summary = monitor.timing_summary().set_index(['kind', 'name'])
+    assert summary.loc[('tab', 'overview'), 'count'] == 3
+    assert summary.loc[('clean', 'clean'), 'count'] == 1
+    assert len((tmp_path / 'perf.jsonl').read_text().splitlines()) == 4
+
+
+def test_cached_counts_hits_and_misses(monitor):
+    runs = []
+
+    def run(x):
+        runs.append(x)
+        return x * 2
+
+    def memoize(func):
+        # Like st.cache_data: a cached function with a clear() method
+        cached_func = functools.lru_cache()(func)
+        cached_func.clear = cached_func.cache_clear
+        return cached_func
+
+    cached = monitor.cached('double', memoize)(run)
+    assert [cached(1), cached(1), cached(2)] == [2, 2, 4]
+    assert runs == [1, 2]
+    row = monitor.cache_summary().set_index('cache').loc['double']
+    assert (row['calls'], row['misses'], row['hit_rate']) == (3, 2, round(1 / 3, 3))
+
+
+def test_engine_queries_and_failures_are_timed(monitor):
+    engine = monitor.instrument_engine(sqlalchemy.create_engine('sqlite://'))
+    with engine.connect() as conn:
+        conn.execute(sqlalchemy.text("SELECT 1")).fetchall()
+        with pytest.raises(sqlalchemy.exc.OperationalError):
+            conn.execute(sqlalchemy.text("SELECT * FROM missing_table"))
+        conn.execute(sqlalchemy.text("SELECT 2")).fetchall()
+
+    queries = [event for event in monitor.events if event['kind'] == 'query']
+    assert [event['name'] for event in queries] == ['SELECT 1', 'SELECT * FROM missing_table', 'SELECT 2']
+    assert queries[1].get('failed') and not queries[2].get('failed')
+    assert monitor.counter_summary()['pool: checkouts'] >= 1
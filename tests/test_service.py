@@ -0,0 +1,82 @@
+import json
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pd = pytest.importorskip('pandas')
+pa = pytest.importorskip('pyarrow')
+pytest.importorskip('streamlit')
+pytest.importorskip('sqlalchemy')
+pytest.importorskip('dotenv')
+
+from weather import aggregations, bench, data, service
+
+
+@pytest.fixture(scope='module')
+def frame():
+    return bench.Frames(3, 2).clean
+
+
+@pytest.fixture
+def server(frame, monkeypatch):
+    reads = []
+    monkeypatch.setattr(data, 'query_data_version', lambda engine: (len(frame), 1))
+
+    def read_weather_data(engine):
+        reads.append(1)
+        return frame
+
+    monkeypatch.setattr(data, 'read_weather_data', read_weather_data)
+    handler = type('Handler', (service.AggregateHandler,), {'service': service.AggregateService(None)})
+    handler.log_message = lambda *args: None
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{httpd.server_address[1]}', reads
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _get(url, headers=None):
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, headers=headers or {})) as response:
+            return response.status, dict(response.headers), response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, dict(e.headers), e.read()
+
+
+def test_monthly_rainfall_matches_the_dashboard_pivot(server, frame):
+    base, reads = server
+    location = frame['location_full'].iloc[0]
+    url = f'{base}/aggregates/monthly-rainfall?agg=max&locations={urllib.parse.quote(location)}'
+    status, headers, body = _get(url)
+    assert status == 200 and headers['Content-Type'] == 'application/json'
+    result = json.loads(body)
+    assert result['data_version'] == [len(frame), 1]
+    expected = aggregations.monthly_pivot(frame[frame['location_full'] == location], 'rainfall_clean',
+                                          'location_full', aggfunc='max')
+    assert [row[0] for row in result['data']] == [location]
+    np.testing.assert_allclose(result['data'][0][1:], expected.iloc[0].to_numpy())
+
+    # Same request again: the ETag matches and the frame is not read twice
+    status, _, body = _get(url, {'If-None-Match': headers['ETag']})
+    assert status == 304 and body == b''
+    assert len(reads) == 1
+
+
+def test_arrow_format_and_errors(server, frame):
+    base, _ = server
+    status, headers, body = _get(f'{base}/aggregates/seasonal?variable=suhu_rata', {'Accept': service.ARROW_MIME})
+    assert status == 200 and headers['Content-Type'] == service.ARROW_MIME
+    table = pa.ipc.open_stream(body).read_all()
+    assert json.loads(table.schema.metadata[b'data_version']) == [len(frame), 1]
+    assert set(table.column('location_full').to_pylist()) == set(frame['location_full'].unique())
+
+    assert _get(f'{base}/aggregates/monthly-rainfall?agg=median')[0] == 400
+    assert _get(f'{base}/aggregates/unknown')[0] == 404
+    assert json.loads(_get(f'{base}/aggregates')[2]) == sorted(service.ENDPOINTS)
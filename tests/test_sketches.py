@@ -0,0 +1,88 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+pd = pytest.importorskip('pandas')
+pytest.importorskip('sqlalchemy')
+
+from weather import sketches
+
+
+def _frame(rng, stations=('A (Kota)', 'B (Kabupaten)'), start='2015-01-01', end='2019-12-31'):
+    dates = pd.date_range(start, end)
+    rain = np.where(rng.random(len(stations) * len(dates)) < 0.5,
+                    rng.lognormal(1.5, 1.2, len(stations) * len(dates)), 0.0)
+    return pd.DataFrame({
+        'location_full': np.repeat(stations, len(dates)),
+        'date': np.tile(dates, len(stations)),
+        'rainfall_clean': np.minimum(rain, sketches.MAX_RAINFALL),
+    })
+
+
+def test_bucket_values_are_within_the_relative_accuracy():
+    values = np.geomspace(sketches.MIN_RAINFALL, sketches.MAX_RAINFALL, 5000)
+    estimates = sketches.BUCKET_VALUES[sketches.bucket_index(values)]
+    assert np.all(np.abs(estimates - values) <= sketches.RELATIVE_ACCURACY * values * (1 + 1e-9))
+    assert sketches.bucket_index([0.0, 0.05]).tolist() == [0, 0]
+
+
+def test_quantiles_are_within_the_relative_accuracy_of_exact_ones():
+    rng = np.random.default_rng(5)
+    values = rng.lognormal(1.5, 1.2, 20000)
+    counts = np.bincount(sketches.bucket_index(values), minlength=sketches.BUCKETS)
+    probabilities = [0.1, 0.5, 0.9, 0.99]
+    estimates = sketches.quantiles(counts, probabilities)
+    exact = np.quantile(values, probabilities, method='lower')
+    np.testing.assert_allclose(estimates, exact, rtol=sketches.RELATIVE_ACCURACY * 1.001)
+
+
+def test_combine_matches_a_sketch_of_the_filtered_rows():
+    rng = np.random.default_rng(6)
+    df = _frame(rng)
+    stored = sketches.RainfallSketches()
+    stored.update(df)
+    filtered = df[df['date'].between('2016-02-11', '2018-07-20') & (df['location_full'] == 'B (Kabupaten)')]
+
+    stations, counts = stored.combine(filtered)
+    direct = sketches.RainfallSketches()
+    direct.update(filtered)
+    assert stations == ['B (Kabupaten)']
+    np.testing.assert_array_equal(counts, direct.combine(filtered)[1])
+
+    # Same as bucketing the rows by calendar month
+    month = filtered['date'].dt.month.to_numpy() - 1
+    naive = np.zeros((12, sketches.BUCKETS), dtype=np.int64)
+    np.add.at(naive, (month, sketches.bucket_index(filtered['rainfall_clean'])), 1)
+    np.testing.assert_array_equal(counts[0], naive)
+
+
+def test_update_only_adds_new_days():
+    rng = np.random.default_rng(7)
+    df = _frame(rng)
+    incremental = sketches.RainfallSketches()
+    incremental.update(df[df['date'] < '2017-06-15'])
+    incremental.update(df)
+    once = sketches.RainfallSketches()
+    once.update(df)
+    np.testing.assert_array_equal(incremental.combine(df)[1], once.combine(df)[1])
+
+
+def test_histograms_need_a_bucketing():
+    with pytest.raises(TypeError):
+        sketches.MonthlyHistograms()
+
+
+def test_only_non_empty_buckets_are_stored():
+    rng = np.random.default_rng(8)
+    df = _frame(rng, stations=[f'S{k} (Kota)' for k in range(60)], start='2018-01-01', end='2019-12-31')
+    stored = sketches.RainfallSketches()
+    stored.update(df)
+    months = df['date'].dt.year * 12 + df['date'].dt.month
+    cells = pd.DataFrame({'station': df['location_full'], 'month': months,
+                          'bucket': sketches.bucket_index(df['rainfall_clean'])}).drop_duplicates()
+    assert len(stored._keys) == len(cells) < len(stored.stations) * 24 * sketches.BUCKETS
+
+    # Stations far into the key space combine like the first ones
+    last = df[df['location_full'] == 'S59 (Kota)']
+    direct = sketches.RainfallSketches()
+    direct.update(last)
+    np.testing.assert_array_equal(stored.combine(last)[1], direct.combine(last)[1])
@@ -0,0 +1,43 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from weather import spatial
+
+STATION_LAT = np.array([-6.7, -6.5, -6.88356, -6.7344, -2.59231])
+STATION_LON = np.array([106.85, 106.75, 107.59733, 108.263, 140.16792])
+
+
+def _naive_idw(values, step, power, neighbours):
+    lats, lons = spatial.grid_axes(step)
+    cell_lat, cell_lon = (axis.ravel() for axis in np.meshgrid(lats, lons, indexing='ij'))
+    distances = spatial._distances_km(cell_lat, cell_lon, STATION_LAT, STATION_LON)
+    grid = np.full(len(cell_lat), np.nan)
+    for cell in range(len(cell_lat)):
+        nearest = np.argsort(distances[cell])[:neighbours]
+        nearest = [k for k in nearest if not np.isnan(values[k])]
+        if nearest:
+            weights = np.maximum(distances[cell, nearest], spatial.MIN_DISTANCE_KM) ** -power
+            grid[cell] = (weights * values[nearest]).sum() / weights.sum()
+    return grid.reshape(len(lats), len(lons))
+
+
+@pytest.mark.parametrize('missing', [None, 1])
+def test_frames_match_a_loop_over_cells(missing):
+    values = np.array([22.5, 24.0, 21.0, 27.5, 30.0])
+    if missing is not None:
+        values[missing] = np.nan
+    interpolator = spatial.Interpolator(STATION_LAT, STATION_LON, step=0.25, power=2, neighbours=3)
+    grid = interpolator.frames(values)
+    expected = _naive_idw(values, 0.25, 2, 3)
+    assert grid.shape == (1,) + expected.shape
+    np.testing.assert_allclose(grid[0], expected)
+
+
+def test_many_frames_in_one_call():
+    interpolator = spatial.Interpolator(STATION_LAT, STATION_LON, step=0.5)
+    days = np.array([[1.0, 2.0, 3.0, 4.0, 5.0], [np.nan] * 5, [10.0] * 5])
+    grids = interpolator.frames(days)
+    np.testing.assert_allclose(grids[0], interpolator.frames(days[0])[0])
+    assert np.isnan(grids[1]).all()
+    np.testing.assert_allclose(grids[2], 10.0)
@@ -0,0 +1,66 @@
+import os
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pd = pytest.importorskip('pandas')
+pytest.importorskip('pyarrow')
+pytest.importorskip('sqlalchemy')
+
+from weather import store
+
+
+def _frame(rows=100):
+    return pd.DataFrame({
+        'fact_id': np.arange(rows, dtype=np.int32),
+        'rainfall_clean': np.where(np.arange(rows) % 7 == 0, np.nan, np.arange(rows) / 10),
+        'location_full': pd.array(['Bogor (Kota)', None] * (rows // 2), dtype='string[pyarrow]'),
+        'date': pd.date_range('2020-01-01', periods=rows),
+    })
+
+
+def test_frame_is_computed_once_per_key(tmp_path):
+    frames = store.FrameStore(str(tmp_path))
+    calls = []
+
+    def compute():
+        calls.append(1)
+        df = _frame()
+        df.attrs['fetch_stats'] = {'backend': 'chunked', 'rows': len(df)}
+        return df
+
+    first = frames.get_or_create('weather', (100, 99), compute)
+    again = frames.get_or_create('weather', (100, 99), compute)
+    assert len(calls) == 1
+    pd.testing.assert_frame_equal(again, _frame(), check_dtype=False)
+    assert again['rainfall_clean'].isna().sum() == _frame()['rainfall_clean'].isna().sum()
+    assert again.attrs['fetch_stats']['backend'] == 'disk' and again.attrs['fetch_stats']['rows'] == 100
+    assert first['fact_id'].dtype == np.int32
+
+    frames.get_or_create('weather', (101, 100), compute)
+    assert len(calls) == 2
+
+
+def test_no_directory_always_computes():
+    frames = store.FrameStore('')
+    assert not frames.enabled
+    assert frames.get_or_create('weather', 1, lambda: None) is None
+
+
+def test_unreadable_files_are_discarded(tmp_path):
+    frames = store.FrameStore(str(tmp_path))
+    path = frames.path_for('weather', 1)
+    with open(path, 'wb') as f:
+        f.write(b'not arrow')
+    assert frames.read(path) is None and not os.path.exists(path)
+
+
+def test_least_recently_used_files_are_evicted(tmp_path):
+    frames = store.FrameStore(str(tmp_path))
+    paths = [frames.path_for('weather', version) for version in range(3)]
+    for age, path in enumerate(paths):
+        frames.write(path, _frame())
+        os.utime(path, (1000 + age, 1000 + age))
+    frames.max_bytes = os.path.getsize(paths[0]) * 2
+    frames.evict(keep=paths[0])
+    assert [os.path.exists(path) for path in paths] == [True, False, True]
@@ -0,0 +1,84 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+pd = pytest.importorskip('pandas')
+
+from weather import completeness, wind
+
+
+def test_sector_codes_of_degrees_letters_and_sentinels():
+    raw = pd.Series(['0', 'C', '45', '360', 'NE', 'SSW', 'N', 'NNW', '9999', '8888', '', None, '-10'], dtype=object)
+    n, ne, s, sw = (wind.SECTORS.index(name) for name in ('N', 'NE', 'S', 'SW'))
+    expected = [wind.CALM, wind.CALM, ne, n, ne, sw, n, n, wind.MISSING, wind.MISSING, wind.MISSING, wind.MISSING,
+                wind.MISSING]
+    assert wind.sector_codes(raw).tolist() == expected
+    assert wind.sector_codes(raw).dtype == np.int8
+
+
+def test_sector_codes_match_naive_binning():
+    degrees = np.arange(1, 361)
+    naive = [int(((d + 22.5) % 360) // 45) for d in degrees]
+    assert wind.sector_codes(pd.Series(degrees.astype(float))).tolist() == naive
+
+
+def test_integer_degrees_are_never_read_as_codes():
+    # Small degree values look like sector codes, but raw columns are always parsed as degrees
+    degrees = np.array([1, 5, 8, 90, 180, 270], dtype=np.int32)
+    n, e, s, w = (wind.SECTORS.index(name) for name in ('N', 'E', 'S', 'W'))
+    assert wind.sector_codes(degrees).tolist() == [n, n, n, e, s, w]
+
+
+def test_cleaning_moves_directions_into_sector_columns():
+    from weather import data
+    raw = pd.DataFrame({
+        'curah_hujan': [1.0, 2.0, 3.0],
+        'nama_lokasi': ['Bogor'] * 3,
+        'jenis_lokasi': ['Kota'] * 3,
+        'tanggal': pd.date_range('2024-01-01', periods=3),
+        'arah_angin_max': ['8', 'C', None],
+        'arah_angin_terbanyak': ['NE', '180', '9999'],
+    })
+    df = data.clean_weather_data(raw)
+    assert not set(wind.DIRECTION_COLUMNS) & set(df.columns)
+    assert df['max_wind_sector'].tolist() == [wind.SECTORS.index('N'), wind.CALM, wind.MISSING]
+    assert df['prevailing_wind_sector'].tolist() == [wind.SECTORS.index('NE'), wind.SECTORS.index('S'), wind.MISSING]
+    assert df['max_wind_sector'].dtype == np.int8
+
+
+def _frame(direction_dtype):
+    rng = np.random.default_rng(0)
+    dates = pd.date_range('2020-01-01', '2020-06-30')
+    df = pd.DataFrame({
+        'location_full': np.repeat(['A (Kota)', 'B (Kabupaten)'], len(dates)),
+        'date': np.tile(dates, 2),
+        'max_wind_sector': rng.integers(wind.MISSING, wind.CALM + 1, 2 * len(dates)).astype(direction_dtype),
+        'kecepatan_angin_max': rng.uniform(0, 12, 2 * len(dates)),
+    })
+    return df
+
+
+def test_wind_rose_counts_do_not_depend_on_code_width():
+    narrow, wide = _frame(np.int8), _frame(np.int32)
+    roses = []
+    for df in (narrow, wide):
+        rose = wind.WindRoses('max_wind_sector', 'kecepatan_angin_max')
+        rose.update(df)
+        roses.append(rose.combine(df)[1])
+    np.testing.assert_array_equal(roses[0], roses[1])
+
+    # Same counts as a naive groupby over (direction, speed class)
+    df = narrow[narrow['max_wind_sector'] != wind.MISSING]
+    speed_class = np.searchsorted(wind.SPEED_EDGES, df['kecepatan_angin_max'], side='right')
+    naive = pd.Series(1, index=df.index).groupby(
+        df['max_wind_sector'].astype(int) * len(wind.SPEED_LABELS) + speed_class).sum()
+    totals = roses[0].sum(axis=(0, 1))
+    assert {bucket: count for bucket, count in enumerate(totals) if count} == naive.to_dict()
+
+
+def test_completeness_counts_widened_codes_as_codes():
+    df = _frame(np.int32)
+    counts = completeness.count_frame(df)
+    missing = (df['max_wind_sector'] == wind.MISSING).sum()
+    direction = counts[counts['variabel'] == 'arah_angin_max']
+    assert direction['jumlah_kosong'].sum() == missing
+    assert direction['jumlah_terukur'].sum() == len(df) - missing
@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+
+from weather import duck
+
+
+def grouped_moving_averages(df, date_col, group_col, value_col, windows, ewm_span=None):
+    """Centered rolling means per group for several windows in one pass.
+
+    Returns one row per input row, ordered by group and date, with a MA_<n>
+    column per window and an optional EWM_<span> exponential smoothing column.
+    """
+    ordered = (df[[group_col, date_col, value_col]]
+               .sort_values([group_col, date_col], kind='stable')
+               .reset_index(drop=True))
+    grouped = ordered.groupby(group_col, sort=False, observed=True)[value_col]
+
+    for window in windows:
+        rolled = grouped.rolling(window=window, center=True).mean()
+        ordered[f'MA_{window}'] = rolled.reset_index(level=0, drop=True)
+
+    if ewm_span:
+        smoothed = grouped.ewm(span=ewm_span, ignore_na=True).mean()
+        ordered[f'EWM_{ewm_span}'] = smoothed.reset_index(level=0, drop=True)
+
+    return ordered
+
+
+# West Java seasons by month number, in the order the dashboards show them
+SEASONS = ('dry', 'transition_to_rainy', 'rainy', 'transition_to_dry')
+SEASON_OF_MONTH = {
+    12: 'rainy', 1: 'rainy', 2: 'rainy',
+    3: 'transition_to_dry', 4: 'transition_to_dry', 5: 'transition_to_dry',
+    6: 'dry', 7: 'dry', 8: 'dry',
+    9: 'transition_to_rainy', 10: 'transition_to_rainy', 11: 'transition_to_rainy',
+}
+
+# SEASONS index of each month, January first
+SEASON_CODES = np.array([SEASONS.index(SEASON_OF_MONTH[month]) for month in range(1, 13)], dtype=np.int8)
+
+# Columns and statistics of the regional statistics table
+REGIONAL_STATISTICS = {
+    'rainfall_clean': ['count', 'mean', 'max'],
+    'suhu_rata': ['mean', 'min', 'max'],
+    'kelembaban_rata': ['mean', 'min', 'max'],
+    'kecepatan_angin_rata': ['mean', 'max'],
+}
+
+
+def monthly_pivot(df, value_col, group_col, month_col='bulan', aggfunc='mean'):
+    """value_col aggregated per group (rows) and month number 1-12 (columns)"""
+    if duck.AGGREGATION_BACKEND == 'duckdb':
+        return duck.pivot(df, value_col, group_col, month_col, aggfunc)
+    return df.pivot_table(
+        values=value_col,
+        index=group_col,
+        columns=month_col,
+        aggfunc=aggfunc,
+        fill_value=0
+    ).round(2).sort_index(axis=1)
+
+
+def regional_statistics(df, group_col, rainfall_col='rainfall_clean'):
+    """Count, mean, min and max of the main variables per group.
+
+    Result columns are named <column>_<statistic> after REGIONAL_STATISTICS,
+    also when the dashboard's rainfall column has another name.
+    """
+    spec = {(rainfall_col if column == 'rainfall_clean' else column): stats
+            for column, stats in REGIONAL_STATISTICS.items()}
+    names = [f'{column}_{stat}' for column, stats in REGIONAL_STATISTICS.items() for stat in stats]
+    if duck.AGGREGATION_BACKEND == 'duckdb':
+        aggregates = dict(zip(names, [(column, stat) for column, stats in spec.items() for stat in stats]))
+        return duck.group_aggregate(df, [group_col], aggregates).set_index(group_col).sort_index().round(2)
+    stats = df.groupby(group_col, observed=True).agg(spec).round(2)
+    stats.columns = names
+    return stats
+
+
+def seasonal_pivot(df, value_col, group_col, season_col='musim'):
+    """Mean of value_col per group (rows) and season (columns, in SEASONS order).
+
+    season_col holds the DimWaktu season codes, indexes into SEASONS.
+    """
+    if duck.AGGREGATION_BACKEND == 'duckdb':
+        pivot = duck.pivot(df, value_col, group_col, season_col)
+    else:
+        pivot = df.pivot_table(
+            values=value_col,
+            index=group_col,
+            columns=season_col,
+            aggfunc='mean',
+            fill_value=0
+        ).round(2)
+    pivot = pivot.sort_index(axis=1)
+    pivot.columns = pd.Index([SEASONS[code] for code in pivot.columns], name='season')
+    return pivot
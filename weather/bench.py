@@ -0,0 +1,286 @@
+import argparse
+import functools
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from weather import (aggregations, charts, climatology, completeness, cube, data, distributions, extremes, gapfill,
+                     sketches, wind)
+
+# Benchmarks of the dashboard data functions on synthetic frames, without Streamlit:
+#   python -m weather.bench --save                 # record the baseline on this machine
+#   python -m weather.bench                        # compare, exit 1 on a regression
+#   python -m weather.bench --sizes 5x1,100x10 --only clean_weather_data,pivot_table_tab
+
+# Stations and years of the synthetic data, from the current five stations to a national network
+STATIONS = (5, 100, 1000)
+YEARS = (1, 10, 30)
+
+BASELINE_PATH = os.getenv('WEATHER_BENCH_BASELINE', 'bench_baseline.json')
+
+# Allowed slowdown and peak-memory growth over the baseline before a benchmark fails
+TIME_TOLERANCE = float(os.getenv('WEATHER_BENCH_TOLERANCE', '0.25'))
+MEMORY_TOLERANCE = float(os.getenv('WEATHER_BENCH_MEMORY_TOLERANCE', '0.10'))
+
+# Differences below these are noise, whatever the relative change
+MIN_SECONDS = 0.005
+MIN_MEGABYTES = 1.0
+
+# Text values the BMKG files use for wind directions
+_DIRECTIONS = np.array(['N', 'NE', 'E', 'SE', 'S', 'SW', 'W', 'NW', 'C', '90', '180', '270', '360', '8888', None],
+                       dtype=object)
+
+
+def synthetic_frame(stations, years, seed=0):
+    """Raw rows shaped like the WEATHER_QUERY result, ordered by date and location.
+
+    Rainfall is dry on about 60% of days and gamma distributed otherwise;
+    about 3% of the values are BMKG's 8888/9999 sentinels and 2% are empty.
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(f'{2025 - years}-01-01', '2024-12-31', freq='D')
+    rows = len(dates) * stations
+    station = np.tile(np.arange(stations), len(dates))
+    date = np.repeat(dates.to_numpy(), stations)
+    season = np.cos(2 * np.pi * np.repeat(dates.dayofyear.to_numpy(), stations) / 365.25)
+
+    rainfall = np.where(rng.random(rows) < 0.6, 0.0, rng.gamma(0.8, 15 + 10 * season)).round(1)
+    status = rng.random(rows)
+    rainfall[status < 0.015] = 8888
+    rainfall[(status >= 0.015) & (status < 0.03)] = 9999
+    rainfall[(status >= 0.03) & (status < 0.05)] = np.nan
+
+    def measured(mean, spread):
+        values = (mean + spread * rng.standard_normal(rows)).round(1)
+        values[rng.random(rows) < 0.02] = np.nan
+        return values
+
+    locations = np.array([f'Stasiun {i:04d}' for i in range(stations)], dtype=object)
+    kinds = np.array(['Kota', 'Kabupaten'], dtype=object)
+    month = pd.DatetimeIndex(date).month.to_numpy()
+    month_names = pd.date_range('2024-01-01', periods=12, freq='MS').month_name().to_numpy(dtype=object)
+    suhu_min = measured(22, 1.5)
+    frame = pd.DataFrame({
+        'fact_id': np.arange(1, rows + 1),
+        'waktu_id': np.repeat(np.arange(1, len(dates) + 1), stations),
+        'lokasi_id': station + 1,
+        'curah_hujan': rainfall,
+        'suhu_min': suhu_min,
+        'suhu_max': suhu_min + measured(9, 1.5),
+        'suhu_rata': suhu_min + measured(4.5, 1),
+        'kelembaban_rata': measured(80, 8).clip(30, 100),
+        'lama_penyinaran': measured(5, 3).clip(0, 12),
+        'kecepatan_angin_max': measured(5, 2).clip(0, None),
+        'arah_angin_max': _DIRECTIONS[rng.integers(0, len(_DIRECTIONS), rows)],
+        'kecepatan_angin_rata': measured(2, 1).clip(0, None),
+        'arah_angin_terbanyak': _DIRECTIONS[rng.integers(0, len(_DIRECTIONS), rows)],
+        'tanggal': date,
+        'bulan': month,
+        'tahun': pd.DatetimeIndex(date).year.to_numpy(),
+        'nama_bulan': month_names[month - 1],
+        **data.calendar_columns(date),
+        'nama_lokasi': locations[station],
+        'jenis_lokasi': kinds[station % 2],
+    })
+    frame['nama_stasiun'] = frame['nama_lokasi']
+    return frame
+
+
+class Frames:
+    """Synthetic inputs of one size, each built on first use"""
+
+    def __init__(self, stations, years):
+        self.stations = stations
+        self.years = years
+
+    @functools.cached_property
+    def raw(self):
+        return synthetic_frame(self.stations, self.years)
+
+    @functools.cached_property
+    def clean(self):
+        return data.clean_weather_data(self.raw.copy())
+
+    @functools.cached_property
+    def filtered(self):
+        """Every station from the 10th of the first month to the 20th of the last, like a sidebar date filter"""
+        dates = self.clean['date']
+        start = dates.min() + pd.Timedelta(days=9)
+        end = dates.max() - pd.Timedelta(days=11)
+        return self.clean[(dates >= start) & (dates <= end)].copy()
+
+    @functools.cached_property
+    def normals(self):
+        normals = climatology.Climatology()
+        normals.update(self.clean)
+        return normals
+
+    @functools.cached_property
+    def cube(self):
+        return cube.AggregateCube.from_frame(self.clean)
+
+
+def _pivot_table_tab(selected):
+    """The four pivot modes of pivot_table_tab"""
+    selected.pivot('rainfall_clean', 'location', 'month', 'mean')
+    selected.table('location', aggregations.REGIONAL_STATISTICS)
+    selected.pivot('suhu_rata', 'location', 'season')
+    selected.pivot('rainfall_clean', 'year', 'level', 'std')
+
+
+# Each benchmark prepares its input from Frames outside the timed call and returns the call
+BENCHMARKS = {
+    'clean_weather_data': lambda frames: functools.partial(data.clean_weather_data, frames.raw.copy()),
+    'rainfall_levels': lambda frames: functools.partial(data.rainfall_levels, frames.clean['rainfall_clean'].to_numpy()),
+    'label_view': lambda frames: functools.partial(
+        data.label_view, frames.clean, {'rainfall_clean': 'curah_hujan_clean'},
+        {'rainfall_category': ('rainfall_level', data.RAINFALL_LEVELS)}),
+    'moving_averages': lambda frames: functools.partial(
+        aggregations.grouped_moving_averages, frames.filtered, 'date', 'location_full', 'rainfall_clean', (7, 30), 30),
+    'monthly_pivot': lambda frames: functools.partial(
+        aggregations.monthly_pivot, frames.filtered, 'rainfall_clean', 'location_full'),
+    'regional_statistics': lambda frames: functools.partial(
+        aggregations.regional_statistics, frames.filtered, 'location_full'),
+    'seasonal_pivot': lambda frames: functools.partial(
+        aggregations.seasonal_pivot, frames.filtered, 'rainfall_clean', 'location_full'),
+    'completeness_counts': lambda frames: functools.partial(completeness.count_frame, frames.clean),
+    'climatology_update': lambda frames: functools.partial(climatology.Climatology().update, frames.clean),
+    'sketch_update': lambda frames: functools.partial(sketches.RainfallSketches().update, frames.clean),
+    'wind_rose_update': lambda frames: functools.partial(
+        wind.WindRoses(wind.SECTOR_COLUMNS['arah_angin_max'], 'kecepatan_angin_max').update, frames.clean),
+    'gap_fill_update': lambda frames: functools.partial(gapfill.GapFiller(normals=frames.normals).update, frames.clean),
+    'extreme_indices': lambda frames: functools.partial(extremes.ExtremeIndices().compute, frames.filtered),
+    'column_summaries': lambda frames: functools.partial(
+        distributions.summarize_columns, frames.filtered, ['suhu_min', 'suhu_max', 'suhu_rata']),
+    'group_summaries': lambda frames: functools.partial(
+        distributions.summarize_groups, frames.filtered, 'rainfall_clean', 'location_full'),
+    'density_grid': lambda frames: functools.partial(
+        charts.density_grid, frames.filtered, 'suhu_rata', 'kelembaban_rata', group='location_full'),
+    'cube_build': lambda frames: functools.partial(cube.AggregateCube.from_frame, frames.clean),
+    'cube_select': lambda frames: functools.partial(frames.cube.select, frames.filtered),
+    'pivot_table_tab': lambda frames: functools.partial(_pivot_table_tab, frames.cube.select(frames.filtered)),
+}
+
+
+def measure(prepare, frames, repeat=3):
+    """(best seconds of repeat calls, peak traced megabytes of one more call)"""
+    best = float('inf')
+    for _ in range(repeat):
+        call = prepare(frames)
+        gc.collect()
+        start = time.perf_counter()
+        call()
+        best = min(best, time.perf_counter() - start)
+
+    # Measured separately, as tracing slows the call down
+    call = prepare(frames)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        call()
+        peak = tracemalloc.get_traced_memory()[1] - before
+    finally:
+        tracemalloc.stop()
+    return best, peak / 1e6
+
+
+def regressions(result, baseline, time_tolerance=TIME_TOLERANCE, memory_tolerance=MEMORY_TOLERANCE):
+    """Messages for the measurements of result that exceed the baseline beyond the tolerances"""
+    if baseline is None:
+        return []
+    found = []
+    if (result['seconds'] > baseline['seconds'] * (1 + time_tolerance)
+            and result['seconds'] - baseline['seconds'] > MIN_SECONDS):
+        found.append(f"time {baseline['seconds']:.4f}s -> {result['seconds']:.4f}s")
+    if (result['peak_mb'] > baseline['peak_mb'] * (1 + memory_tolerance)
+            and result['peak_mb'] - baseline['peak_mb'] > MIN_MEGABYTES):
+        found.append(f"memory {baseline['peak_mb']:.1f}MB -> {result['peak_mb']:.1f}MB")
+    return found
+
+
+def load_baseline(path=BASELINE_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_baseline(results, path=BASELINE_PATH):
+    """Merge results into the baseline file, keeping entries that were not run"""
+    baseline = load_baseline(path)
+    baseline.setdefault('results', {}).update(results)
+    baseline['environment'] = {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'cpus': os.cpu_count(),
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+
+
+def parse_sizes(text):
+    """'5x1,100x10' -> [(5, 1), (100, 10)]"""
+    return [tuple(int(part) for part in size.split('x')) for size in text.split(',') if size]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the dashboard data functions on synthetic data")
+    parser.add_argument('--sizes', type=parse_sizes,
+                        default=[(stations, years) for stations in STATIONS for years in YEARS],
+                        help="stations x years, e.g. 5x1,100x10 (default: every combination of 5, 100, "
+                             "1000 stations and 1, 10, 30 years)")
+    parser.add_argument('--only', help="comma-separated benchmark names")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--tolerance', type=float, default=TIME_TOLERANCE, help="allowed relative slowdown")
+    parser.add_argument('--memory-tolerance', type=float, default=MEMORY_TOLERANCE,
+                        help="allowed relative peak-memory growth")
+    parser.add_argument('--save', action='store_true', help="store the results as the new baseline")
+    args = parser.parse_args()
+
+    names = args.only.split(',') if args.only else list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+
+    baseline = load_baseline(args.baseline).get('results', {})
+    results, failures = {}, []
+    for stations, years in args.sizes:
+        frames = Frames(stations, years)
+        print(f"== {stations} stations x {years} years ({len(frames.raw):,} rows)")
+        for name in names:
+            key = f'{name}@{stations}x{years}'
+            seconds, peak_mb = measure(BENCHMARKS[name], frames, args.repeat)
+            results[key] = {'seconds': round(seconds, 6), 'peak_mb': round(peak_mb, 3), 'rows': len(frames.raw)}
+            found = regressions(results[key], baseline.get(key), args.tolerance, args.memory_tolerance)
+            failures += [f'{key}: {message}' for message in found]
+            previous = baseline.get(key)
+            change = f"{seconds / previous['seconds'] - 1:+.0%}" if previous and previous['seconds'] else 'new'
+            print(f"  {name:<22} {seconds * 1000:>10.1f} ms {peak_mb:>9.1f} MB  {change:>6}"
+                  f"{'  REGRESSION' if found else ''}")
+        del frames
+        gc.collect()
+
+    if args.save:
+        save_baseline(results, args.baseline)
+        print(f"Baseline saved to {args.baseline}")
+    elif failures:
+        print(f"\n{len(failures)} regression(s) beyond the tolerance:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
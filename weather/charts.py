@@ -0,0 +1,135 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# Default plot width in pixels when the browser width is unknown
+DEFAULT_VIEWPORT_PX = 1200
+
+# Above this many points per figure, traces are drawn with WebGL
+WEBGL_POINT_THRESHOLD = 5000
+
+# Above this many points a scatter plot is replaced by a binned density view
+SCATTER_POINT_LIMIT = int(os.getenv('SCATTER_POINT_LIMIT', '20000'))
+
+
+def points_for_viewport(width_px=DEFAULT_VIEWPORT_PX):
+    """Return how many points per series are worth sending for a plot width"""
+    # One min/max pair per two pixels is visually lossless for a line chart
+    return max(100, int(width_px))
+
+
+def render_mode_for(n_points):
+    """Pick the Plotly Express render mode for a figure with n_points"""
+    return 'webgl' if n_points > WEBGL_POINT_THRESHOLD else 'auto'
+
+
+def clip_to_window(df, x, window):
+    """Keep rows whose x value lies inside the (start, end) zoom window"""
+    if window is None:
+        return df
+    start, end = pd.to_datetime(window[0]), pd.to_datetime(window[1])
+    return df[(df[x] >= start) & (df[x] <= end)]
+
+
+def lttb_indices(x, y, n_out):
+    """Largest-Triangle-Three-Buckets selection, returns positional indices"""
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    prev = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        next_x = x[end:next_end].mean() if next_end > end else x[-1]
+        next_y = y[end:next_end].mean() if next_end > end else y[-1]
+
+        bucket_x = x[start:end]
+        bucket_y = y[start:end]
+        area = np.abs(
+            (x[prev] - next_x) * (bucket_y - y[prev]) -
+            (x[prev] - bucket_x) * (next_y - y[prev])
+        )
+        prev = start + int(np.argmax(area))
+        selected[i + 1] = prev
+
+    return selected
+
+
+def downsample_series(df, x, y, max_points, group=None, method='minmax'):
+    """Reduce each series in df to at most about max_points points.
+
+    group may be a column name or a list of column names identifying the
+    series. Rows must be in x order within each series. 'minmax' keeps the
+    lowest and highest value of each bucket so spikes survive; 'lttb' keeps
+    the points that best preserve the visual shape of the line.
+    """
+    df = df[df[y].notna()].reset_index(drop=True)
+    if df.empty:
+        return df
+
+    group_cols = [group] if isinstance(group, str) else list(group or [])
+    keys = [df[col].values for col in group_cols] or [np.zeros(len(df), dtype=np.int8)]
+
+    if method == 'lttb':
+        x_values = df[x].values.astype('int64')
+        y_values = df[y].values
+        pieces = []
+        for positions in df.groupby(keys, sort=False).indices.values():
+            keep = lttb_indices(x_values[positions], y_values[positions], max_points)
+            pieces.append(positions[keep])
+        return df.iloc[np.sort(np.concatenate(pieces))]
+
+    grouped = df.groupby(keys, sort=False)
+    position = grouped.cumcount().values
+    size = grouped[y].transform('size').values
+    n_buckets = max(1, max_points // 2)
+    bucket = position * n_buckets // size
+
+    buckets = df[y].groupby(keys + [bucket], sort=False)
+    keep = np.union1d(buckets.idxmin().values, buckets.idxmax().values)
+    return df.loc[keep]
+
+
+def density_grid(df, x, y, group=None, bins=60):
+    """Count points on a shared 2D grid, overall and per group.
+
+    Returns a dict with the bin centres ('x', 'y'), the overall counts
+    ('total', shaped rows=y by columns=x) and a {group: counts} mapping
+    ('groups'). All groups are binned in a single bincount pass.
+    """
+    data = df[[x, y] + ([group] if group else [])].dropna(subset=[x, y])
+    x_values = data[x].to_numpy(dtype='float64')
+    y_values = data[y].to_numpy(dtype='float64')
+
+    x_edges = np.histogram_bin_edges(x_values, bins=bins)
+    y_edges = np.histogram_bin_edges(y_values, bins=bins)
+    n_x, n_y = len(x_edges) - 1, len(y_edges) - 1
+
+    x_bin = np.clip(np.searchsorted(x_edges, x_values, side='right') - 1, 0, n_x - 1)
+    y_bin = np.clip(np.searchsorted(y_edges, y_values, side='right') - 1, 0, n_y - 1)
+    cell = y_bin * n_x + x_bin
+
+    if group:
+        codes, names = pd.factorize(data[group], sort=True)
+    else:
+        codes, names = np.zeros(len(cell), dtype=np.int64), []
+    n_groups = max(1, len(names))
+
+    counts = np.bincount(codes * (n_x * n_y) + cell, minlength=n_groups * n_x * n_y)
+    counts = counts.reshape(n_groups, n_y, n_x)
+
+    return {
+        'x': (x_edges[:-1] + x_edges[1:]) / 2,
+        'y': (y_edges[:-1] + y_edges[1:]) / 2,
+        'total': counts.sum(axis=0),
+        'groups': {name: counts[i] for i, name in enumerate(names)},
+    }
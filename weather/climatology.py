@@ -0,0 +1,181 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from weather import perf
+
+# Variables with daily normals, by their shared (English) column names
+VARIABLES = ('rainfall_clean', 'suhu_min', 'suhu_max', 'suhu_rata', 'kelembaban_rata',
+             'kecepatan_angin_rata', 'lama_penyinaran')
+
+# Normals are averaged over a centred window of this many days of year, wrapping at New Year
+SMOOTHING_DAYS = 31
+
+# Fewer observations than this in the window leaves the normal undefined
+MIN_OBSERVATIONS = 10
+
+DAYS = 366
+
+# First day-of-year index of each month in a leap year, so 29 February has its own slot
+_MONTH_START = np.array([0, 31, 60, 91, 121, 152, 182, 213, 244, 274, 305, 335])
+
+
+def day_of_year(dates):
+    """0-365 index of each date, with 1 March always at 60"""
+    dates = pd.DatetimeIndex(dates)
+    return _MONTH_START[dates.month.to_numpy() - 1] + dates.day.to_numpy() - 1
+
+
+def _fingerprints(stations, hashes, rows=None):
+    """Order-independent sum of the row hashes of each station, over the selected rows"""
+    codes, names = pd.factorize(stations)
+    if rows is not None:
+        codes, hashes = codes[rows], hashes[rows]
+    sums = np.zeros(len(names), dtype=np.uint64)
+    np.add.at(sums, codes, hashes)
+    return {name: int(total) for name, total, count in zip(names, sums, np.bincount(codes, minlength=len(names)))
+            if count}
+
+
+def _circular_window_sum(values, window):
+    """Sum over a centred window along axis 1, wrapping from 31 December to 1 January"""
+    half = window // 2
+    padded = np.concatenate([values[:, -half:], values, values[:, :half]], axis=1)
+    cumulative = np.cumsum(padded, axis=1)
+    cumulative = np.concatenate([np.zeros_like(cumulative[:, :1]), cumulative], axis=1)
+    return cumulative[:, window:] - cumulative[:, :-window]
+
+
+class Climatology:
+    """Day-of-year normals per station, maintained from running sums.
+
+    The state is a count, sum and sum of squares for every (station, day of
+    year, variable), so its size does not grow with the number of years and
+    update() only accumulates the days it has not seen yet. A fingerprint of
+    each station's rows tells update() when days it has already seen were
+    changed, and only those stations are recounted.
+    """
+
+    def __init__(self, variables=VARIABLES, window=SMOOTHING_DAYS, min_observations=MIN_OBSERVATIONS):
+        self.variables = tuple(variables)
+        self.window = window
+        self.min_observations = min_observations
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        shape = (0, DAYS, len(self.variables))
+        self.stations = {}
+        self.version = None
+        self._last_date = {}
+        self._fingerprint = {}
+        self._count = np.zeros(shape)
+        self._sum = np.zeros(shape)
+        self._sum_squares = np.zeros(shape)
+        self._smoothed = None
+
+    def update(self, df, version=None, station_col='location_full', date_col='date'):
+        """Add the rows of df that are newer than each station's last seen date.
+
+        Nothing is done when version (see data.get_data_version) is the one
+        already counted. A station whose rows up to its last seen date have
+        changed, e.g. by an UPDATE of old values, is recounted from df; when a
+        station's data now ends earlier than before, the source has been
+        replaced and the sums are rebuilt from df.
+        """
+        with self._lock, perf.monitor.timed('climatology', 'update'):
+            if version is not None and version == self.version:
+                return
+            last_dates = df.groupby(station_col, observed=True)[date_col].max()
+            if any(last_dates.get(station, self._last_date[station]) < self._last_date[station]
+                   for station in self._last_date):
+                self.reset()
+
+            seen_until = pd.to_datetime(df[station_col].map(self._last_date))
+            # Unknown stations map to NaT, which never compares as already seen
+            seen = (df[date_col] <= seen_until).to_numpy()
+            hashes = pd.util.hash_pandas_object(df[[date_col, *self.variables]], index=False).to_numpy()
+            changed = [station for station, fingerprint in _fingerprints(df[station_col], hashes, seen).items()
+                       if fingerprint != self._fingerprint[station]]
+            if changed:
+                self._forget(changed)
+                seen = seen & ~df[station_col].isin(changed).to_numpy()
+
+            new_rows = df[~seen]
+            if len(new_rows):
+                self._accumulate(new_rows, station_col, date_col)
+            self._last_date.update(last_dates.to_dict())
+            self._fingerprint.update(_fingerprints(df[station_col], hashes))
+            self.version = version
+
+    def _forget(self, stations):
+        """Zero the sums of stations so all their rows are counted again"""
+        rows = [self.stations[station] for station in stations]
+        self._count[rows] = self._sum[rows] = self._sum_squares[rows] = 0
+        for station in stations:
+            del self._last_date[station]
+        self._smoothed = None
+
+    def _accumulate(self, df, station_col, date_col):
+        for station in pd.unique(df[station_col]):
+            if station not in self.stations:
+                self.stations[station] = len(self.stations)
+        grow = len(self.stations) - len(self._count)
+        if grow:
+            padding = np.zeros((grow, DAYS, len(self.variables)))
+            self._count = np.concatenate([self._count, padding])
+            self._sum = np.concatenate([self._sum, padding])
+            self._sum_squares = np.concatenate([self._sum_squares, padding])
+
+        slots = df[station_col].map(self.stations).to_numpy(dtype=np.int64) * DAYS + day_of_year(df[date_col])
+        size = len(self.stations) * DAYS
+        for i, variable in enumerate(self.variables):
+            values = pd.to_numeric(df[variable], errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+            valid = ~np.isnan(values)
+            self._count[:, :, i] += np.bincount(slots[valid], minlength=size).reshape(-1, DAYS)
+            self._sum[:, :, i] += np.bincount(slots[valid], weights=values[valid], minlength=size).reshape(-1, DAYS)
+            self._sum_squares[:, :, i] += np.bincount(slots[valid], weights=values[valid] ** 2,
+                                                      minlength=size).reshape(-1, DAYS)
+        self._smoothed = None
+
+    def normals(self):
+        """(mean, std) arrays of shape (stations, 366, variables), smoothed; NaN where data is too sparse"""
+        with self._lock:
+            if self._smoothed is None:
+                count = _circular_window_sum(self._count, self.window)
+                total = _circular_window_sum(self._sum, self.window)
+                squares = _circular_window_sum(self._sum_squares, self.window)
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    mean = np.where(count >= self.min_observations, total / count, np.nan)
+                    std = np.sqrt(np.maximum(squares / count - mean ** 2, 0))
+                self._smoothed = (mean, std)
+            return self._smoothed
+
+    def anomalies(self, df, columns, station_col='location_full', date_col='date'):
+        """<column>_normal and <column>_anomaly columns for df, aligned to its index.
+
+        columns maps each column of df to its climatology variable, so views
+        with renamed columns can use the shared normals.
+        """
+        mean, _ = self.normals()
+        stations = df[station_col].map(self.stations)
+        known = stations.notna().to_numpy()
+        station_index = stations.fillna(0).to_numpy(dtype=np.int64)
+        days = day_of_year(df[date_col])
+
+        result = {}
+        for column, variable in columns.items():
+            if len(mean):
+                normal = mean[station_index, days, self.variables.index(variable)]
+                normal = np.where(known, normal, np.nan)
+            else:
+                normal = np.full(len(df), np.nan)
+            values = pd.to_numeric(df[column], errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+            result[f'{column}_normal'] = normal
+            result[f'{column}_anomaly'] = values - normal
+        return pd.DataFrame(result, index=df.index)
+
+
+# Updated by data.load_weather_data, shared by every session of the process
+normals = Climatology()
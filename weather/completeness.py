@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+
+from weather import wind
+
+# FactDataIklim columns with completeness counters
+VARIABLES = ('curah_hujan', 'suhu_min', 'suhu_max', 'suhu_rata', 'kelembaban_rata', 'lama_penyinaran',
+             'kecepatan_angin_max', 'arah_angin_max', 'kecepatan_angin_rata', 'arah_angin_terbanyak')
+
+# Counter columns of KelengkapanData: measured values, BMKG's 8888 (not
+# measurable) and 9999 (no measurement) sentinels, and empty cells
+STATUSES = ('jumlah_terukur', 'jumlah_8888', 'jumlah_9999', 'jumlah_kosong')
+
+COLUMNS = ['location_full', 'tahun', 'bulan', 'variabel'] + list(STATUSES)
+
+# KelengkapanData is maintained by Scripts/DBInput.py
+COUNTS_QUERY = """
+SELECT
+    CONCAT(l.nama_lokasi, ' (', l.jenis_lokasi, ')') AS location_full,
+    k.tahun,
+    k.bulan,
+    k.variabel,
+    k.jumlah_terukur,
+    k.jumlah_8888,
+    k.jumlah_9999,
+    k.jumlah_kosong
+FROM KelengkapanData k
+JOIN DimLokasi l ON k.lokasi_id = l.lokasi_id
+"""
+
+
+def status_codes(values):
+    """Index into STATUSES for each raw value, numeric or text like the wind directions"""
+    values = pd.Series(values)
+    numeric = pd.to_numeric(values, errors='coerce')
+    empty = values.isna() | values.astype('string').str.strip().isin(['', '-']).fillna(True)
+    return np.select([numeric == 8888, numeric == 9999, empty], [1, 2, 3], default=0).astype(np.int8)
+
+
+def count_frame(df, station_col='location_full', date_col='date'):
+    """KelengkapanData counters computed from a loaded frame, for sources without the table"""
+    dates = pd.DatetimeIndex(df[date_col])
+    keys = pd.DataFrame({'location_full': df[station_col].to_numpy(),
+                         'tahun': dates.year.to_numpy(), 'bulan': dates.month.to_numpy()})
+    parts = []
+    for variable in VARIABLES:
+        if wind.SECTOR_COLUMNS.get(variable) in df:
+            # Sector codes from the loader; sentinels were already folded into MISSING
+            codes = np.where(df[wind.SECTOR_COLUMNS[variable]].to_numpy() == wind.MISSING, 3, 0)
+        elif variable in df:
+            codes = status_codes(df[variable].reset_index(drop=True))
+        else:
+            continue
+        flags = keys.assign(**{status: (codes == i).astype(np.int64) for i, status in enumerate(STATUSES)})
+        counts = flags.groupby(['location_full', 'tahun', 'bulan'], sort=False)[list(STATUSES)].sum().reset_index()
+        parts.append(counts.assign(variabel=variable))
+    if not parts:
+        return pd.DataFrame(columns=COLUMNS)
+    return pd.concat(parts, ignore_index=True)[COLUMNS]
+
+
+def select(counts, locations, start, end):
+    """Counters of the given locations for every month overlapping start..end"""
+    month = counts['tahun'] * 12 + counts['bulan'] - 1
+    first, last = start.year * 12 + start.month - 1, end.year * 12 + end.month - 1
+    return counts[counts['location_full'].isin(list(locations)) & month.between(first, last)]
+
+
+def shares(counts, by):
+    """Percentage of values in each status, with the counters summed per `by`"""
+    totals = counts.groupby(by)[list(STATUSES)].sum()
+    return totals.div(totals.sum(axis=1).replace(0, np.nan), axis=0) * 100
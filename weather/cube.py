@@ -0,0 +1,218 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from weather import aggregations, perf
+
+# Variables held by the cube: every value the pivot tables offer
+VARIABLES = ('rainfall_clean', 'suhu_min', 'suhu_max', 'suhu_rata', 'kelembaban_rata', 'kecepatan_angin_rata')
+
+# Number of rainfall_level codes (data.RAINFALL_LEVELS)
+LEVELS = 6
+
+# Pivot dimensions and the cube axis each one groups; season groups the months by aggregations.SEASON_CODES
+DIMENSIONS = {'location': 0, 'year': 1, 'month': 2, 'season': 2, 'level': 3}
+
+AGGREGATES = ('count', 'sum', 'mean', 'std', 'min', 'max')
+
+
+def _month_ordinals(df):
+    """tahun * 12 + bulan - 1 of each row, from the DimWaktu calendar column"""
+    return df['urutan_bulan'].to_numpy().astype(np.int64)
+
+
+def _statistic(aggfunc, count, total, squares, minimum, maximum):
+    """aggfunc of groups from their merged count, sum, sum of squares, min and max"""
+    if aggfunc not in AGGREGATES:
+        raise ValueError(f"aggfunc must be one of {', '.join(AGGREGATES)}")
+    with np.errstate(invalid='ignore', divide='ignore'):
+        if aggfunc == 'count':
+            return count.astype('float64')
+        if aggfunc == 'sum':
+            return total
+        if aggfunc == 'mean':
+            return total / count
+        if aggfunc == 'std':
+            # Sample standard deviation, like pandas
+            variance = np.maximum(squares - total ** 2 / count, 0) / (count - 1)
+            return np.where(count > 1, np.sqrt(variance), np.nan)
+        return np.where(count > 0, minimum if aggfunc == 'min' else maximum, np.nan)
+
+
+class AggregateCube:
+    """count, sum, sum of squares, min and max per (variable, location, year, month, rainfall level).
+
+    All five merge across cells, so any pivot of the dashboards, standard
+    deviation included, is a reduction of a few thousand cells instead of a
+    pass over the daily rows.
+    """
+
+    def __init__(self, stations, first_year, years):
+        self.stations = list(stations)
+        self.first_year = first_year
+        shape = (len(VARIABLES), len(self.stations), years, 12, LEVELS)
+        self.count = np.zeros(shape, dtype=np.int64)
+        self.total = np.zeros(shape)
+        self.squares = np.zeros(shape)
+        self.minimum = np.full(shape, np.inf)
+        self.maximum = np.full(shape, -np.inf)
+
+    @classmethod
+    def from_frame(cls, df, station_col='location_full', columns=None):
+        """Cube of every row of df; columns maps variables to df's names where a view renamed them"""
+        if df.empty:
+            return cls([], 0, 0)
+        months = _month_ordinals(df)
+        first_year = int(months.min()) // 12
+        cube = cls(sorted(pd.unique(df[station_col])), first_year, int(months.max()) // 12 - first_year + 1)
+        cube._add(df, station_col, months, columns)
+        return cube
+
+    def _arrays(self):
+        return self.count, self.total, self.squares, self.minimum, self.maximum
+
+    def _add(self, df, station_col, months, columns):
+        """Accumulate the rows of df, whose stations and months must be inside the cube"""
+        station = pd.Index(self.stations).get_indexer(df[station_col].to_numpy())
+        month = months - self.first_year * 12
+        cell = ((station * self.count.shape[2] * 12 + month) * LEVELS
+                + df['rainfall_level'].to_numpy().astype(np.int64))
+        shape = self.count.shape[1:]
+        cells = self.count[0].size
+        for i, variable in enumerate(VARIABLES):
+            column = (columns or {}).get(variable, variable)
+            values = pd.to_numeric(df[column], errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+            valid = ~np.isnan(values)
+            slot, x = cell[valid], values[valid]
+            self.count[i] += np.bincount(slot, minlength=cells).reshape(shape)
+            self.total[i] += np.bincount(slot, x, cells).reshape(shape)
+            self.squares[i] += np.bincount(slot, x * x, cells).reshape(shape)
+            np.minimum.at(self.minimum[i].reshape(-1), slot, x)
+            np.maximum.at(self.maximum[i].reshape(-1), slot, x)
+
+    def select(self, df, station_col='location_full', columns=None):
+        """Cube of the rows of a filtered frame.
+
+        Whole months inside df's date range are copied from this cube; only
+        the rows of the first and last month, which a date filter may cut,
+        and of stations this cube does not have are accumulated from df.
+        """
+        if df.empty:
+            return AggregateCube([], 0, 0)
+        months = _month_ordinals(df)
+        low, high = int(months.min()), int(months.max())
+        selected = AggregateCube(sorted(pd.unique(df[station_col])), low // 12, high // 12 - low // 12 + 1)
+
+        known = df[station_col].isin(self.stations).to_numpy()
+        start = max(low + 1, self.first_year * 12)
+        stop = min(high, (self.first_year + self.count.shape[2]) * 12)
+        if start < stop:
+            rows = pd.Index(self.stations).get_indexer(selected.stations)
+            present = rows >= 0
+            for source, target in zip(self._arrays(), selected._arrays()):
+                # (variable, station, month ordinal, level) views of both cubes
+                source = source.reshape(source.shape[0], source.shape[1], -1, LEVELS)
+                target = target.reshape(target.shape[0], target.shape[1], -1, LEVELS)
+                target[:, present, start - selected.first_year * 12:stop - selected.first_year * 12] = \
+                    source[:, rows[present], start - self.first_year * 12:stop - self.first_year * 12]
+
+        direct = ~known | (months == low) | (months == high)
+        selected._add(df[direct], station_col, months[direct], columns)
+        return selected
+
+    def _groups(self, dimension):
+        """(group code of every cell, key of every group) for a pivot dimension"""
+        if dimension not in DIMENSIONS:
+            raise ValueError(f"dimension must be one of {', '.join(DIMENSIONS)}")
+        shape = self.count.shape[1:]
+        axis = DIMENSIONS[dimension]
+        if dimension == 'location':
+            keys = self.stations
+        elif dimension == 'year':
+            keys = list(range(self.first_year, self.first_year + shape[1]))
+        elif dimension == 'month':
+            keys = list(range(1, 13))
+        elif dimension == 'season':
+            keys = list(range(len(aggregations.SEASONS)))
+        else:
+            keys = list(range(LEVELS))
+        codes = aggregations.SEASON_CODES.astype(np.int64) if dimension == 'season' else np.arange(shape[axis])
+        codes = codes.reshape([-1 if i == axis else 1 for i in range(len(shape))])
+        return np.broadcast_to(codes, shape), keys
+
+    def pivot(self, variable, index, columns=None, aggfunc='mean', labels=None):
+        """aggfunc of variable per index (rows) and columns dimension, like DataFrame.pivot_table.
+
+        index and columns are keys of DIMENSIONS; months are 1-12 and seasons
+        and rainfall levels are codes, which labels can map to names per
+        dimension. Empty rows and columns are dropped; empty cells are 0 for
+        count and sum and NaN for the other statistics. Without columns the
+        result is a Series.
+        """
+        i = VARIABLES.index(variable)
+        rows, row_keys = self._groups(index)
+        if columns is None:
+            cols, col_keys = np.zeros(rows.shape, dtype=np.int64), [variable]
+        else:
+            cols, col_keys = self._groups(columns)
+        group = (rows * len(col_keys) + cols).ravel()
+        size = len(row_keys) * len(col_keys)
+
+        count = np.bincount(group, self.count[i].ravel(), size)
+        total = np.bincount(group, self.total[i].ravel(), size)
+        squares = np.bincount(group, self.squares[i].ravel(), size)
+        minimum, maximum = np.full(size, np.inf), np.full(size, -np.inf)
+        np.minimum.at(minimum, group, self.minimum[i].ravel())
+        np.maximum.at(maximum, group, self.maximum[i].ravel())
+        values = _statistic(aggfunc, count, total, squares, minimum, maximum)
+
+        count = count.reshape(len(row_keys), len(col_keys))
+        keep_rows = count.sum(axis=1) > 0
+        keep_cols = count.sum(axis=0) > 0 if columns else np.ones(1, dtype=bool)
+        labels = labels or {}
+
+        def names(dimension, keys, keep):
+            keys = [key for key, kept in zip(keys, keep) if kept]
+            return pd.Index([labels[dimension][key] for key in keys] if dimension in labels else keys, name=dimension)
+
+        frame = pd.DataFrame(
+            values.reshape(count.shape)[keep_rows][:, keep_cols],
+            index=names(index, row_keys, keep_rows),
+            columns=names(columns, col_keys, keep_cols) if columns else col_keys,
+        )
+        if aggfunc in ('count', 'sum'):
+            frame = frame.fillna(0)
+        return frame if columns else frame[variable]
+
+    def table(self, index, statistics, labels=None):
+        """<variable>_<aggfunc> columns per index dimension, from a mapping of variables to aggfunc lists"""
+        return pd.DataFrame({f'{variable}_{aggfunc}': self.pivot(variable, index, aggfunc=aggfunc, labels=labels)
+                             for variable, aggfuncs in statistics.items() for aggfunc in aggfuncs})
+
+
+class SharedCube:
+    """The cube of the whole loaded frame, rebuilt by update() once per data version"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.version = None
+        self.cube = AggregateCube([], 0, 0)
+
+    def update(self, df, version, station_col='location_full'):
+        with self._lock:
+            if version == self.version:
+                return
+            with perf.monitor.timed('cube', 'build'):
+                # Swapped in whole, so select() never sees a half-built cube
+                self.cube = AggregateCube.from_frame(df, station_col)
+            self.version = version
+
+    def select(self, df, station_col='location_full', columns=None):
+        """Cube of a filtered frame, see AggregateCube.select"""
+        with perf.monitor.timed('cube', 'select'):
+            return self.cube.select(df, station_col, columns)
+
+
+# Updated by data.load_weather_data, shared by every session of the process
+aggregates = SharedCube()
@@ -0,0 +1,302 @@
+import os
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from sqlalchemy import create_engine, text
+
+from weather import aggregations, climatology, completeness, cube, duck, fetch, gapfill, perf, sketches, store, wind
+
+# Sentinel values BMKG uses for "not measured" (8888) and "no data" (9999)
+RAINFALL_MISSING = (8888, 9999)
+
+# rainfall_level codes; each dashboard supplies labels in this order
+RAINFALL_LEVELS = ('no_data', 'no_rain', 'light', 'moderate', 'heavy', 'very_heavy')
+
+WEATHER_QUERY = """
+SELECT
+    f.fact_id,
+    f.waktu_id,
+    f.lokasi_id,
+    f.curah_hujan,
+    f.suhu_min,
+    f.suhu_max,
+    f.suhu_rata,
+    f.kelembaban_rata,
+    f.lama_penyinaran,
+    f.kecepatan_angin_max,
+    f.arah_angin_max,
+    f.kecepatan_angin_rata,
+    f.arah_angin_terbanyak,
+    w.tanggal,
+    w.bulan,
+    w.tahun,
+    w.nama_bulan,
+    w.hari_dalam_tahun,
+    w.minggu_iso,
+    w.dekad,
+    w.musim,
+    w.urutan_bulan,
+    l.nama_lokasi,
+    l.jenis_lokasi,
+    l.nama_stasiun
+FROM FactDataIklim f
+JOIN DimWaktu w ON f.waktu_id = w.waktu_id
+JOIN DimLokasi l ON f.lokasi_id = l.lokasi_id
+ORDER BY w.tanggal, l.nama_lokasi
+"""
+
+STATION_QUERY = """
+SELECT nama_lokasi, jenis_lokasi, lintang, bujur, elevasi
+FROM DimLokasi
+ORDER BY nama_lokasi, jenis_lokasi
+"""
+
+# DimLokasi stores lintang and bujur as integers in units of 1e-5 degrees
+COORDINATE_SCALE = 100000
+
+# Cheap fingerprint of the joined tables, used to version the disk cache and
+# the cached aggregations: new rows change the count and highest fact_id, and
+# any UPDATE, such as a correction or DBInput's calendar fill, moves the
+# indexed diperbarui_pada timestamps
+VERSION_QUERY = """
+SELECT
+    (SELECT COUNT(*) FROM FactDataIklim),
+    (SELECT MAX(fact_id) FROM FactDataIklim),
+    (SELECT MAX(diperbarui_pada) FROM FactDataIklim),
+    (SELECT MAX(diperbarui_pada) FROM DimWaktu),
+    (SELECT MAX(diperbarui_pada) FROM DimLokasi)
+"""
+
+
+class SettingsError(ValueError):
+    """Raised when the MySQL environment variables are incomplete"""
+
+
+@st.cache_resource
+def get_engine():
+    """Process-wide SQLAlchemy engine.
+
+    Raises SettingsError or the connection error; failures are not cached, so
+    the next rerun tries again.
+    """
+    return create_engine_from_env()
+
+
+def create_engine_from_env():
+    """Create a SQLAlchemy engine with connection pooling from the MYSQL_* variables"""
+    host = os.getenv('MYSQL_HOST')
+    user = os.getenv('MYSQL_USER')
+    password = os.getenv('MYSQL_PASSWORD')
+    database = os.getenv('MYSQL_DATABASE')
+    port = os.getenv('MYSQL_PORT', '3306')
+
+    if not all([host, user, password, database]):
+        raise SettingsError(f"Host: {host}, User: {user}, Database: {database}, Port: {port}")
+
+    connection_url = f"mysql+mysqlconnector://{user}:{password}@{host}:{port}/{database}"
+
+    engine = create_engine(
+        connection_url,
+        pool_recycle=3600,
+        pool_pre_ping=True,
+        pool_size=5,
+        max_overflow=10,
+        connect_args={
+            'connect_timeout': 10,
+            'autocommit': True
+        }
+    )
+
+    perf.monitor.instrument_engine(engine)
+
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1")).fetchone()
+
+    return engine
+
+
+# cache_resource hands every session the same frame instead of an unpickled
+# copy, so callers must not modify it in place (see label_view)
+@perf.monitor.cached('load_weather_data', st.cache_resource(ttl=600))
+def load_weather_data():
+    """Load and clean the joined weather data once per process.
+
+    With WEATHER_CACHE_DIR set, the cleaned frame is shared with other
+    replicas through the disk cache and only one of them queries the backend.
+    The daily climatology normals, rainfall sketches, wind roses,
+    gap-filled values and the pivot cube are brought up to date with each
+    load.
+    """
+    try:
+        df = read_weather_data(get_engine() if needs_database() else None)
+    except Exception:
+        return None
+    if df is not None:
+        climatology.normals.update(df, get_data_version(df))
+        sketches.rainfall.update(df)
+        wind.max_wind.update(df)
+        wind.prevailing_wind.update(df)
+        # After the normals, which supply the climatology fill
+        gapfill.filler.update(df)
+        cube.aggregates.update(df, get_data_version(df))
+    return df
+
+
+@perf.monitor.cached('load_stations', st.cache_resource(ttl=600))
+def load_stations():
+    """Station coordinates: location_full, lat, lon (degrees) and elevation (m).
+
+    Empty when the source has no station metadata, e.g. a Parquet snapshot.
+    """
+    try:
+        if needs_database():
+            with get_engine().connect() as conn:
+                stations = pd.read_sql(text(STATION_QUERY), conn)
+        else:
+            stations = duck.read_stations()
+    except Exception:
+        return pd.DataFrame(columns=['location_full', 'lat', 'lon', 'elevation'])
+    return pd.DataFrame({
+        'location_full': stations['nama_lokasi'] + ' (' + stations['jenis_lokasi'] + ')',
+        'lat': pd.to_numeric(stations['lintang'], errors='coerce') / COORDINATE_SCALE,
+        'lon': pd.to_numeric(stations['bujur'], errors='coerce') / COORDINATE_SCALE,
+        'elevation': pd.to_numeric(stations['elevasi'], errors='coerce'),
+    })
+
+
+@perf.monitor.cached('load_completeness', st.cache_resource(ttl=600))
+def load_completeness():
+    """Observed, 8888, 9999 and empty counts per (location_full, tahun, bulan, variabel).
+
+    Read from the small KelengkapanData table that Scripts/DBInput.py keeps up
+    to date; counted once from the loaded data when the table is missing or
+    empty, or with the DuckDB backend.
+    """
+    if needs_database():
+        try:
+            with get_engine().connect() as conn:
+                counts = pd.read_sql(text(completeness.COUNTS_QUERY), conn)
+            if not counts.empty:
+                return counts
+        except Exception:
+            pass
+    df = load_weather_data()
+    if df is None:
+        return pd.DataFrame(columns=completeness.COLUMNS)
+    return completeness.count_frame(df)
+
+
+def needs_database():
+    """False when WEATHER_DATA_BACKEND=duckdb reads local files instead of MySQL"""
+    return duck.DATA_BACKEND != 'duckdb'
+
+
+def read_weather_data(engine=None):
+    """Cleaned weather data through the disk cache when enabled, else straight from the backend.
+
+    The source version it was read at is kept in df.attrs['data_version'].
+    """
+    version = query_data_version(engine)
+    if store.frames.enabled:
+        df = store.frames.get_or_create('weather', version, lambda: fetch_weather_data(engine))
+    else:
+        df = fetch_weather_data(engine)
+    if df is not None:
+        df.attrs['data_version'] = version
+    return df
+
+
+def query_data_version(engine=None):
+    """Fingerprint of the tables (see VERSION_QUERY), or of the source files for DuckDB"""
+    if not needs_database():
+        return duck.source_version()
+    with engine.connect() as conn:
+        return tuple(conn.execute(text(VERSION_QUERY)).fetchone())
+
+
+def fetch_weather_data(engine=None):
+    """Query and clean the weather data, or None when there is none"""
+    if needs_database():
+        df, fetch_stats = fetch.read_sql(engine, WEATHER_QUERY, clean=clean_weather_data)
+    else:
+        df, fetch_stats = duck.read_weather_data(clean=clean_weather_data)
+    if df.empty:
+        return None
+
+    df.attrs['fetch_stats'] = fetch_stats
+    perf.monitor.record('fetch', fetch_stats['backend'], fetch_stats['fetch_seconds'],
+                        rows=fetch_stats['rows'], bytes=fetch_stats['bytes'])
+    return df
+
+
+@perf.monitor.timed_function('clean')
+def clean_weather_data(df):
+    """Add language-neutral derived columns: rainfall_clean, rainfall_level, location_full, date.
+
+    The wind direction columns are replaced by int8 sector code columns
+    (see wind.SECTOR_COLUMNS) and the DimWaktu calendar columns are narrowed
+    to small integers, derived from the date where the source does not have
+    them.
+    """
+    rainfall = pd.to_numeric(df['curah_hujan'], errors='coerce').astype('float64')
+    df['rainfall_clean'] = rainfall.mask(rainfall.isin(RAINFALL_MISSING))
+    df['rainfall_level'] = rainfall_levels(df['rainfall_clean'].to_numpy())
+    df['location_full'] = df['nama_lokasi'] + ' (' + df['jenis_lokasi'] + ')'
+    df['date'] = pd.to_datetime(df.pop('tanggal'))
+    for column in wind.DIRECTION_COLUMNS:
+        if column in df:
+            df[wind.SECTOR_COLUMNS[column]] = wind.sector_codes(df.pop(column))
+    for column, values in calendar_columns(df['date']).items():
+        if column in df and df[column].notna().all():
+            df[column] = df[column].to_numpy().astype(values.dtype)
+        else:
+            df[column] = values
+    return df
+
+
+def calendar_columns(dates):
+    """The DimWaktu calendar columns computed from dates, as compact integer arrays"""
+    dates = pd.DatetimeIndex(dates)
+    month = dates.month.to_numpy()
+    return {
+        'hari_dalam_tahun': dates.dayofyear.to_numpy().astype(np.int16),
+        'minggu_iso': dates.isocalendar().week.to_numpy().astype(np.int8),
+        'dekad': ((month - 1) * 3 + np.minimum((dates.day.to_numpy() - 1) // 10, 2) + 1).astype(np.int8),
+        'musim': aggregations.SEASON_CODES[month - 1],
+        'urutan_bulan': (dates.year.to_numpy() * 12 + month - 1).astype(np.int32),
+    }
+
+
+def rainfall_levels(values):
+    """Index into RAINFALL_LEVELS for each rainfall value (mm)"""
+    return np.select(
+        [np.isnan(values), values == 0, values <= 5, values <= 20, values <= 50],
+        [0, 1, 2, 3, 4],
+        default=5
+    ).astype(np.int8)
+
+
+def label_view(df, rename=None, labels=None):
+    """Per-language view of the shared frame.
+
+    rename maps shared column names to the dashboard's names and labels maps
+    a new column name to (code column, sequence of labels), added as a
+    categorical column. The view is a shallow copy with its own column
+    names, so existing columns are shared with the cached frame rather than
+    copied, with or without pandas copy-on-write; like the cached frame, it
+    must not be modified in place.
+    """
+    view = df.copy(deep=False)
+    view.columns = [(rename or {}).get(column, column) for column in df.columns]
+    for name, (code_column, names) in (labels or {}).items():
+        # Codes plus a small category table, not a string per row
+        view[name] = pd.Categorical.from_codes(df[code_column].to_numpy(), categories=list(names))
+    return view
+
+
+def get_data_version(df):
+    """Return a cheap fingerprint of the loaded data: the source version it was read at, else its size"""
+    if 'data_version' in df.attrs:
+        return df.attrs['data_version']
+    return (len(df), int(df['fact_id'].max()))
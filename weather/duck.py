@@ -0,0 +1,252 @@
+import argparse
+import glob
+import os
+import threading
+import time
+
+import pyarrow as pa
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+from weather import fetch
+
+# 'mysql' (default) loads from the star schema; 'duckdb' reads the BMKG CSV
+# files or a Parquet snapshot in-process with DuckDB, no database server needed
+DATA_BACKEND = os.getenv('WEATHER_DATA_BACKEND', 'mysql')
+
+# Pivot aggregations run in DuckDB by default when it is the data backend
+AGGREGATION_BACKEND = os.getenv('WEATHER_AGGREGATION_BACKEND', 'duckdb' if DATA_BACKEND == 'duckdb' else 'pandas')
+
+# Folder of "Data BMKG - <lokasi>.csv" files, a CSV/Parquet file, or a glob
+DUCKDB_SOURCE = os.getenv('WEATHER_DUCKDB_SOURCE', 'Data')
+
+# 0 lets DuckDB use every core
+DUCKDB_THREADS = int(os.getenv('WEATHER_DUCKDB_THREADS', '0'))
+
+CSV_COLUMNS = ['TANGGAL', 'TN', 'TX', 'TAVG', 'RH_AVG', 'RR', 'SS', 'FF_X', 'DDD_X', 'FF_AVG', 'DDD_CAR',
+               'kosong', 'keterangan', 'nilai']
+
+# Same columns as data.WEATHER_QUERY returns from MySQL. Numbers use a decimal
+# comma and '-' for missing values, like DBInput.convert_value handles them.
+CSV_QUERY = """
+CREATE OR REPLACE TEMP MACRO angka(x) AS TRY_CAST(replace(NULLIF(trim(x), '-'), ',', '.') AS DOUBLE);
+CREATE OR REPLACE TEMP MACRO teks(x) AS NULLIF(NULLIF(trim(x), '-'), '');
+
+WITH raw AS (
+    SELECT *, regexp_extract(filename, 'BMKG - (.*)\\.csv$', 1) AS lokasi
+    FROM read_csv({files}, header = true, all_varchar = true, names = {names},
+                  filename = true, null_padding = true)
+),
+lokasi AS (
+    SELECT
+        lokasi,
+        regexp_replace(lokasi, '^(Kab\\. |Kota )', '') AS nama_lokasi,
+        CASE WHEN lokasi LIKE 'Kab%' THEN 'Kabupaten' ELSE 'Kota' END AS jenis_lokasi,
+        max(CASE WHEN keterangan = 'Nama Stasiun' THEN nilai END) AS nama_stasiun
+    FROM raw
+    GROUP BY lokasi
+),
+harian AS (
+    SELECT
+        raw.* EXCLUDE (TANGGAL),
+        COALESCE(try_strptime(TANGGAL, '%d-%m-%Y'), try_strptime(TANGGAL, '%Y-%m-%d'))::DATE AS tanggal
+    FROM raw
+)
+SELECT
+    row_number() OVER (ORDER BY l.nama_lokasi, l.jenis_lokasi, h.tanggal)::INTEGER AS fact_id,
+    dense_rank() OVER (ORDER BY h.tanggal)::INTEGER AS waktu_id,
+    dense_rank() OVER (ORDER BY l.jenis_lokasi, l.nama_lokasi)::INTEGER AS lokasi_id,
+    angka(RR) AS curah_hujan,
+    angka(TN) AS suhu_min,
+    angka(TX) AS suhu_max,
+    angka(TAVG) AS suhu_rata,
+    angka(RH_AVG) AS kelembaban_rata,
+    angka(SS) AS lama_penyinaran,
+    angka(FF_X) AS kecepatan_angin_max,
+    teks(DDD_X) AS arah_angin_max,
+    angka(FF_AVG) AS kecepatan_angin_rata,
+    teks(DDD_CAR) AS arah_angin_terbanyak,
+    h.tanggal,
+    month(h.tanggal)::INTEGER AS bulan,
+    year(h.tanggal)::INTEGER AS tahun,
+    strftime(h.tanggal, '%B') AS nama_bulan,
+    dayofyear(h.tanggal)::SMALLINT AS hari_dalam_tahun,
+    weekofyear(h.tanggal)::TINYINT AS minggu_iso,
+    ((month(h.tanggal) - 1) * 3 + least(ceil(day(h.tanggal) / 10), 3))::TINYINT AS dekad,
+    CASE
+        WHEN month(h.tanggal) IN (6, 7, 8) THEN 0
+        WHEN month(h.tanggal) IN (9, 10, 11) THEN 1
+        WHEN month(h.tanggal) IN (12, 1, 2) THEN 2
+        ELSE 3
+    END::TINYINT AS musim,
+    (year(h.tanggal) * 12 + month(h.tanggal) - 1)::INTEGER AS urutan_bulan,
+    l.nama_lokasi,
+    l.jenis_lokasi,
+    l.nama_stasiun
+FROM harian h
+JOIN lokasi l USING (lokasi)
+WHERE h.tanggal IS NOT NULL
+ORDER BY h.tanggal, l.nama_lokasi
+"""
+
+# Station coordinates from the "Lintang", "Bujur" and "Elevasi" rows beside the
+# data. Dots are thousands separators there, so the digits match the scaled
+# integers Scripts/DBInput.py stores in DimLokasi.
+STATION_CSV_QUERY = """
+WITH raw AS (
+    SELECT keterangan, nilai, regexp_extract(filename, 'BMKG - (.*)\\.csv$', 1) AS lokasi
+    FROM read_csv({files}, header = true, all_varchar = true, names = {names},
+                  filename = true, null_padding = true)
+    WHERE keterangan IN ('Lintang', 'Bujur', 'Elevasi')
+)
+SELECT
+    regexp_replace(lokasi, '^(Kab\\. |Kota )', '') AS nama_lokasi,
+    CASE WHEN lokasi LIKE 'Kab%' THEN 'Kabupaten' ELSE 'Kota' END AS jenis_lokasi,
+    TRY_CAST(replace(max(CASE WHEN keterangan = 'Lintang' THEN nilai END), '.', '') AS BIGINT) AS lintang,
+    TRY_CAST(replace(max(CASE WHEN keterangan = 'Bujur' THEN nilai END), '.', '') AS BIGINT) AS bujur,
+    TRY_CAST(regexp_extract(max(CASE WHEN keterangan = 'Elevasi' THEN nilai END), '[0-9.,]+') AS DOUBLE) AS elevasi
+FROM raw
+GROUP BY lokasi
+ORDER BY nama_lokasi, jenis_lokasi
+"""
+
+AGGREGATES = {'mean': 'avg', 'max': 'max', 'min': 'min', 'count': 'count'}
+
+_local = threading.local()
+
+
+def _connection():
+    """One DuckDB connection per thread (connections are not thread-safe)"""
+    if getattr(_local, 'connection', None) is None:
+        if duckdb is None:
+            raise ImportError("The duckdb backend needs the duckdb package: pip install duckdb")
+        _local.connection = duckdb.connect()
+        if DUCKDB_THREADS:
+            _local.connection.execute(f"SET threads = {DUCKDB_THREADS}")
+    return _local.connection
+
+
+def source_files(source=DUCKDB_SOURCE):
+    """Data files behind source, sorted"""
+    if os.path.isdir(source):
+        files = glob.glob(os.path.join(source, '*.parquet')) or glob.glob(os.path.join(source, '*BMKG*.csv'))
+    else:
+        files = glob.glob(source)
+    return sorted(files)
+
+
+def source_version(source=DUCKDB_SOURCE):
+    """Fingerprint of the source files, changing whenever one is replaced"""
+    return tuple((os.path.basename(path), os.path.getsize(path), int(os.path.getmtime(path)))
+                 for path in source_files(source))
+
+
+def _quote(value):
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _list(values):
+    return '[' + ', '.join(_quote(value) for value in values) + ']'
+
+
+def _arrow_table(result):
+    # to_arrow_table replaces fetch_arrow_table in newer DuckDB releases
+    fetch = getattr(result, 'to_arrow_table', None) or result.fetch_arrow_table
+    return fetch()
+
+
+def read_table(source=DUCKDB_SOURCE):
+    """The joined weather rows as a pyarrow Table"""
+    files = source_files(source)
+    if not files:
+        raise FileNotFoundError(f"No CSV or Parquet data found in {source}")
+
+    connection = _connection()
+    if all(path.endswith('.parquet') for path in files):
+        return _arrow_table(connection.execute(f"SELECT * FROM read_parquet({_list(files)})"))
+
+    statements = CSV_QUERY.format(files=_list(files), names=_list(CSV_COLUMNS)).strip().split(';\n')
+    for statement in statements[:-1]:
+        connection.execute(statement)
+    return _arrow_table(connection.execute(statements[-1]))
+
+
+def read_weather_data(source=DUCKDB_SOURCE, clean=None):
+    """Return (DataFrame, stats) like fetch.read_sql, reading source with DuckDB"""
+    start = time.perf_counter()
+    table = read_table(source)
+    nbytes = table.nbytes
+    df = fetch.arrow_to_pandas(table)
+    fetched = time.perf_counter()
+    if clean is not None and not df.empty:
+        df = clean(df)
+
+    stats = {
+        'backend': 'duckdb',
+        'rows': len(df),
+        'bytes': nbytes,
+        'chunks': 1,
+        'fetch_seconds': fetched - start,
+        'seconds': time.perf_counter() - start,
+    }
+    return df, stats
+
+
+def read_stations(source=DUCKDB_SOURCE):
+    """DimLokasi-style station rows from the CSV headers; empty for Parquet snapshots"""
+    files = [path for path in source_files(source) if path.endswith('.csv')]
+    if not files:
+        return pa.table({'nama_lokasi': [], 'jenis_lokasi': [], 'lintang': [], 'bujur': [], 'elevasi': []}).to_pandas()
+    query = STATION_CSV_QUERY.format(files=_list(files), names=_list(CSV_COLUMNS))
+    return _arrow_table(_connection().execute(query)).to_pandas()
+
+
+def group_aggregate(df, group_cols, aggregates):
+    """GROUP BY group_cols over a DataFrame in DuckDB.
+
+    aggregates maps an output name to (column, pandas-style function name).
+    Rows with a missing group value are skipped, as in pandas groupby.
+    """
+    columns = list(dict.fromkeys(list(group_cols) + [column for column, _ in aggregates.values()]))
+    groups = [f'"{column}"' for column in group_cols]
+    select = groups + [f'{AGGREGATES[func]}("{column}") AS "{name}"'
+                       for name, (column, func) in aggregates.items()]
+    where = ' AND '.join(f'{group} IS NOT NULL' for group in groups)
+
+    cursor = _connection().cursor()
+    try:
+        # Arrow scans avoid converting pandas string columns row by row
+        cursor.register('frame', pa.Table.from_pandas(df[columns], preserve_index=False))
+        return cursor.execute(
+            f"SELECT {', '.join(select)} FROM frame WHERE {where} GROUP BY {', '.join(groups)}"
+        ).df()
+    finally:
+        cursor.close()
+
+
+def pivot(df, value_col, index_col, column_col, aggfunc='mean'):
+    """Equivalent of pandas pivot_table(..., fill_value=0).round(2) computed in DuckDB"""
+    result = group_aggregate(df, [index_col, column_col], {'value': (value_col, aggfunc)})
+    table = result.pivot(index=index_col, columns=column_col, values='value')
+    table = table.dropna(how='all').dropna(axis=1, how='all').fillna(0).round(2)
+    table.columns.name = column_col
+    return table.sort_index().sort_index(axis=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert the BMKG CSV files to a Parquet snapshot for the DuckDB backend")
+    parser.add_argument('output', help="Parquet file to write, e.g. Data/weather.parquet")
+    parser.add_argument('--source', default=DUCKDB_SOURCE)
+    args = parser.parse_args()
+
+    import pyarrow.parquet as pq
+    table = read_table(args.source)
+    pq.write_table(table, args.output, compression='zstd')
+    print(f"Wrote {table.num_rows:,} rows to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
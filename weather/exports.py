@@ -0,0 +1,71 @@
+import gzip
+import io
+import os
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Rows serialized per step, so a large export never holds a second full copy as text
+EXPORT_CHUNK_ROWS = int(os.getenv('WEATHER_EXPORT_CHUNK_ROWS', '100000'))
+
+MIME_TYPES = {
+    'csv': 'text/csv',
+    'csv.gz': 'application/gzip',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+
+def _chunks(df, chunk_rows):
+    for start in range(0, max(len(df), 1), chunk_rows):
+        yield df.iloc[start:start + chunk_rows]
+
+
+def to_csv_gz(df, index=True, chunk_rows=EXPORT_CHUNK_ROWS):
+    """gzip-compressed CSV, encoded and compressed one chunk at a time"""
+    buffer = io.BytesIO()
+    with gzip.GzipFile(fileobj=buffer, mode='wb', compresslevel=6) as archive:
+        for i, chunk in enumerate(_chunks(df, chunk_rows)):
+            archive.write(chunk.to_csv(index=index, header=(i == 0)).encode('utf-8'))
+    return buffer.getvalue()
+
+
+def _schema(df, index, chunk_rows):
+    """Arrow schema of the whole export.
+
+    Types are inferred from the first chunk; a text column that is all
+    missing there, such as wind directions of a period without readings,
+    takes its type from the first values it has further on.
+    """
+    schema = pa.Schema.from_pandas(df.iloc[:chunk_rows], preserve_index=index)
+    for i, field in enumerate(schema):
+        if pa.types.is_null(field.type) and field.name in df.columns:
+            values = df[field.name].dropna()
+            if len(values):
+                schema = schema.set(i, field.with_type(pa.array(values.iloc[:chunk_rows], from_pandas=True).type))
+    return schema
+
+
+def to_parquet(df, index=True, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Parquet file with one row group per chunk, every chunk converted to the same schema"""
+    df = df.rename(columns=str)
+    schema = _schema(df, index, chunk_rows)
+    sink = pa.BufferOutputStream()
+    with pq.ParquetWriter(sink, schema, compression='zstd') as writer:
+        for chunk in _chunks(df, chunk_rows):
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=index))
+    return sink.getvalue().to_pybytes()
+
+
+def exporter(df, fmt, index=True):
+    """Zero-argument function producing df in fmt ('csv', 'csv.gz' or 'parquet').
+
+    Passed to st.download_button as data, the export is only built when the
+    button is clicked instead of on every rerun.
+    """
+    if fmt == 'csv':
+        return lambda: df.to_csv(index=index)
+    if fmt == 'csv.gz':
+        return lambda: to_csv_gz(df, index=index)
+    if fmt == 'parquet':
+        return lambda: to_parquet(df, index=index)
+    raise ValueError(f"Unknown export format: {fmt}")
@@ -0,0 +1,161 @@
+import collections
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from weather import perf
+
+# ETCCDI thresholds (mm): a wet day has at least WET_DAY_MM of rain
+WET_DAY_MM = 1.0
+HEAVY_DAY_MM = (10, 20, 50)
+
+INDICES = ('days', 'CDD', 'CWD', 'Rx1day', 'Rx5day') + tuple(f'R{mm}mm' for mm in HEAVY_DAY_MM) + ('PRCPTOT',)
+
+# Threads used to process stations; 0 means one per CPU
+EXTREMES_WORKERS = int(os.getenv('WEATHER_EXTREMES_WORKERS', '0')) or os.cpu_count() or 1
+
+# (station, year) results kept in memory
+CACHE_ENTRIES = 20000
+
+
+def _runs_per_year(mask, new_year, year_code, years):
+    """Longest run of True in mask for each year; runs are cut at year boundaries"""
+    starts = mask.copy()
+    starts[1:] &= ~mask[:-1] | new_year[1:]
+    run_id = np.cumsum(starts) - 1
+    lengths = np.bincount(run_id[mask], minlength=int(starts.sum()))
+    longest = np.zeros(years, dtype=np.int64)
+    np.maximum.at(longest, year_code[starts], lengths)
+    return longest
+
+
+def station_indices(dates, rainfall):
+    """ETCCDI precipitation indices per calendar year for one station.
+
+    dates and rainfall are the station's daily rows (any order, gaps
+    allowed). Missing days end wet and dry spells and are left out of
+    Rx5day windows. Everything is computed with whole-array operations and
+    per-year reductions, so the cost is linear in the number of days.
+    """
+    series = pd.Series(np.asarray(rainfall, dtype='float64'), index=pd.DatetimeIndex(dates))
+    series = series.groupby(level=0).mean().sort_index()
+    if series.empty:
+        return pd.DataFrame(columns=INDICES, index=pd.Index([], name='year'))
+
+    # Full calendar, so consecutive positions are consecutive days
+    calendar = pd.date_range(series.index[0], series.index[-1], freq='D')
+    rain = series.reindex(calendar).to_numpy()
+    year = calendar.year.to_numpy()
+    new_year = np.r_[True, year[1:] != year[:-1]]
+    year_starts = np.flatnonzero(new_year)
+    year_code = np.cumsum(new_year) - 1
+    years = len(year_starts)
+
+    valid = ~np.isnan(rain)
+    filled = np.where(valid, rain, 0.0)
+    wet = valid & (rain >= WET_DAY_MM)
+    dry = valid & (rain < WET_DAY_MM)
+
+    # Five-day totals ending on each day, only where all five days are in the same year and measured
+    total = np.r_[0.0, np.cumsum(filled)]
+    counted = np.r_[0, np.cumsum(valid)]
+    end = np.arange(len(rain))
+    begin = end - 4
+    window_ok = begin >= year_starts[year_code]
+    begin = np.maximum(begin, 0)
+    five_day = np.where(window_ok & (counted[end + 1] - counted[begin] == 5),
+                        total[end + 1] - total[begin], np.nan)
+
+    with np.errstate(invalid='ignore'):
+        result = {
+            'days': np.add.reduceat(valid.astype(np.int64), year_starts),
+            'CDD': _runs_per_year(dry, new_year, year_code, years),
+            'CWD': _runs_per_year(wet, new_year, year_code, years),
+            'Rx1day': np.fmax.reduceat(rain, year_starts),
+            'Rx5day': np.fmax.reduceat(five_day, year_starts),
+        }
+        for mm in HEAVY_DAY_MM:
+            result[f'R{mm}mm'] = np.add.reduceat((valid & (rain >= mm)).astype(np.int64), year_starts)
+        result['PRCPTOT'] = np.add.reduceat(np.where(wet, rain, 0.0), year_starts)
+
+    return pd.DataFrame(result, index=pd.Index(year[year_starts], name='year'))
+
+
+class ExtremeIndices:
+    """Per (station, year) index cache in front of station_indices.
+
+    Each station-year is keyed by a cheap fingerprint of its rows (count,
+    rainfall sum and last date), so past years are computed once and only
+    years whose data changed are recomputed. Stations with stale years are
+    processed in parallel threads.
+    """
+
+    def __init__(self, workers=EXTREMES_WORKERS, max_entries=CACHE_ENTRIES):
+        self.workers = workers
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._results = collections.OrderedDict()
+
+    def compute(self, df, station_col='location_full', date_col='date', rainfall_col='rainfall_clean'):
+        """DataFrame with one row per (station, year) and the INDICES columns"""
+        if df.empty:
+            return pd.DataFrame(columns=INDICES, index=pd.MultiIndex.from_tuples([], names=['station', 'year']))
+
+        frame = pd.DataFrame({
+            'station': df[station_col].to_numpy(),
+            'date': df[date_col].to_numpy(),
+            'year': df[date_col].dt.year.to_numpy(),
+            'rain': pd.to_numeric(df[rainfall_col], errors='coerce').to_numpy(dtype='float64', na_value=np.nan),
+        })
+        fingerprints = frame.groupby(['station', 'year'], sort=True).agg(
+            rows=('rain', 'size'), total=('rain', 'sum'), last=('date', 'max'))
+
+        keys = {}
+        cached = {}
+        stale = collections.defaultdict(list)
+        with self._lock:
+            for (station, year), fingerprint in zip(fingerprints.index, fingerprints.itertuples(index=False)):
+                key = (station, year, fingerprint.rows, round(float(fingerprint.total), 3), fingerprint.last)
+                keys[station, year] = key
+                if key in self._results:
+                    self._results.move_to_end(key)
+                    cached[station, year] = self._results[key]
+                else:
+                    stale[station].append(year)
+        perf.monitor.count('extremes_cached', 'station_year', len(cached))
+        perf.monitor.count('extremes_computed', 'station_year', sum(len(years) for years in stale.values()))
+
+        if stale:
+            groups = frame[frame['station'].isin(list(stale))].groupby('station', sort=False)
+
+            def run(station):
+                rows = groups.get_group(station)
+                rows = rows[rows['year'].isin(stale[station])]
+                return station, station_indices(rows['date'], rows['rain'])
+
+            with perf.monitor.timed('compute', 'extreme_indices'):
+                if len(stale) > 1 and self.workers > 1:
+                    with ThreadPoolExecutor(max_workers=min(self.workers, len(stale))) as pool:
+                        computed = list(pool.map(run, stale))
+                else:
+                    computed = [run(station) for station in stale]
+
+            with self._lock:
+                for station, indices in computed:
+                    for year, row in zip(indices.index, indices.to_dict('records')):
+                        # Gaps between stale years show up as empty years; skip them
+                        if (station, year) not in keys:
+                            continue
+                        cached[station, year] = row
+                        self._results[keys[station, year]] = row
+                while len(self._results) > self.max_entries:
+                    self._results.popitem(last=False)
+
+        index = pd.MultiIndex.from_tuples(sorted(cached), names=['station', 'year'])
+        return pd.DataFrame([cached[key] for key in index], index=index, columns=INDICES)
+
+
+indices = ExtremeIndices()
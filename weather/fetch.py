@@ -0,0 +1,239 @@
+import datetime
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from sqlalchemy import text
+
+try:
+    import connectorx
+except ImportError:
+    connectorx = None
+
+# 'pandas' uses pd.read_sql, 'arrow' reads into Arrow columns, 'chunked'
+# streams through a server-side cursor, 'auto' picks 'arrow' when connectorx
+# is installed
+FETCH_BACKEND = os.getenv('WEATHER_FETCH_BACKEND', 'auto')
+
+FETCH_BATCH_SIZE = int(os.getenv('WEATHER_FETCH_CHUNK_ROWS', '50000'))
+
+# Arrow-backed strings; numbers stay as numpy floats so NaN handling is unchanged
+_PANDAS_TYPES = {
+    pa.string(): pd.ArrowDtype(pa.string()),
+    pa.large_string(): pd.ArrowDtype(pa.large_string()),
+}
+
+
+def resolve_backend(backend=None):
+    """Return the fetch backend that will actually be used"""
+    backend = backend or FETCH_BACKEND
+    if backend == 'auto':
+        return 'arrow' if connectorx is not None else 'pandas'
+    return backend
+
+
+def read_sql(engine, query, backend=None, clean=None):
+    """Run query and return (DataFrame, stats) with fetch time and size.
+
+    clean, when given, is applied to the result; the chunked backend applies
+    it to every chunk as it arrives.
+    """
+    backend = resolve_backend(backend)
+    start = time.perf_counter()
+
+    if backend == 'chunked':
+        df, chunks = read_sql_chunked(engine, query, clean=clean)
+        fetched = time.perf_counter()
+        nbytes = int(df.memory_usage(deep=True).sum())
+    else:
+        chunks = 1
+        if backend == 'arrow':
+            table = read_arrow_table(engine, query)
+            nbytes = table.nbytes
+            df = arrow_to_pandas(table)
+        else:
+            df = pd.read_sql(query, engine)
+            nbytes = int(df.memory_usage(deep=True).sum())
+        fetched = time.perf_counter()
+        if clean is not None and not df.empty:
+            df = clean(df)
+
+    stats = {
+        'backend': backend,
+        'rows': len(df),
+        'bytes': nbytes,
+        'chunks': chunks,
+        'fetch_seconds': fetched - start,
+        'seconds': time.perf_counter() - start,
+    }
+    return df, stats
+
+
+def read_sql_chunked(engine, query, clean=None, chunk_rows=FETCH_BATCH_SIZE):
+    """Stream query results in chunks into preallocated compact columns.
+
+    Rows come from an unbuffered server-side cursor, so only one chunk of raw
+    rows is held at a time. Each chunk is cleaned, floats are narrowed to
+    float32 and 64-bit integers to int32, and the values are copied into numpy
+    arrays sized from a COUNT(*) of the query. An integer column is widened
+    when a later chunk does not fit it and becomes float64 when a chunk has
+    NULLs, so they stay missing instead of turning into 0. Text columns are
+    kept as Arrow string chunks and joined without copying at the end.
+    Returns (DataFrame, number of chunks).
+    """
+    with engine.connect() as conn:
+        capacity = conn.execute(text(f"SELECT COUNT(*) FROM ({query}) AS counted")).scalar() or 0
+        result = conn.execution_options(stream_results=True, max_row_buffer=chunk_rows).execute(text(query))
+        names = list(result.keys())
+
+        columns = {}
+        filled = 0
+        n_chunks = 0
+        for rows in result.partitions(chunk_rows):
+            chunk = _normalize_chunk(pd.DataFrame.from_records(rows, columns=names, coerce_float=True))
+            if clean is not None:
+                chunk = clean(chunk)
+            column_order = list(chunk.columns)
+            n_chunks += 1
+
+            if filled + len(chunk) > capacity:
+                # Rows inserted after the COUNT(*); grow instead of failing
+                capacity = max(filled + len(chunk), int(capacity * 1.5))
+                for column in columns.values():
+                    if isinstance(column, np.ndarray):
+                        column.resize(capacity, refcheck=False)
+
+            for name in chunk.columns:
+                values = chunk[name]
+                if name not in columns:
+                    if values.isna().all():
+                        # Type unknown until a chunk has values; rows so far stay missing
+                        continue
+                    columns[name] = _allocate_column(values, capacity, filled)
+                target = columns[name] = _fit_column(columns[name], values)
+                if isinstance(target, list):
+                    target.append(pa.array(values.astype(object), type=pa.string(), from_pandas=True))
+                else:
+                    target[filled:filled + len(chunk)] = values.to_numpy(dtype=target.dtype, na_value=_na_for(target))
+            filled += len(chunk)
+
+    if n_chunks == 0:
+        return pd.DataFrame(columns=names), 0
+
+    data = {}
+    for name in column_order:
+        column = columns.get(name)
+        if column is None:
+            data[name] = np.full(filled, np.nan, dtype=np.float32)
+        elif isinstance(column, list):
+            data[name] = pd.arrays.ArrowExtensionArray(pa.chunked_array(column, type=pa.string()))
+        else:
+            data[name] = column[:filled]
+    return pd.DataFrame(data), n_chunks
+
+
+def _normalize_chunk(chunk):
+    """Turn datetime.date objects into datetime64 so they get a fixed-width column"""
+    for name in chunk.columns:
+        if chunk[name].dtype == object:
+            sample = chunk[name].dropna()
+            if len(sample) and isinstance(sample.iloc[0], datetime.date):
+                chunk[name] = pd.to_datetime(chunk[name])
+    return chunk
+
+
+def _allocate_column(values, capacity, filled):
+    """Preallocate a compact numpy column, or a list of Arrow chunks for text.
+
+    filled is the number of rows already read, which stay missing.
+    """
+    kind = values.dtype.kind
+    if kind == 'f':
+        return np.full(capacity, np.nan, dtype=np.float32)
+    if kind in 'iu':
+        if filled:
+            # Integers cannot hold the missing values of the rows already read
+            return np.full(capacity, np.nan)
+        if values.dtype.itemsize <= 4:
+            # Already narrowed by clean, e.g. int8 wind sector codes
+            return np.zeros(capacity, dtype=values.dtype)
+        return np.zeros(capacity, dtype=np.int32 if values.abs().max() < 2 ** 31 else np.int64)
+    if kind == 'b':
+        return np.zeros(capacity, dtype=bool)
+    if kind == 'M':
+        return np.full(capacity, np.datetime64('NaT'), dtype='datetime64[ns]')
+    return [pa.nulls(filled, type=pa.string())] if filled else []
+
+
+def _fit_column(column, values):
+    """column, or a promoted copy when values do not fit it.
+
+    Integers outside the column's range widen it to int64; NULLs or
+    fractions in an integer column make it float64.
+    """
+    # Text columns are lists of Arrow chunks and never need promoting
+    if not isinstance(column, np.ndarray) or column.dtype.kind not in 'iu' or values.empty:
+        return column
+    if values.dtype.kind not in 'iu':
+        return column.astype(np.float64)
+    limits = np.iinfo(column.dtype)
+    if values.min() < limits.min or values.max() > limits.max:
+        return column.astype(np.int64)
+    return column
+
+
+def _na_for(array):
+    if array.dtype.kind == 'f':
+        return np.nan
+    if array.dtype.kind == 'M':
+        return np.datetime64('NaT')
+    return 0
+
+
+def read_arrow_table(engine, query, batch_size=FETCH_BATCH_SIZE):
+    """Read a query result directly into a pyarrow Table"""
+    if connectorx is not None:
+        url = engine.url.set(drivername=engine.url.get_backend_name())
+        return connectorx.read_sql(url.render_as_string(hide_password=False), query, return_type='arrow')
+
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute(query)
+        names = [column[0] for column in cursor.description]
+        batches = []
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            batches.append(rows_to_record_batch(rows, names))
+        cursor.close()
+    finally:
+        connection.close()
+
+    if not batches:
+        return pa.table({name: pa.array([], type=pa.null()) for name in names})
+    # Columns that were all NULL in one batch are promoted to the type seen in others
+    return pa.concat_tables([pa.Table.from_batches([batch]) for batch in batches],
+                            promote_options='permissive')
+
+
+def rows_to_record_batch(rows, names):
+    """Transpose DB-API rows into typed Arrow columns (DECIMAL becomes float64)"""
+    arrays = []
+    for values in zip(*rows):
+        array = pa.array(values, from_pandas=True)
+        if pa.types.is_decimal(array.type):
+            array = array.cast(pa.float64())
+        arrays.append(array)
+    return pa.RecordBatch.from_arrays(arrays, names=names)
+
+
+def arrow_to_pandas(table):
+    """Convert an Arrow table to pandas with float, datetime and Arrow string columns"""
+    for i, field in enumerate(table.schema):
+        if pa.types.is_decimal(field.type):
+            table = table.set_column(i, field.name, table.column(i).cast(pa.float64()))
+    return table.to_pandas(date_as_object=False, types_mapper=_PANDAS_TYPES.get)
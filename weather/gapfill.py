@@ -0,0 +1,243 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from weather import climatology, perf
+
+# Fill sources, stored per value as an index into this tuple; each dashboard supplies labels in this order
+FILL_SOURCES = ('observed', 'linear', 'neighbour', 'climatology', 'missing')
+OBSERVED, LINEAR, NEIGHBOUR, CLIMATOLOGY, MISSING = range(len(FILL_SOURCES))
+
+# Longest gap (days) bridged by linear interpolation
+MAX_LINEAR_GAP = 3
+
+# Rainfall is too intermittent to interpolate between days, so it starts at the neighbour fill
+LINEAR_VARIABLES = ('suhu_min', 'suhu_max', 'suhu_rata', 'kelembaban_rata', 'kecepatan_angin_rata', 'lama_penyinaran')
+
+# Filled values of these variables are clipped at zero
+NON_NEGATIVE = ('rainfall_clean', 'kelembaban_rata', 'kecepatan_angin_rata', 'lama_penyinaran')
+
+# A neighbour station is used when the two share at least MIN_OVERLAP observed
+# days and its linear regression explains at least MIN_R2 of the variance
+MIN_OVERLAP = 90
+MIN_R2 = 0.3
+
+
+def _pair_sums(values):
+    """Regression sums for every (target, neighbour) pair over the days both observed.
+
+    values has shape (stations, days); the result has shape (6, stations,
+    stations) holding n, sum x, sum y, sum xx, sum xy and sum yy, where y is
+    the target and x the neighbour.
+    """
+    valid = (~np.isnan(values)).astype('float64')
+    x = np.where(valid > 0, values, 0.0)
+    return np.stack([
+        valid @ valid.T,
+        valid @ x.T,
+        x @ valid.T,
+        valid @ (x ** 2).T,
+        x @ x.T,
+        (x ** 2) @ valid.T,
+    ])
+
+
+def regression(sums, min_overlap=MIN_OVERLAP, min_r2=MIN_R2):
+    """(intercept, slope, r2, usable) arrays of shape (stations, stations) from _pair_sums"""
+    n, sx, sy, sxx, sxy, syy = sums
+    with np.errstate(invalid='ignore', divide='ignore'):
+        covariance = n * sxy - sx * sy
+        variance_x = n * sxx - sx ** 2
+        variance_y = n * syy - sy ** 2
+        slope = covariance / variance_x
+        intercept = (sy - slope * sx) / n
+        r2 = covariance ** 2 / (variance_x * variance_y)
+    usable = (n >= min_overlap) & (variance_x > 0) & (r2 >= min_r2)
+    np.fill_diagonal(usable, False)
+    return intercept, slope, np.where(usable, r2, 0.0), usable
+
+
+def fill_array(values, normal=None, coefficients=None, max_gap=MAX_LINEAR_GAP, linear=True, minimum=None):
+    """Gap-fill a (stations, days) array of consecutive days.
+
+    Gaps of up to max_gap days between two observations are interpolated
+    linearly, then the remaining days are predicted from the best correlated
+    neighbour observed that day (coefficients from regression()), then taken
+    from normal, an array of the same shape. Returns (filled, sources) with
+    sources indexing FILL_SOURCES.
+    """
+    values = np.asarray(values, dtype='float64')
+    stations, days = values.shape
+    valid = ~np.isnan(values)
+    filled = values.copy()
+    sources = np.where(valid, OBSERVED, MISSING).astype(np.int8)
+
+    if linear and days:
+        positions = np.arange(days)
+        previous = np.maximum.accumulate(np.where(valid, positions, -1), axis=1)
+        following = np.minimum.accumulate(np.where(valid, positions, days)[:, ::-1], axis=1)[:, ::-1]
+        bridge = ~valid & (previous >= 0) & (following < days) & (following - previous - 1 <= max_gap)
+        left = np.take_along_axis(values, np.clip(previous, 0, days - 1), axis=1)
+        right = np.take_along_axis(values, np.clip(following, 0, days - 1), axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            interpolated = left + (right - left) * (positions - previous) / (following - previous)
+        filled[bridge] = interpolated[bridge]
+        sources[bridge] = LINEAR
+
+    if coefficients is not None and stations > 1:
+        intercept, slope, r2, usable = coefficients
+        target = np.arange(stations)
+        # Best neighbour first; unusable pairs sort last and are masked out
+        for neighbour in np.argsort(-r2, axis=1).T:
+            x = values[neighbour]
+            predicted = intercept[target, neighbour][:, None] + slope[target, neighbour][:, None] * x
+            fill = (sources == MISSING) & usable[target, neighbour][:, None] & ~np.isnan(x)
+            filled[fill] = predicted[fill]
+            sources[fill] = NEIGHBOUR
+
+    if normal is not None:
+        fill = (sources == MISSING) & ~np.isnan(normal)
+        filled[fill] = normal[fill]
+        sources[fill] = CLIMATOLOGY
+
+    if minimum is not None:
+        filled = np.where(sources != OBSERVED, np.fmax(filled, minimum), filled)
+    return filled, sources
+
+
+class GapFiller:
+    """Station x day arrays of every variable with their gap-filled values.
+
+    update() adds only the days it has not seen yet: the neighbour
+    regression sums are updated for the new days and filling reruns from
+    MAX_LINEAR_GAP days before the earliest new day, so linear gaps that the
+    new data closes are bridged. Days filled earlier keep their values.
+    """
+
+    def __init__(self, variables=climatology.VARIABLES, normals=climatology.normals, max_gap=MAX_LINEAR_GAP):
+        self.variables = tuple(variables)
+        self.normals = normals
+        self.max_gap = max_gap
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        shape = (len(self.variables), 0, 0)
+        self.stations = {}
+        self.origin = None
+        self._last_date = {}
+        self._observed = np.full(shape, np.nan)
+        self._filled = np.full(shape, np.nan)
+        self._sources = np.full(shape, MISSING, dtype=np.int8)
+        self._sums = np.zeros((len(self.variables), 6, 0, 0))
+
+    def update(self, df, station_col='location_full', date_col='date'):
+        """Store and fill the rows of df that are newer than each station's last seen date.
+
+        When a station's data now ends earlier than before, or starts before
+        the stored days, the source has been replaced and everything is
+        rebuilt from df.
+        """
+        with self._lock, perf.monitor.timed('gapfill', 'update'):
+            last_dates = df.groupby(station_col, observed=True)[date_col].max()
+            if (any(last_dates.get(station, self._last_date[station]) < self._last_date[station]
+                    for station in self._last_date)
+                    or (self.origin is not None and df[date_col].min() < self.origin)):
+                self.reset()
+
+            new_rows = df
+            if self._last_date:
+                # Unknown stations map to NaT, which never compares as already seen
+                seen_until = pd.to_datetime(df[station_col].map(self._last_date))
+                new_rows = df[~(df[date_col] <= seen_until).to_numpy()]
+            if len(new_rows):
+                first_day = self._insert(new_rows, station_col, date_col)
+                self._refill(max(first_day - self.max_gap - 1, 0))
+            self._last_date.update(last_dates.to_dict())
+
+    def _insert(self, df, station_col, date_col):
+        """Write df's observations into the arrays and return the first day index they touch"""
+        for station in pd.unique(df[station_col]):
+            if station not in self.stations:
+                self.stations[station] = len(self.stations)
+        if self.origin is None:
+            self.origin = df[date_col].min()
+        days = (pd.DatetimeIndex(df[date_col]) - self.origin).days.to_numpy()
+        self._resize(len(self.stations), int(days.max()) + 1)
+
+        first_day = int(days.min())
+        station_index = df[station_col].map(self.stations).to_numpy(dtype=np.int64)
+        for i, variable in enumerate(self.variables):
+            before = self._observed[i, :, first_day:].copy()
+            values = pd.to_numeric(df[variable], errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+            self._observed[i, station_index, days] = values
+            # Only pairs of days that changed contribute to the regression sums
+            self._sums[i] += _pair_sums(self._observed[i, :, first_day:]) - _pair_sums(before)
+        return first_day
+
+    def _resize(self, stations, days):
+        old_stations, old_days = self._observed.shape[1:]
+        if (stations, days) == (old_stations, old_days):
+            return
+        shape = (len(self.variables), stations, max(days, old_days))
+        observed, filled = np.full(shape, np.nan), np.full(shape, np.nan)
+        sources = np.full(shape, MISSING, dtype=np.int8)
+        observed[:, :old_stations, :old_days] = self._observed
+        filled[:, :old_stations, :old_days] = self._filled
+        sources[:, :old_stations, :old_days] = self._sources
+        sums = np.zeros((len(self.variables), 6, stations, stations))
+        sums[:, :, :old_stations, :old_stations] = self._sums
+        self._observed, self._filled, self._sources, self._sums = observed, filled, sources, sums
+
+    def _refill(self, start):
+        dates = self.origin + pd.to_timedelta(np.arange(start, self._observed.shape[2]), unit='D')
+        mean, _ = self.normals.normals()
+        normal_rows = np.array([self.normals.stations.get(station, -1) for station in self.stations], dtype=np.int64)
+        days_of_year = climatology.day_of_year(dates)
+
+        for i, variable in enumerate(self.variables):
+            normal = None
+            if variable in self.normals.variables and len(mean):
+                normal = mean[np.maximum(normal_rows, 0)[:, None], days_of_year[None, :],
+                              self.normals.variables.index(variable)]
+                normal = np.where((normal_rows >= 0)[:, None], normal, np.nan)
+            filled, sources = fill_array(
+                self._observed[i, :, start:], normal, regression(self._sums[i]), self.max_gap,
+                linear=variable in LINEAR_VARIABLES, minimum=0.0 if variable in NON_NEGATIVE else None)
+            self._filled[i, :, start:] = filled
+            self._sources[i, :, start:] = sources
+
+    def filled(self, df, columns, station_col='location_full', date_col='date'):
+        """<column>_filled and <column>_source columns for df, aligned to its index.
+
+        columns maps each column of df to its shared variable name, so views
+        with renamed columns can use the shared arrays. Rows the filler has
+        not seen keep their own value.
+        """
+        with self._lock:
+            stations = df[station_col].map(self.stations)
+            station_index = stations.fillna(-1).to_numpy(dtype=np.int64)
+            if self.origin is None:
+                days = np.full(len(df), -1)
+            else:
+                days = (pd.DatetimeIndex(df[date_col]) - self.origin).days.to_numpy()
+            known = (station_index >= 0) & (days >= 0) & (days < self._observed.shape[2])
+            station_index, days = np.where(known, station_index, 0), np.where(known, days, 0)
+
+            result = {}
+            for column, variable in columns.items():
+                values = pd.to_numeric(df[column], errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+                own_source = np.where(np.isnan(values), MISSING, OBSERVED).astype(np.int8)
+                i = self.variables.index(variable)
+                if self._observed.size:
+                    result[f'{column}_filled'] = np.where(known, self._filled[i, station_index, days], values)
+                    result[f'{column}_source'] = np.where(known, self._sources[i, station_index, days], own_source)
+                else:
+                    result[f'{column}_filled'] = values
+                    result[f'{column}_source'] = own_source
+            return pd.DataFrame(result, index=df.index)
+
+
+# Updated by data.load_weather_data after the climatology normals, shared by every session of the process
+filler = GapFiller()
@@ -0,0 +1,195 @@
+import argparse
+import datetime
+import json
+import os
+import sys
+import tempfile
+import time
+
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+# Headless rerun latency of the dashboards through Streamlit's AppTest, with
+# DuckDB reading local files in place of the MySQL star schema:
+#   python -m weather.latency                        # both dashboards on the BMKG CSV files
+#   python -m weather.latency --synthetic 100x10     # generated data, see weather.bench
+#   python -m weather.latency --json latency.json
+# Exits non-zero when any step raises or its widget is missing.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Seconds one rerun may take before AppTest gives up
+RERUN_TIMEOUT = 300
+
+# Widget labels of each dashboard; the section radio is found by its key
+SCRIPTS = {
+    'streamlit_dashboard.py': {
+        'mode': "Location Selection Mode:",
+        'modes': ("Select All", "Select Multiple Locations", "Select One Location"),
+        'location': "Select one location:",
+        'locations': "Select 2-4 locations to compare:",
+        'period': "Select Time Period:",
+        'sections': ("📊 Overview", "🌧️ Rainfall Analysis", "🌡️ Temperature", "💨 Wind & Humidity",
+                     "📈 Time Series", "🗺️ Map", "📋 Pivot Table"),
+        'smoothing': "Exponential smoothing",
+        'span': "Smoothing span (days):",
+        'pivot_type': "Select pivot table analysis type:",
+        'pivots': ("Weather Statistics by Region", "Seasonal Analysis", "Custom Pivot Table"),
+        'pivot_agg': "Select Aggregation Function:",
+    },
+    'streamlit_dashboard_id.py': {
+        'mode': "Mode Pemilihan Lokasi:",
+        'modes': ("Pilih Semua", "Pilih Beberapa Lokasi", "Pilih Satu Lokasi"),
+        'location': "Pilih satu lokasi:",
+        'locations': "Pilih 2-4 lokasi untuk dibandingkan:",
+        'period': "Pilih Periode Waktu:",
+        'sections': ("📊 Ringkasan", "🌧️ Analisis Hujan", "🌡️ Suhu", "💨 Angin & Kelembaban",
+                     "📈 Grafik Waktu", "🗺️ Peta", "📋 Pivot Table"),
+        'smoothing': "Pemulusan eksponensial",
+        'span': "Rentang pemulusan (hari):",
+        'pivot_type': "Pilih jenis analisis pivot table:",
+        'pivots': ("Statistik Cuaca per Wilayah", "Analisis Musiman", "Pivot Table Kustom"),
+        'pivot_agg': "Pilih Fungsi Agregasi:",
+    },
+}
+
+SECTION_KEY = 'active_section'
+TIME_SERIES, PIVOT_TABLE = 4, 6
+
+
+def _last_year(widget):
+    """The last 365 days of the current date range"""
+    start, end = widget.value
+    return max(start, end - datetime.timedelta(days=365)), end
+
+
+def interactions(labels):
+    """(name, widget kind, label or key, value) of each scripted interaction, in order.
+
+    Filters change first, then every section is opened in turn, with the
+    moving-average controls on the time series and each pivot mode on the
+    pivot table.
+    """
+    all_locations, _, one_location = labels['modes']
+    steps = [
+        ('filter: one location', 'radio', labels['mode'], one_location),
+        ('filter: all locations', 'radio', labels['mode'], all_locations),
+        ('filter: last 365 days', 'date_input', labels['period'], _last_year),
+    ]
+    for i, section in enumerate(labels['sections']):
+        steps.append((f'section: {section}', 'radio', SECTION_KEY, section))
+        if i == TIME_SERIES:
+            steps += [('moving average: exponential smoothing', 'checkbox', labels['smoothing'], True),
+                      ('moving average: span 30 days', 'slider', labels['span'], 30)]
+        if i == PIVOT_TABLE:
+            steps += [(f'pivot: {pivot}', 'selectbox', labels['pivot_type'], pivot) for pivot in labels['pivots']]
+            steps.append(('pivot: standard deviation', 'selectbox', labels['pivot_agg'], 'std'))
+    return steps
+
+
+def find_widget(at, kind, name):
+    """The widget of a kind with the given label or key"""
+    for widget in getattr(at, kind):
+        if widget.label == name or getattr(widget, 'key', None) == name:
+            return widget
+    raise LookupError(f"No {kind} labelled {name!r}")
+
+
+def figure_bytes(at):
+    """(number of Plotly figures, bytes of their JSON specs) on the page"""
+    specs = [element.proto.spec for element in at.get('plotly_chart')]
+    return len(specs), sum(len(spec.encode('utf-8')) for spec in specs)
+
+
+def timed_run(at, name, action=None):
+    """Apply action, rerun the app and measure it; returns one result row"""
+    start = time.perf_counter()
+    (action() if action else at).run(timeout=RERUN_TIMEOUT)
+    seconds = time.perf_counter() - start
+    figures, payload = figure_bytes(at)
+    return {
+        'step': name,
+        'ms': round(seconds * 1000, 1),
+        'figures': figures,
+        'figure_bytes': payload,
+        'errors': [str(exception.value) for exception in at.exception],
+    }
+
+
+def run_script(script):
+    """Cold start, warm rerun and every scripted interaction of one dashboard.
+
+    AppTest reruns the whole script for every interaction, so a widget
+    inside a fragment is measured as a full rerun: an upper bound on what a
+    browser session waits for.
+    """
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    at = AppTest.from_file(os.path.join(ROOT, script), default_timeout=RERUN_TIMEOUT)
+    results = [timed_run(at, 'cold start'), timed_run(at, 'warm rerun')]
+    for name, kind, label, value in interactions(SCRIPTS[script]):
+        try:
+            widget = find_widget(at, kind, label)
+        except LookupError as e:
+            results.append({'step': name, 'ms': None, 'figures': 0, 'figure_bytes': 0, 'errors': [str(e)]})
+            continue
+        new_value = value(widget) if callable(value) else value
+        results.append(timed_run(at, name, lambda: widget.set_value(new_value)))
+    return results
+
+
+def write_synthetic_source(size, path):
+    """Write a Parquet snapshot of synthetic data for 'STATIONSxYEARS', readable by the DuckDB backend"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    from weather import bench
+
+    stations, years = (int(part) for part in size.split('x'))
+    pq.write_table(pa.Table.from_pandas(bench.synthetic_frame(stations, years), preserve_index=False), path)
+
+
+def use_local_data(source, synthetic, directory):
+    """Point the DuckDB backend at source, or at synthetic data written to directory.
+
+    Must run before any weather module but this one is imported, as they
+    read their settings from the environment on import.
+    """
+    os.environ['WEATHER_DATA_BACKEND'] = 'duckdb'
+    os.environ.pop('WEATHER_CACHE_DIR', None)
+    os.environ['WEATHER_DUCKDB_SOURCE'] = os.path.join(directory, 'weather.parquet') if synthetic else source
+    if synthetic:
+        write_synthetic_source(synthetic, os.environ['WEATHER_DUCKDB_SOURCE'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure dashboard rerun latency headlessly with AppTest")
+    parser.add_argument('--scripts', default=','.join(SCRIPTS), help="comma-separated dashboard scripts")
+    parser.add_argument('--source', default=os.path.join(ROOT, 'Data'),
+                        help="BMKG CSV folder or Parquet snapshot for the DuckDB backend")
+    parser.add_argument('--synthetic', metavar='STATIONSxYEARS', help="generate the data instead, e.g. 100x10")
+    parser.add_argument('--json', help="also write the results to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        use_local_data(args.source, args.synthetic, directory)
+        report = {}
+        for script in args.scripts.split(','):
+            print(f"== {script}")
+            report[script] = run_script(script)
+            for row in report[script]:
+                latency = f"{row['ms']:>9.1f} ms" if row['ms'] is not None else '  skipped   '
+                print(f"  {row['step']:<48} {latency} {row['figures']:>3} figures "
+                      f"{row['figure_bytes'] / 1e3:>9.1f} kB{'  ERROR: ' + row['errors'][0] if row['errors'] else ''}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    # A step that raised was not measured, so the run fails
+    failed = sum(bool(row['errors']) for rows in report.values() for row in rows)
+    if failed:
+        sys.exit(f"{failed} step(s) failed")
+
+
+if __name__ == '__main__':
+    main()
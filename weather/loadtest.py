@@ -0,0 +1,221 @@
+import argparse
+import datetime
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+from streamlit.testing.v1 import AppTest
+
+from weather import latency
+
+# Concurrent dashboard sessions in one process, as in one Streamlit replica
+# where every session reruns in its own thread:
+#   python -m weather.loadtest --sessions 8 --reruns 30
+#   python -m weather.loadtest --sessions 32 --synthetic 100x10 --json load.json
+
+# Seconds between process memory samples
+SAMPLE_SECONDS = 0.5
+
+# Seconds a session waits for the others to be ready before giving up
+START_TIMEOUT = 300
+
+ACTIONS = ('one location', 'compare locations', 'all locations', 'date range', 'section')
+
+
+def rss_bytes():
+    """Resident set size of this process, or None where it cannot be read"""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return None
+
+
+def _megabytes(value):
+    return None if value is None else round(value / 1e6, 1)
+
+
+def random_action(labels, rng, period):
+    """(action, [(widget kind, label or key, value)]) of one random filter or section change.
+
+    A value can be a function of the widget, for choices among its options.
+    """
+    all_mode, compare_mode, one_mode = labels['modes']
+    action = rng.choice(ACTIONS)
+    if action == 'one location':
+        return action, [('radio', labels['mode'], one_mode),
+                        ('selectbox', labels['location'], lambda widget: rng.choice(widget.options))]
+    if action == 'compare locations':
+        return action, [('radio', labels['mode'], compare_mode),
+                        ('multiselect', labels['locations'],
+                         lambda widget: rng.sample(widget.options, min(len(widget.options), rng.randint(2, 4))))]
+    if action == 'all locations':
+        return action, [('radio', labels['mode'], all_mode)]
+    if action == 'date range':
+        start, end = period
+        first = start + datetime.timedelta(days=rng.randint(0, (end - start).days))
+        last = first + datetime.timedelta(days=rng.randint(0, (end - first).days))
+        return action, [('date_input', labels['period'], (first, last))]
+    return action, [('radio', latency.SECTION_KEY, rng.choice(labels['sections']))]
+
+
+def run_session(script, reruns, seed, results, start):
+    """One simulated user: open the dashboard, then make reruns random changes.
+
+    A failure ends the session with an error row; before the start it also
+    breaks the barrier, so the other sessions do not wait for it forever.
+    """
+    rng = random.Random(seed)
+    labels = latency.SCRIPTS[script]
+    action = 'open'
+
+    def timed(action, rerun):
+        began = time.perf_counter()
+        rerun()
+        results.append({'script': script, 'action': action, 'ms': (time.perf_counter() - began) * 1000,
+                        'errors': len(at.exception)})
+
+    try:
+        at = AppTest.from_file(os.path.join(latency.ROOT, script), default_timeout=latency.RERUN_TIMEOUT)
+        start.wait(timeout=START_TIMEOUT)
+        timed(action, lambda: at.run(timeout=latency.RERUN_TIMEOUT))
+        period = latency.find_widget(at, 'date_input', labels['period']).value
+        for _ in range(reruns):
+            action, changes = random_action(labels, rng, period)
+            for kind, label, value in changes:
+                try:
+                    widget = latency.find_widget(at, kind, label)
+                except LookupError as e:
+                    results.append({'script': script, 'action': action, 'ms': None, 'errors': 1, 'error': str(e)})
+                    break
+                new_value = value(widget) if callable(value) else value
+                timed(action, lambda: widget.set_value(new_value).run(timeout=latency.RERUN_TIMEOUT))
+    except Exception as e:
+        start.abort()
+        results.append({'script': script, 'action': action, 'ms': None, 'errors': 1,
+                        'error': f"{type(e).__name__}: {e}"})
+
+
+def sample_memory(samples, stop):
+    """Append (seconds, RSS bytes) every SAMPLE_SECONDS until stop is set"""
+    began = time.perf_counter()
+    while not stop.is_set():
+        samples.append((time.perf_counter() - began, rss_bytes()))
+        stop.wait(SAMPLE_SECONDS)
+
+
+def latency_summary(results):
+    """Count, p50, p95 and max rerun milliseconds, overall and per action"""
+    summary = {}
+    for action in ('all',) + ACTIONS + ('open',):
+        ms = [row['ms'] for row in results if row['ms'] is not None and action in ('all', row['action'])]
+        if ms:
+            summary[action] = {'count': len(ms), 'p50_ms': round(float(np.percentile(ms, 50)), 1),
+                               'p95_ms': round(float(np.percentile(ms, 95)), 1), 'max_ms': round(max(ms), 1)}
+    return summary
+
+
+def run_load(scripts, sessions, reruns, seed=0):
+    """Run the sessions concurrently after one warm-up session and return the report"""
+    # Imported after the environment is set up, see latency.use_local_data
+    from weather import perf
+
+    rss_start = rss_bytes()
+    # Loads the data and the shared state once, so growth is what the sessions add
+    warmup = AppTest.from_file(os.path.join(latency.ROOT, scripts[0]), default_timeout=latency.RERUN_TIMEOUT)
+    warmup.run()
+    rss_loaded = rss_bytes()
+    caches_before = perf.monitor.cache_summary().set_index('cache')
+
+    results, samples = [], []
+    stop, start = threading.Event(), threading.Barrier(sessions)
+    sampler = threading.Thread(target=sample_memory, args=(samples, stop), daemon=True)
+    threads = [threading.Thread(target=run_session, args=(scripts[i % len(scripts)], reruns, seed + i, results, start))
+               for i in range(sessions)]
+    sampler.start()
+    began = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - began
+    stop.set()
+    sampler.join()
+
+    caches = perf.monitor.cache_summary().set_index('cache')
+    misses = caches['misses'].sub(caches_before['misses'], fill_value=0).astype(int)
+    rss_peak = max((rss for _, rss in samples if rss is not None), default=None)
+    rss_end = rss_bytes()
+    return {
+        'sessions': sessions,
+        'reruns_per_session': reruns,
+        'seconds': round(elapsed, 2),
+        'reruns_per_second': round(sum(row['ms'] is not None for row in results) / elapsed, 2),
+        'errors': sum(row['errors'] for row in results),
+        'error_messages': sorted({row['error'] for row in results if 'error' in row}),
+        'latency': latency_summary(results),
+        'rss_mb': {
+            'start': _megabytes(rss_start),
+            'data_loaded': _megabytes(rss_loaded),
+            'peak': _megabytes(rss_peak),
+            'end': _megabytes(rss_end),
+            # Memory each extra session costs, for sizing replicas
+            'per_session': _megabytes((rss_peak - rss_loaded) / sessions if rss_peak and rss_loaded else None),
+        },
+        'rss_timeline_mb': [(round(seconds, 1), round(rss / 1e6, 1)) for seconds, rss in samples if rss],
+        # Computations cached during the run; each miss stores at most one entry, up to the cache's max_entries
+        'cache_misses': misses[misses > 0].to_dict(),
+        'cache_hit_rate': caches['hit_rate'].dropna().to_dict(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate concurrent dashboard sessions and record latency and memory")
+    parser.add_argument('--sessions', type=int, default=8)
+    parser.add_argument('--reruns', type=int, default=20, help="random changes per session")
+    parser.add_argument('--scripts', default=','.join(latency.SCRIPTS),
+                        help="comma-separated dashboard scripts, assigned to sessions in turn")
+    parser.add_argument('--source', default=os.path.join(latency.ROOT, 'Data'),
+                        help="BMKG CSV folder or Parquet snapshot for the DuckDB backend")
+    parser.add_argument('--synthetic', metavar='STATIONSxYEARS', help="generate the data instead, e.g. 100x10")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help="also write the report to this file")
+    args = parser.parse_args()
+
+    # Cache hits and misses come from perf mode; no log file is written
+    os.environ['DASHBOARD_PERF'] = '1'
+    os.environ['DASHBOARD_PERF_LOG'] = ''
+    with tempfile.TemporaryDirectory() as directory:
+        latency.use_local_data(args.source, args.synthetic, directory)
+        report = run_load(args.scripts.split(','), args.sessions, args.reruns, args.seed)
+
+    print(f"{report['sessions']} sessions x {report['reruns_per_session']} changes in {report['seconds']} s "
+          f"({report['reruns_per_second']} reruns/s, {report['errors']} errors)")
+    for action, row in report['latency'].items():
+        print(f"  {action:<18} n={row['count']:<5} p50 {row['p50_ms']:>8.1f} ms  p95 {row['p95_ms']:>8.1f} ms  "
+              f"max {row['max_ms']:>8.1f} ms")
+    print("RSS (MB): " + ', '.join(f"{name} {value}" for name, value in report['rss_mb'].items()))
+    for message in report['error_messages']:
+        print(f"  ERROR: {message}")
+    if report['cache_misses']:
+        print("Cache misses: " + ', '.join(f"{name} {count}" for name, count in report['cache_misses'].items()))
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
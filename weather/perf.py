@@ -0,0 +1,201 @@
+import collections
+import contextlib
+import functools
+import json
+import logging
+import logging.handlers
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import event
+
+# Opt-in: set DASHBOARD_PERF=1 to record timings and show the performance panel
+PERF_ENABLED = os.getenv('DASHBOARD_PERF', '0') == '1'
+PERF_LOG_PATH = os.getenv('DASHBOARD_PERF_LOG', 'perf_log.jsonl')
+PERF_LOG_BYTES = 5 * 1024 * 1024
+PERF_LOG_BACKUPS = 3
+
+
+class PerfMonitor:
+    """Process-wide recorder for query, cache, cleaning and tab timings"""
+
+    def __init__(self, enabled=PERF_ENABLED, log_path=PERF_LOG_PATH, max_events=2000):
+        self.enabled = enabled
+        self.events = collections.deque(maxlen=max_events)
+        self.counters = collections.Counter()
+        self.gauges = {}
+        self._lock = threading.Lock()
+        self._logger = None
+        if enabled and log_path:
+            self._logger = logging.getLogger(f'weather.perf.{id(self)}')
+            self._logger.propagate = False
+            self._logger.setLevel(logging.INFO)
+            handler = logging.handlers.RotatingFileHandler(
+                log_path, maxBytes=PERF_LOG_BYTES, backupCount=PERF_LOG_BACKUPS, encoding='utf-8'
+            )
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            self._logger.addHandler(handler)
+
+    def record(self, kind, name, seconds, **extra):
+        """Store one timing event and append it to the JSON log"""
+        if not self.enabled:
+            return
+        entry = {'ts': time.time(), 'kind': kind, 'name': name, 'ms': round(seconds * 1000, 3), **extra}
+        with self._lock:
+            self.events.append(entry)
+        if self._logger is not None:
+            self._logger.info(json.dumps(entry, default=str))
+
+    def count(self, kind, name, amount=1):
+        """Increase a named counter"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[(kind, name)] += amount
+
+    def gauge(self, name, value):
+        """Remember the latest value of a measurement, e.g. memory in bytes"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.gauges[name] = value
+        if self._logger is not None:
+            self._logger.info(json.dumps({'ts': time.time(), 'kind': 'gauge', 'name': name, 'value': value}))
+
+    @contextlib.contextmanager
+    def timed(self, kind, name, **extra):
+        """Context manager that records how long its block takes"""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(kind, name, time.perf_counter() - start, **extra)
+
+    def timed_function(self, kind, name=None):
+        """Decorator version of timed()"""
+        def decorate(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timed(kind, name or func.__name__):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def cached(self, name, cache_decorator):
+        """Apply a Streamlit cache decorator and count its hits and misses.
+
+        The function body only runs on a miss, so calls minus body runs gives
+        the hit count. Without perf mode this is just cache_decorator.
+        """
+        def decorate(func):
+            if not self.enabled:
+                return cache_decorator(func)
+
+            @functools.wraps(func)
+            def on_miss(*args, **kwargs):
+                self.count('cache_miss', name)
+                with self.timed('compute', name):
+                    return func(*args, **kwargs)
+
+            cached_func = cache_decorator(on_miss)
+
+            @functools.wraps(func)
+            def call(*args, **kwargs):
+                self.count('cache_call', name)
+                return cached_func(*args, **kwargs)
+
+            call.clear = cached_func.clear
+            return call
+        return decorate
+
+    def instrument_engine(self, engine):
+        """Hook SQLAlchemy engine and pool events to time queries and checkouts"""
+        if not self.enabled:
+            return engine
+
+        # The start time lives on the execution context, so a failed query
+        # leaves nothing behind on its pooled connection
+        @event.listens_for(engine, 'before_cursor_execute')
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            context.perf_query_start = time.perf_counter()
+
+        @event.listens_for(engine, 'after_cursor_execute')
+        def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            summary = ' '.join(statement.split())[:80]
+            self.record('query', summary, time.perf_counter() - context.perf_query_start, rows=cursor.rowcount)
+
+        @event.listens_for(engine, 'handle_error')
+        def handle_error(exception_context):
+            start = getattr(exception_context.execution_context, 'perf_query_start', None)
+            if start is not None:
+                summary = ' '.join(exception_context.statement.split())[:80]
+                self.record('query', summary, time.perf_counter() - start, failed=True)
+
+        @event.listens_for(engine.pool, 'connect')
+        def on_connect(dbapi_connection, connection_record):
+            self.count('pool', 'new connections')
+
+        @event.listens_for(engine.pool, 'checkout')
+        def on_checkout(dbapi_connection, connection_record, connection_proxy):
+            self.count('pool', 'checkouts')
+
+        return engine
+
+    def timing_summary(self):
+        """Count, mean, p95 and max milliseconds per (kind, name)"""
+        with self._lock:
+            events = list(self.events)
+        if not events:
+            return pd.DataFrame(columns=['kind', 'name', 'count', 'mean_ms', 'p95_ms', 'max_ms'])
+        frame = pd.DataFrame(events)
+        summary = frame.groupby(['kind', 'name'])['ms'].agg(
+            count='count',
+            mean_ms='mean',
+            p95_ms=lambda ms: np.percentile(ms, 95),
+            max_ms='max'
+        ).round(2).reset_index()
+        return summary.sort_values('max_ms', ascending=False)
+
+    def cache_summary(self):
+        """Calls, misses and hit rate for each tracked cache"""
+        with self._lock:
+            counters = dict(self.counters)
+        names = sorted({name for kind, name in counters if kind == 'cache_call'})
+        rows = []
+        for name in names:
+            calls = counters.get(('cache_call', name), 0)
+            misses = counters.get(('cache_miss', name), 0)
+            rows.append({
+                'cache': name,
+                'calls': calls,
+                'misses': misses,
+                'hit_rate': round((calls - misses) / calls, 3) if calls else None,
+            })
+        return pd.DataFrame(rows, columns=['cache', 'calls', 'misses', 'hit_rate'])
+
+    def counter_summary(self):
+        """Counters other than cache calls, e.g. pool checkouts"""
+        with self._lock:
+            counters = dict(self.counters)
+        return {f'{kind}: {name}': value for (kind, name), value in sorted(counters.items())
+                if not kind.startswith('cache_')}
+
+    def reset(self):
+        with self._lock:
+            self.events.clear()
+            self.counters.clear()
+            self.gauges.clear()
+
+
+def frame_memory(df):
+    """Bytes used by a DataFrame including its string contents"""
+    return int(df.memory_usage(deep=True).sum())
+
+
+monitor = PerfMonitor()
@@ -0,0 +1,198 @@
+import argparse
+import collections
+import hashlib
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+import pyarrow as pa
+from dotenv import load_dotenv
+
+from weather import aggregations, data
+
+# Read-only HTTP service for the dashboard aggregates:
+#   python -m weather.service --port 8510
+#   GET /aggregates/monthly-rainfall?agg=max&locations=Bogor (Kota)&start=2024-01-01
+#   GET /aggregates/regional-statistics?format=arrow
+#   GET /aggregates/seasonal?variable=suhu_rata
+
+SERVICE_HOST = os.getenv('WEATHER_SERVICE_HOST', '127.0.0.1')
+SERVICE_PORT = int(os.getenv('WEATHER_SERVICE_PORT', '8510'))
+
+# How often the fact table is checked for new data
+DATA_CHECK_SECONDS = 60
+RESULT_CACHE_ENTRIES = 256
+
+ARROW_MIME = 'application/vnd.apache.arrow.stream'
+
+VARIABLES = ('rainfall_clean', 'suhu_min', 'suhu_max', 'suhu_rata', 'kelembaban_rata', 'kecepatan_angin_rata')
+
+
+def monthly_rainfall(df, params):
+    agg = params.get('agg', 'mean')
+    if agg not in ('mean', 'max', 'min'):
+        raise ValueError("agg must be mean, max or min")
+    return aggregations.monthly_pivot(df, 'rainfall_clean', 'location_full', aggfunc=agg)
+
+
+def regional_statistics(df, params):
+    return aggregations.regional_statistics(df, 'location_full')
+
+
+def seasonal(df, params):
+    variable = params.get('variable', 'rainfall_clean')
+    if variable not in VARIABLES:
+        raise ValueError(f"variable must be one of {', '.join(VARIABLES)}")
+    return aggregations.seasonal_pivot(df, variable, 'location_full')
+
+
+ENDPOINTS = {
+    'monthly-rainfall': monthly_rainfall,
+    'regional-statistics': regional_statistics,
+    'seasonal': seasonal,
+}
+
+
+def filter_frame(df, params):
+    """Apply the locations, start and end query parameters like the dashboard sidebar"""
+    if params.get('locations'):
+        df = df[df['location_full'].isin(params['locations'].split(','))]
+    if params.get('start'):
+        df = df[df['date'] >= pd.Timestamp(params['start'])]
+    if params.get('end'):
+        df = df[df['date'] <= pd.Timestamp(params['end'])]
+    return df
+
+
+def to_json(frame, version):
+    body = json.loads(frame.reset_index().to_json(orient='split', index=False, date_format='iso'))
+    return json.dumps({'data_version': list(version), **body}).encode('utf-8')
+
+
+def to_arrow(frame, version):
+    frame = frame.reset_index()
+    frame.columns = [str(column) for column in frame.columns]
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    table = table.replace_schema_metadata({b'data_version': json.dumps(list(version)).encode('utf-8')})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+class AggregateService:
+    """Loads the cleaned data once and serves cached, versioned aggregates"""
+
+    def __init__(self, engine, check_seconds=DATA_CHECK_SECONDS, max_entries=RESULT_CACHE_ENTRIES):
+        self.engine = engine
+        self.check_seconds = check_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._df = None
+        self._version = None
+        self._checked = 0
+        self._results = collections.OrderedDict()
+
+    def current(self):
+        """(data version, frame), reloading when the fact table has changed"""
+        with self._lock:
+            now = time.monotonic()
+            if self._df is None or now - self._checked > self.check_seconds:
+                version = data.query_data_version(self.engine)
+                if version != self._version or self._df is None:
+                    df = data.read_weather_data(self.engine)
+                    if df is None:
+                        raise LookupError("No weather data available")
+                    self._df, self._version = df, version
+                    self._results.clear()
+                self._checked = now
+            return self._version, self._df
+
+    def etag(self, version, endpoint, params, fmt):
+        key = repr((version, endpoint, sorted(params.items()), fmt))
+        return '"' + hashlib.sha1(key.encode('utf-8')).hexdigest() + '"'
+
+    def render(self, endpoint, params, fmt, etag, version, df):
+        """Serialized result for etag, computed on the first request only"""
+        with self._lock:
+            if etag in self._results:
+                self._results.move_to_end(etag)
+                return self._results[etag]
+
+        frame = ENDPOINTS[endpoint](filter_frame(df, params), params)
+        body = to_arrow(frame, version) if fmt == 'arrow' else to_json(frame, version)
+
+        with self._lock:
+            self._results[etag] = body
+            while len(self._results) > self.max_entries:
+                self._results.popitem(last=False)
+        return body
+
+
+class AggregateHandler(BaseHTTPRequestHandler):
+    service = None
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        parts = url.path.strip('/').split('/')
+
+        if url.path.rstrip('/') in ('', '/health'):
+            return self.send_body(200, json.dumps({'status': 'ok'}).encode('utf-8'), 'application/json')
+        if parts == ['aggregates']:
+            return self.send_body(200, json.dumps(sorted(ENDPOINTS)).encode('utf-8'), 'application/json')
+        if len(parts) != 2 or parts[0] != 'aggregates' or parts[1] not in ENDPOINTS:
+            return self.send_error_json(404, "Unknown endpoint")
+
+        fmt = params.pop('format', None) or ('arrow' if ARROW_MIME in self.headers.get('Accept', '') else 'json')
+        try:
+            version, df = self.service.current()
+        except Exception as e:
+            return self.send_error_json(503, str(e))
+
+        etag = self.service.etag(version, parts[1], params, fmt)
+        if etag in [tag.strip() for tag in self.headers.get('If-None-Match', '').split(',')]:
+            return self.send_body(304, b'', None, etag)
+
+        try:
+            body = self.service.render(parts[1], params, fmt, etag, version, df)
+        except (ValueError, KeyError) as e:
+            return self.send_error_json(400, str(e))
+        self.send_body(200, body, ARROW_MIME if fmt == 'arrow' else 'application/json', etag)
+
+    def send_body(self, status, body, content_type, etag=None):
+        self.send_response(status)
+        if content_type:
+            self.send_header('Content-Type', content_type)
+        if etag:
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def send_error_json(self, status, message):
+        self.send_body(status, json.dumps({'error': message}).encode('utf-8'), 'application/json')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve BMKG weather aggregates over HTTP")
+    parser.add_argument('--host', default=SERVICE_HOST)
+    parser.add_argument('--port', type=int, default=SERVICE_PORT)
+    args = parser.parse_args()
+
+    load_dotenv()
+    engine = data.create_engine_from_env() if data.needs_database() else None
+    AggregateHandler.service = AggregateService(engine)
+    server = ThreadingHTTPServer((args.host, args.port), AggregateHandler)
+    print(f"Serving aggregates on http://{args.host}:{args.port}/aggregates")
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
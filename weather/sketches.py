@@ -0,0 +1,200 @@
+import abc
+import threading
+
+import numpy as np
+import pandas as pd
+
+from weather import perf
+
+# Relative accuracy of every quantile read from a sketch
+RELATIVE_ACCURACY = 0.01
+
+# Smallest and largest rainfall (mm) with their own buckets; smaller values count as dry, larger are clipped
+MIN_RAINFALL = 0.1
+MAX_RAINFALL = 1000.0
+
+_GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+_LOG_GAMMA = np.log(_GAMMA)
+
+# Bucket 0 holds dry days; bucket k > 0 holds (MIN_RAINFALL * gamma^(k-2), MIN_RAINFALL * gamma^(k-1)]
+BUCKETS = int(np.ceil(np.log(MAX_RAINFALL / MIN_RAINFALL) / _LOG_GAMMA)) + 2
+
+# Value reported for each bucket, within RELATIVE_ACCURACY of everything in it
+BUCKET_VALUES = np.r_[0.0, MIN_RAINFALL * 2 * _GAMMA ** np.arange(BUCKETS - 1) / (_GAMMA + 1)]
+
+RETURN_PERIODS = (1, 2, 5, 10, 25)
+
+# Months (year * 12 + month - 1) packed into a histogram key, enough for any calendar year below 10000
+_MONTHS = 12 * 10000
+
+
+def bucket_index(values):
+    """Sketch bucket of each rainfall value (NaN must be removed first)"""
+    values = np.asarray(values, dtype='float64')
+    index = np.zeros(len(values), dtype=np.int64)
+    measured = values >= MIN_RAINFALL
+    exponent = np.ceil(np.log(values[measured] / MIN_RAINFALL) / _LOG_GAMMA)
+    index[measured] = np.clip(exponent, 0, BUCKETS - 2).astype(np.int64) + 1
+    return index
+
+
+def quantiles(counts, probabilities, minimum=0.0):
+    """Quantiles of bucket counts along the last axis, NaN where no value reaches minimum.
+
+    counts can have any leading shape, such as (stations, 12, BUCKETS), and
+    the result has that shape plus one axis for the probabilities.
+    """
+    counts = np.where(BUCKET_VALUES >= minimum, counts, 0).astype(np.int64)
+    cumulative = np.cumsum(counts, axis=-1)
+    total = cumulative[..., -1:]
+    result = []
+    for probability in probabilities:
+        rank = np.floor(probability * (total - 1))
+        bucket = np.argmax(cumulative > rank, axis=-1)
+        result.append(np.where(total[..., 0] > 0, BUCKET_VALUES[bucket], np.nan))
+    return np.stack(result, axis=-1)
+
+
+def return_levels(counts, periods=RETURN_PERIODS):
+    """Daily rainfall exceeded on average once per period (years), from one station's or a merged sketch.
+
+    The level for T years is the daily quantile with exceedance probability
+    1 / (T * 365.25). Periods longer than the observed record are NaN, as the
+    sketch cannot extrapolate beyond the data.
+    """
+    counts = np.asarray(counts)
+    years = counts.sum() / 365.25
+    levels = quantiles(counts, [1 - 1 / (period * 365.25) for period in periods])
+    return np.where(np.asarray(periods) <= years, levels, np.nan)
+
+
+class MonthlyHistograms(abc.ABC):
+    """Histograms of daily values per (station, calendar month of each year).
+
+    Only non-empty buckets are stored, as a sorted array of keys packing
+    (station, month, bucket) with a uint32 count for each, so the state grows
+    with the distinct values seen rather than with stations x months x
+    buckets. Histograms merge by addition: any selection of stations and
+    whole months is one sum over a slice of the keys, whatever the history
+    length. Like the climatology normals, update() only adds the days it has
+    not seen yet. Subclasses set value_cols and buckets and map rows to
+    buckets in _bucket_rows.
+    """
+
+    name = 'histograms'
+    value_cols = ()
+    buckets = 0
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.stations = {}
+        self._last_date = {}
+        self._keys = np.zeros(0, dtype=np.int64)
+        self._counts = np.zeros(0, dtype=np.uint32)
+
+    @abc.abstractmethod
+    def _bucket_rows(self, df, value_cols):
+        """(valid, bucket): which rows of df are counted, and the bucket of each counted row"""
+
+    def _key(self, station_index, months, bucket=0):
+        # Sorting by key groups each station's months together, in order
+        return (np.asarray(station_index, dtype=np.int64) * _MONTHS + months) * self.buckets + bucket
+
+    def update(self, df, station_col='location_full', date_col='date', *value_cols):
+        """Add the rows of df that are newer than each station's last seen date.
+
+        When a station's data now ends earlier than before, the source has
+        been replaced and the histograms are rebuilt from df.
+        """
+        with self._lock, perf.monitor.timed(self.name, 'update'):
+            last_dates = df.groupby(station_col, observed=True)[date_col].max()
+            if any(last_dates.get(station, self._last_date[station]) < self._last_date[station]
+                   for station in self._last_date):
+                self.reset()
+
+            new_rows = df
+            if self._last_date:
+                # Unknown stations map to NaT, which never compares as already seen
+                seen_until = pd.to_datetime(df[station_col].map(self._last_date))
+                new_rows = df[~(df[date_col] <= seen_until).to_numpy()]
+            if len(new_rows):
+                self._accumulate(new_rows, station_col, date_col, value_cols or self.value_cols)
+            self._last_date.update(last_dates.to_dict())
+
+    def _accumulate(self, df, station_col, date_col, value_cols):
+        valid, bucket = self._bucket_rows(df, value_cols)
+        df = df[valid]
+        dates = pd.DatetimeIndex(df[date_col])
+        months = dates.year.to_numpy() * 12 + dates.month.to_numpy() - 1
+
+        for station in pd.unique(df[station_col]):
+            if station not in self.stations:
+                self.stations[station] = len(self.stations)
+        if not len(months):
+            return
+
+        station_index = df[station_col].map(self.stations).to_numpy(dtype=np.int64)
+        keys, counts = np.unique(self._key(station_index, months, bucket), return_counts=True)
+        position = np.searchsorted(self._keys, keys)
+        stored = position < len(self._keys)
+        stored[stored] = self._keys[position[stored]] == keys[stored]
+        # Buckets already stored are incremented in place; only new ones are inserted
+        np.add.at(self._counts, position[stored], counts[stored].astype(np.uint32))
+        if not stored.all():
+            self._keys = np.insert(self._keys, position[~stored], keys[~stored])
+            self._counts = np.insert(self._counts, position[~stored], counts[~stored].astype(np.uint32))
+
+    def combine(self, df, station_col='location_full', date_col='date', *value_cols):
+        """(stations, counts) for the rows of a filtered frame, counts shaped (stations, 12, buckets).
+
+        Whole months inside df's date range come from the stored histograms;
+        only the rows of the first and last month, which a date filter may
+        cut, and of stations not seen by update() are bucketed from df.
+        """
+        stations = sorted(pd.unique(df[station_col]))
+        counts = np.zeros((len(stations), 12, self.buckets), dtype=np.int64)
+        if df.empty:
+            return stations, counts
+
+        with self._lock, perf.monitor.timed(self.name, 'combine'):
+            dates = pd.DatetimeIndex(df[date_col])
+            months = dates.year.to_numpy() * 12 + dates.month.to_numpy() - 1
+            low, high = months.min(), months.max()
+            known = df[station_col].isin(list(self.stations)).to_numpy()
+
+            for row, station in enumerate(stations):
+                if station not in self.stations or high - low < 2:
+                    continue
+                start, stop = np.searchsorted(self._keys, [self._key(self.stations[station], low + 1),
+                                                           self._key(self.stations[station], high)])
+                keys = self._keys[start:stop]
+                np.add.at(counts[row], (keys // self.buckets % _MONTHS % 12, keys % self.buckets),
+                          self._counts[start:stop])
+
+            direct = ~known | (months == low) | (months == high)
+            if direct.any():
+                valid, bucket = self._bucket_rows(df[direct], value_cols or self.value_cols)
+                row = pd.Index(stations).get_indexer(df[station_col].to_numpy()[direct][valid])
+                slots = (row * 12 + months[direct][valid] % 12) * self.buckets + bucket
+                counts += np.bincount(slots, minlength=counts.size).reshape(counts.shape)
+        return stations, counts
+
+
+class RainfallSketches(MonthlyHistograms):
+    """Log-bucketed daily rainfall sketches, with quantiles() and return_levels() reading them"""
+
+    name = 'sketches'
+    value_cols = ('rainfall_clean',)
+    buckets = BUCKETS
+
+    def _bucket_rows(self, df, value_cols):
+        rain = pd.to_numeric(df[value_cols[0]], errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+        valid = ~np.isnan(rain)
+        return valid, bucket_index(rain[valid])
+
+
+# Updated by data.load_weather_data, shared by every session of the process
+rainfall = RainfallSketches()
@@ -0,0 +1,115 @@
+import functools
+import os
+
+import numpy as np
+
+# West Java bounding box in degrees: (south, north, west, east)
+BOUNDS = (-7.9, -5.8, 106.3, 108.9)
+
+# Grid spacing in degrees (0.05 is about 5.5 km)
+GRID_STEP = float(os.getenv('WEATHER_GRID_STEP', '0.05'))
+
+# Inverse distance weighting: weight = 1 / distance ** IDW_POWER over the nearest NEIGHBOURS stations
+IDW_POWER = 2
+NEIGHBOURS = 4
+
+# Distances below this (km) count as this, so a cell on a station takes its value
+MIN_DISTANCE_KM = 0.5
+
+# Optional .npy elevation model (metres) with one value per grid cell, shape (latitudes, longitudes)
+GRID_ELEVATION = os.getenv('WEATHER_GRID_ELEVATION')
+
+# Temperature change per metre of height used by the elevation adjustment
+LAPSE_RATE = -0.0065
+
+
+def grid_axes(step=GRID_STEP, bounds=BOUNDS):
+    """(latitudes, longitudes) of the grid cell centres, south to north and west to east"""
+    south, north, west, east = bounds
+    return np.arange(south, north + step / 2, step), np.arange(west, east + step / 2, step)
+
+
+def _distances_km(lat, lon, station_lat, station_lon):
+    """Equirectangular distances between every point and every station, accurate at this scale"""
+    scale_lon = 111.32 * np.cos(np.radians(np.mean(lat)))
+    dy = (lat[:, None] - station_lat[None, :]) * 110.57
+    dx = (lon[:, None] - station_lon[None, :]) * scale_lon
+    return np.hypot(dx, dy)
+
+
+class Interpolator:
+    """IDW weights from a fixed station set onto the grid, kept in sparse form.
+
+    Each grid cell stores the column indices and weights of its nearest
+    stations, an (cells, neighbours) ELL-format sparse matrix, so a frame is
+    one gather and a weighted sum. Many frames (days) go through in one call.
+    """
+
+    def __init__(self, station_lat, station_lon, station_elevation=None,
+                 step=GRID_STEP, power=IDW_POWER, neighbours=NEIGHBOURS):
+        self.lats, self.lons = grid_axes(step)
+        cell_lat, cell_lon = (axis.ravel() for axis in np.meshgrid(self.lats, self.lons, indexing='ij'))
+
+        distances = np.maximum(_distances_km(cell_lat, cell_lon, np.asarray(station_lat, dtype='float64'),
+                                             np.asarray(station_lon, dtype='float64')), MIN_DISTANCE_KM)
+        neighbours = min(neighbours, distances.shape[1])
+        self.indices = np.argsort(distances, axis=1)[:, :neighbours]
+        self.weights = np.take_along_axis(distances, self.indices, axis=1) ** -power
+
+        self.station_elevation = None if station_elevation is None else np.asarray(station_elevation, dtype='float64')
+        self.grid_elevation = load_grid_elevation((len(self.lats), len(self.lons)))
+
+    @property
+    def can_adjust_elevation(self):
+        return (self.grid_elevation is not None and self.station_elevation is not None
+                and not np.isnan(self.station_elevation).any())
+
+    def frames(self, values, adjust_elevation=False):
+        """Grids of shape (frames, latitudes, longitudes) from values of shape (frames, stations).
+
+        Missing station values drop out of each cell's weighted mean. With
+        adjust_elevation, values are reduced to sea level with LAPSE_RATE
+        before interpolation and raised to the grid elevation afterwards.
+        """
+        values = np.atleast_2d(np.asarray(values, dtype='float64'))
+        adjust = adjust_elevation and self.can_adjust_elevation
+        if adjust:
+            values = values - LAPSE_RATE * self.station_elevation
+
+        valid = ~np.isnan(values)
+        weight = valid[:, self.indices] * self.weights
+        total = weight.sum(axis=-1)
+        weighted = (np.where(valid, values, 0.0)[:, self.indices] * weight).sum(axis=-1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            grid = np.where(total > 0, weighted / total, np.nan)
+
+        if adjust:
+            grid = grid + LAPSE_RATE * self.grid_elevation.ravel()
+        return grid.reshape(len(values), len(self.lats), len(self.lons))
+
+
+def load_grid_elevation(shape, path=GRID_ELEVATION):
+    """The WEATHER_GRID_ELEVATION array when it matches the grid shape, else None"""
+    if not path or not os.path.exists(path):
+        return None
+    elevation = np.load(path).astype('float64')
+    return elevation if elevation.shape == shape else None
+
+
+@functools.lru_cache(maxsize=16)
+def interpolator(stations, step=GRID_STEP, power=IDW_POWER, neighbours=NEIGHBOURS):
+    """Interpolator for a tuple of (lat, lon, elevation) stations, built once per station set"""
+    lat, lon, elevation = (np.array(column, dtype='float64') for column in zip(*stations))
+    return Interpolator(lat, lon, elevation, step, power, neighbours)
+
+
+def station_matrix(df, stations, value_col, station_col='location_full', date_col='date', freq='D', how='mean'):
+    """(period starts, values of shape (periods, stations)) for the map frames.
+
+    Rows are resampled to freq per station with how ('mean' or 'sum'); a
+    period a station did not measure at all stays NaN.
+    """
+    grouped = df.groupby([df[date_col].dt.to_period(freq).dt.start_time, station_col], observed=True)[value_col]
+    table = (grouped.sum(min_count=1) if how == 'sum' else grouped.mean()).unstack(station_col)
+    table = table.reindex(columns=list(stations)).sort_index()
+    return table.index, table.to_numpy(dtype='float64', na_value=np.nan)
@@ -0,0 +1,174 @@
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import time
+
+import pyarrow as pa
+
+from weather import fetch
+
+logger = logging.getLogger(__name__)
+
+# Shared directory for cached frames; empty disables the disk cache. Point
+# every replica at the same directory (local disk or a shared volume).
+CACHE_DIR = os.getenv('WEATHER_CACHE_DIR', '')
+CACHE_MAX_BYTES = int(os.getenv('WEATHER_CACHE_MAX_MB', '512')) * 1024 * 1024
+
+# A lock file older than this is left over from a crashed replica
+LOCK_STALE_SECONDS = 600
+
+# Bump when cleaning or the stored layout changes so old files are ignored
+STORE_FORMAT = 2
+
+
+class FrameStore:
+    """Versioned Arrow IPC files of DataFrames, memory-mapped on read.
+
+    Numeric columns are read without copying, so replicas on one host share
+    the file through the OS page cache instead of each holding a private copy.
+    """
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    @property
+    def enabled(self):
+        return bool(self.directory)
+
+    def path_for(self, name, key):
+        """File path for name at key (any repr-able value, e.g. a data version)"""
+        digest = hashlib.sha1(repr((STORE_FORMAT, key)).encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.directory, f'{name}-{digest}.arrow')
+
+    def get_or_create(self, name, key, compute):
+        """Return the stored frame for (name, key), computing and storing it once.
+
+        Only one process computes a missing file; the others wait for it and
+        then map it. Without a cache directory this just calls compute().
+        """
+        if not self.enabled:
+            return compute()
+
+        path = self.path_for(name, key)
+        df = self.read(path)
+        if df is not None:
+            return df
+
+        with self._lock(path):
+            # Another replica may have written it while we waited
+            df = self.read(path)
+            if df is not None:
+                return df
+            df = compute()
+            if df is None:
+                return None
+            try:
+                self.write(path, df)
+            except (OSError, pa.ArrowException) as e:
+                logger.warning("Could not write %s: %s", path, e)
+                return df
+
+        self.evict(keep=path)
+        return self.read(path)
+
+    def read(self, path):
+        """Memory-map a stored frame, or None when missing or unreadable"""
+        start = time.perf_counter()
+        try:
+            with pa.memory_map(path, 'r') as source:
+                table = pa.ipc.open_file(source).read_all()
+        except FileNotFoundError:
+            return None
+        except (OSError, pa.ArrowException) as e:
+            logger.warning("Discarding unreadable cache file %s: %s", path, e)
+            with contextlib.suppress(OSError):
+                os.remove(path)
+            return None
+
+        # Touch the file so eviction removes the least recently used ones first
+        with contextlib.suppress(OSError):
+            os.utime(path)
+
+        metadata = table.schema.metadata or {}
+        df = table.to_pandas(split_blocks=True, date_as_object=False, types_mapper=fetch._PANDAS_TYPES.get)
+        if b'weather.attrs' in metadata:
+            df.attrs = json.loads(metadata[b'weather.attrs'])
+        # Keep the original fetch stats but report where this copy came from
+        if 'fetch_stats' in df.attrs:
+            df.attrs['fetch_stats'].update(backend='disk', seconds=time.perf_counter() - start)
+        return df
+
+    def write(self, path, df):
+        """Write df as an Arrow IPC file, replacing the target atomically"""
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        # from_pandas turns NaN into nulls, which forces a copy on read; keep floats as-is
+        for i, name in enumerate(table.column_names):
+            if df[name].dtype.kind == 'f':
+                table = table.set_column(i, name, pa.array(df[name].to_numpy(), from_pandas=False))
+        table = table.replace_schema_metadata({
+            **(table.schema.metadata or {}),
+            b'weather.attrs': json.dumps(df.attrs, default=str).encode('utf-8'),
+        })
+
+        temp_path = f'{path}.{os.getpid()}.tmp'
+        with pa.OSFile(temp_path, 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(temp_path, path)
+
+    def evict(self, keep=None):
+        """Delete the least recently used files until the directory fits in max_bytes"""
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.arrow'):
+                stat = entry.stat()
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                # Replicas that still map the file keep their pages until they reload
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+    @contextlib.contextmanager
+    def _lock(self, path):
+        """Cross-process lock using an exclusively created lock file"""
+        lock_path = f'{path}.lock'
+        fd = None
+        # Stop waiting as soon as the holder has written the file
+        while not os.path.exists(path):
+            try:
+                fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                break
+            except FileExistsError:
+                try:
+                    age = time.time() - os.path.getmtime(lock_path)
+                except OSError:
+                    continue
+                if age > LOCK_STALE_SECONDS:
+                    with contextlib.suppress(OSError):
+                        os.remove(lock_path)
+                    continue
+                time.sleep(0.2)
+        try:
+            yield
+        finally:
+            if fd is not None:
+                os.close(fd)
+                with contextlib.suppress(OSError):
+                    os.remove(lock_path)
+
+
+frames = FrameStore()
@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+
+from weather import sketches
+
+# Compass sectors of 45 degrees centred on each direction; sector codes index this tuple
+SECTORS = ('N', 'NE', 'E', 'SE', 'S', 'SW', 'W', 'NW')
+
+# Codes for calm ('C', or 0 degrees as in WMO reports) and for empty or unreadable directions
+CALM = len(SECTORS)
+MISSING = -1
+
+# Free-form BMKG direction columns, replaced by int8 sector codes when the data is loaded
+DIRECTION_COLUMNS = ('arah_angin_max', 'arah_angin_terbanyak')
+
+# Column holding the sector codes of each direction column. Codes are only
+# ever read from these columns, never guessed from a column's values.
+SECTOR_COLUMNS = {'arah_angin_max': 'max_wind_sector', 'arah_angin_terbanyak': 'prevailing_wind_sector'}
+
+# Letter directions, 16-point names included, in degrees; north is 360 because 0 means calm
+_LETTER_DEGREES = {name: i * 22.5 or 360.0 for i, name in enumerate(
+    ('N', 'NNE', 'NE', 'ENE', 'E', 'ESE', 'SE', 'SSE', 'S', 'SSW', 'SW', 'WSW', 'W', 'WNW', 'NW', 'NNW'))}
+
+# Upper edges (m/s) of the wind-rose speed classes; the last class is open-ended
+SPEED_EDGES = (1, 2, 3, 5, 8)
+SPEED_LABELS = ('< 1', '1-2', '2-3', '3-5', '5-8', '≥ 8')
+
+
+def sector_codes(values):
+    """int8 sector code (index into SECTORS, CALM or MISSING) of each raw direction.
+
+    Accepts degrees as numbers or text and compass letters; BMKG's 8888 and
+    9999 sentinels and anything outside 0-360 become MISSING.
+    """
+    values = pd.Series(values)
+    text = values.astype('string').str.strip().str.upper()
+    degrees = pd.to_numeric(text, errors='coerce').fillna(text.map(_LETTER_DEGREES))
+    degrees = degrees.to_numpy(dtype='float64', na_value=np.nan)
+    codes = np.full(len(values), MISSING, dtype=np.int8)
+    measured = (degrees > 0) & (degrees <= 360)
+    codes[measured] = ((degrees[measured] + 22.5) // 45 % len(SECTORS)).astype(np.int8)
+    codes[(degrees == 0) | (text == 'C').to_numpy(dtype=bool, na_value=False)] = CALM
+    return codes
+
+
+class WindRoses(sketches.MonthlyHistograms):
+    """Direction x speed-class counts per (station, calendar month of each year).
+
+    A wind rose for any filter is the sum of a few stored histograms of
+    (len(SECTORS) + 1) * len(SPEED_LABELS) counts, calm included.
+    direction_col holds sector codes (see SECTOR_COLUMNS), of any integer width.
+    """
+
+    name = 'wind_roses'
+    buckets = (len(SECTORS) + 1) * len(SPEED_LABELS)
+
+    def __init__(self, direction_col, speed_col):
+        self.value_cols = (direction_col, speed_col)
+        super().__init__()
+
+    def _bucket_rows(self, df, value_cols):
+        direction = df[value_cols[0]].to_numpy().astype(np.int8)
+        speed = pd.to_numeric(df[value_cols[1]], errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+        # Speeds at or above 8888 are BMKG sentinels, not measurements
+        valid = (direction != MISSING) & ~np.isnan(speed) & (speed < 8888)
+        speed_class = np.searchsorted(SPEED_EDGES, speed[valid], side='right')
+        return valid, direction[valid].astype(np.int64) * len(SPEED_LABELS) + speed_class
+
+
+def rose_table(counts):
+    """Percentage of days per (direction, speed) from summed WindRoses counts, and the calm percentage"""
+    table = np.asarray(counts).reshape(-1, len(SECTORS) + 1, len(SPEED_LABELS)).sum(axis=0)
+    total = table.sum()
+    if not total:
+        return pd.DataFrame(columns=['direction', 'speed', 'percent']), 0.0
+    percent = table / total * 100
+    rose = pd.DataFrame({
+        'direction': np.repeat(SECTORS, len(SPEED_LABELS)),
+        'speed': np.tile(SPEED_LABELS, len(SECTORS)),
+        'percent': percent[:len(SECTORS)].ravel(),
+    })
+    return rose, float(percent[CALM].sum())
+
+
+# Updated by data.load_weather_data, shared by every session of the process
+max_wind = WindRoses(SECTOR_COLUMNS['arah_angin_max'], 'kecepatan_angin_max')
+prevailing_wind = WindRoses(SECTOR_COLUMNS['arah_angin_terbanyak'], 'kecepatan_angin_rata')